@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Time to load a REST depth snapshot into CompactOrdBk, per 1k price levels.
+
+    PYTHONPATH=. python benchmarks/bench_book_load.py
+"""
+
+import random
+import time
+
+from sortedcontainers import SortedDict
+
+from bitrue.book import CompactOrdBk, Side, to_int
+
+
+PRECISION = 6
+VOL_PREC = 2
+
+
+def make_depth(levels=1000, seed=1):
+    rng = random.Random(seed)
+    bids = [['%.6f' % (0.5 - i * 0.000001), '%.2f' % rng.uniform(1, 10000)] for i in range(levels)]
+    asks = [['%.6f' % (0.5 + (i + 1) * 0.000001), '%.2f' % rng.uniform(1, 10000)] for i in range(levels)]
+    return {'lastUpdateId': 1, 'bids': bids, 'asks': asks}
+
+
+def legacy_load(depth):
+    # to_int per value and the lock per insert, as CompactOrdBk did before
+    ob = CompactOrdBk(precision=PRECISION, vol_prec=VOL_PREC)
+    for bid in depth['bids']:
+        ob._add_bid(to_int(bid[0], PRECISION), to_int(bid[1], VOL_PREC))
+    for ask in depth['asks']:
+        ob._add_ask(to_int(ask[0], PRECISION), to_int(ask[1], VOL_PREC))
+    return ob
+
+
+def bulk_load(depth):
+    return CompactOrdBk.from_depth(depth, precision=PRECISION, vol_prec=VOL_PREC)
+
+
+def per_1k_levels(func, depth, n):
+    levels = len(depth['bids']) + len(depth['asks'])
+    start = time.perf_counter()
+    for _ in range(n):
+        func(depth)
+    return (time.perf_counter() - start) / n / levels * 1000
+
+
+def main(n=50):
+    for levels in (100, 1000, 5000):
+        depth = make_depth(levels)
+        legacy, bulk = legacy_load(depth), bulk_load(depth)
+        assert legacy.snapshot(Side.BID, levels) == bulk.snapshot(Side.BID, levels)
+        assert legacy.snapshot(Side.ASK, levels) == bulk.snapshot(Side.ASK, levels)
+        assert isinstance(bulk.bid_ob, SortedDict)
+        for name, func in (('legacy', legacy_load), ('bulk', bulk_load)):
+            print("%5d levels a side, %-8s %8.3f ms per 1k levels" % (levels, name, per_1k_levels(func, depth, n) * 1000))
+
+
+if __name__ == '__main__':
+    main()
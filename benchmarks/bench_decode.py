@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""Decode time of large depth and 24hr ticker responses, stdlib json against bitrue.decoding.
+
+    python benchmarks/bench_decode.py
+"""
+
+import json
+import random
+import time
+
+from bitrue import decoding
+
+
+def make_depth(levels=1000):
+    bids = [["%.6f" % (1.0 - i * 0.000001), "%.4f" % random.uniform(0, 1000)] for i in range(levels)]
+    asks = [["%.6f" % (1.0 + i * 0.000001), "%.4f" % random.uniform(0, 1000)] for i in range(levels)]
+    return json.dumps({'lastUpdateId': 1027024, 'bids': bids, 'asks': asks}).encode()
+
+
+def make_tickers(symbols=1500):
+    fields = ('priceChange', 'priceChangePercent', 'weightedAvgPrice', 'prevClosePrice', 'lastPrice', 'lastQty',
+              'bidPrice', 'askPrice', 'openPrice', 'highPrice', 'lowPrice', 'volume', 'quoteVolume')
+    items = []
+    for i in range(symbols):
+        item = {'symbol': 'SYM%dUSDT' % i, 'openTime': 1620807768007, 'closeTime': 1620894168007,
+                'firstId': 1, 'lastId': 1000, 'count': 1000}
+        item.update({f: "%.8f" % random.uniform(0, 100) for f in fields})
+        items.append(item)
+    return json.dumps(items).encode()
+
+
+def stdlib_json(content):
+    # what requests' Response.json() does
+    return json.loads(content.decode('utf-8'))
+
+
+def per_call(func, content, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func(content)
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main(n=200):
+    for name, content, compact in (('depth 1000 levels', make_depth(), decoding.depth),
+                                   ('ticker/24hr 1500 symbols', make_tickers(), decoding.tickers)):
+        print("%s, %d KB" % (name, len(content) // 1024))
+        for label, func in (('stdlib json', stdlib_json), ('decoding.loads', decoding.loads),
+                            ('compact', compact), ('raw', decoding.raw)):
+            print("  %-16s %8.3f ms/response" % (label, per_call(func, content, n)))
+
+
+if __name__ == '__main__':
+    main()
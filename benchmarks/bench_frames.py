@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Decode time of recorded websocket frames, the old onMessage path against FrameDecoder.
+
+Frames are recorded from the local mock exchange, or read from a file of frames each
+prefixed by its 4 byte big endian length. A new recording is written to that file.
+
+    PYTHONPATH=. python benchmarks/bench_frames.py [frames file]
+"""
+
+import asyncio
+import gzip
+import os
+import struct
+import sys
+import time
+
+import aiohttp
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+from bitrue.decoding import FrameDecoder, peek_channel
+from bitrue.helpers import gen_depth_sub_msg, gen_ticker_sub_msg, gen_trade_sub_msg
+from bitrue.mock_exchange import MockExchange
+
+
+SYMBOLS = ('btrusdt', 'ethusdt', 'xrpusdt', 'ltcusdt')
+
+
+def record(n=5000):
+    async def main():
+        exchange = await MockExchange(rates={'depth': 200, 'ticker': 50, 'trade': 100}, depth_levels=20, seed=1).start()
+        frames = []
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(exchange.stream_url) as ws:
+                    for symbol in SYMBOLS:
+                        for msg in (gen_depth_sub_msg(symbol), gen_ticker_sub_msg(symbol), gen_trade_sub_msg(symbol)):
+                            await ws.send_str(msg)
+                    while len(frames) < n:
+                        frames.append((await ws.receive()).data)
+        finally:
+            await exchange.stop()
+        return frames
+
+    return asyncio.run(main())
+
+
+def save(path, frames):
+    with open(path, 'wb') as f:
+        for frame in frames:
+            f.write(struct.pack('>I', len(frame)))
+            f.write(frame)
+
+
+def load(path):
+    frames = []
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        size, = struct.unpack_from('>I', data, pos)
+        frames.append(data[pos + 4:pos + 4 + size])
+        pos += 4 + size
+    return frames
+
+
+def legacy(frames):
+    # gzip_inflate, decode and ujson.loads of onMessage before FrameDecoder
+    for frame in frames:
+        try:
+            json.loads(gzip.decompress(frame).decode("utf8"))
+        except ValueError:
+            pass
+
+
+def frame_decoder(channels=None):
+    def run(frames):
+        decode = FrameDecoder(channels=channels).decode
+        for frame in frames:
+            decode(frame)
+    return run
+
+
+def per_frame(func, frames, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func(frames)
+    return (time.perf_counter() - start) / n / len(frames) * 1e6
+
+
+def main(path=None, n=50):
+    if path and os.path.exists(path):
+        frames = load(path)
+    else:
+        frames = record()
+        if path:
+            save(path, frames)
+    channels = set(peek_channel(gzip.decompress(frame)) for frame in frames) - {None}
+    no_depth = {channel for channel in channels if 'depth' not in channel}
+    print("%d frames, %d bytes on average, %d channels" % (len(frames), sum(map(len, frames)) // len(frames), len(channels)))
+    for name, func in (('legacy', legacy), ('FrameDecoder', frame_decoder()),
+                       ('FrameDecoder, depth not subscribed', frame_decoder(no_depth))):
+        print("  %-34s %8.2f us/frame" % (name, per_frame(func, frames, n)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""REST requests per second and latency of Client against the local mock exchange.
+
+    PYTHONPATH=. python benchmarks/bench_rest_throughput.py [latency seconds]
+"""
+
+import sys
+import time
+
+from bitrue.bulk import run_bulk
+from bitrue.client import Client
+from bitrue.mock_exchange import MockExchange
+from bitrue.transport import HttpTransport
+
+
+def run(exchange, threads, n, pool_maxsize):
+    client = exchange.configure(Client('key', 'secret', warm_up=False, rate_limiter=False,
+                                       transport=HttpTransport(pool_maxsize=pool_maxsize)))
+    result = run_bulk(client.get_order_book, [{'symbol': 'BTRUSDT', 'limit': 20}] * n, threads)
+    latencies = sorted(result.latencies)
+    client.close_connection()
+    return n / result.elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], len(result.errors)
+
+
+def main(latency=0.0, n=2000):
+    exchange = MockExchange(latency=latency, seed=1).start_in_thread()
+    try:
+        for threads, pool_maxsize in ((1, 1), (8, 1), (8, 8), (32, 10), (32, 32)):
+            per_sec, p50, p99, errors = run(exchange, threads, n, pool_maxsize)
+            print("%3d threads, pool %3d: %8.0f requests/sec  p50 %6.2f ms  p99 %6.2f ms  errors %d"
+                  % (threads, pool_maxsize, per_sec, p50 * 1000, p99 * 1000, errors))
+    finally:
+        exchange.stop_thread()
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.0)
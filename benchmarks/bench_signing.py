@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Signatures per second of the spot and futures signing schemes.
+
+    python benchmarks/bench_signing.py
+"""
+
+import hashlib
+import hmac
+import time
+
+from bitrue.signing import HmacSigner, encode_params
+
+
+SECRET = "x" * 64
+PARAMS = {'symbol': 'BTRUSDT', 'side': 'BUY', 'type': 'LIMIT', 'timeInForce': 'GTC',
+          'quantity': '100', 'price': '0.12345', 'recvWindow': 5000, 'timestamp': 1620807768007}
+BODY = '{"volume": 1, "price": 0.12345, "contractName": "E-BTC-USDT", "type": "LIMIT", "side": "BUY", "open": "OPEN"}'
+
+
+def legacy_spot(data):
+    query_string = '&'.join(["{}={}".format(k, v) for k, v in data.items()])
+    m = hmac.new(SECRET.encode("utf-8"), query_string.encode('utf-8'), hashlib.sha256)
+    return m.hexdigest()
+
+
+def legacy_future(ts, method, path, payload):
+    sig_explain = "%d%s%s%s" %(ts, method.upper(), path, "" if not payload else payload)
+    m = hmac.new(SECRET.encode("utf-8"), sig_explain.encode('utf-8'), hashlib.sha256)
+    return m.hexdigest()
+
+
+def rate(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return n / (time.perf_counter() - start)
+
+
+def main(n=200000):
+    signer = HmacSigner(SECRET)
+    assert signer.sign_params(PARAMS) == legacy_spot(PARAMS)
+    assert signer.sign_request(1620807768007, 'post', '/fapi/v1/order', None, BODY) == \
+        legacy_future(1620807768007, 'post', '/fapi/v1/order', BODY)
+
+    cases = [
+        ('spot legacy', lambda: legacy_spot(PARAMS)),
+        ('spot signer', lambda: signer.sign_params(PARAMS)),
+        ('spot signer, prebuilt query', lambda: signer.sign(encode_params(PARAMS))),
+        ('futures legacy', lambda: legacy_future(1620807768007, 'post', '/fapi/v1/order', BODY)),
+        ('futures signer', lambda: signer.sign_request(1620807768007, 'post', '/fapi/v1/order', None, BODY)),
+    ]
+    for name, func in cases:
+        print("%-30s %10.0f signatures/sec" % (name, rate(func, n)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Messages per second and latency of the asyncio and the Twisted socket managers against the
+local mock exchange. Latency is the receive time less the ``ts`` of the message, in ms.
+
+    PYTHONPATH=. python benchmarks/bench_websockets.py [seconds] [depth messages/sec per socket]
+
+The Twisted reactor can only run once, it is measured last.
+"""
+
+import asyncio
+import sys
+import time
+
+from bitrue.async_websockets import AsyncBitrueSocketManager
+from bitrue.helpers import gen_depth_sub_msg
+from bitrue.mock_exchange import MockExchange
+
+
+SYMBOLS = ('BTRUSDT', 'ETHUSDT', 'XRPUSDT', 'LTCUSDT')
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.latencies = []
+
+    def __call__(self, msg):
+        if msg is not None and 'tick' in msg:
+            self.latencies.append(time.time() * 1000 - msg['ts'])
+
+    def report(self, name, seconds):
+        latencies = sorted(self.latencies) or [0]
+        print("%-8s %8.0f messages/sec  p50 %6.2f ms  p99 %6.2f ms"
+              % (name, len(self.latencies) / seconds, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]))
+
+
+def run_asyncio(exchange, seconds):
+    recorder = Recorder()
+
+    async def main():
+        async with AsyncBitrueSocketManager(stream_url=exchange.stream_url) as bm:
+            for symbol in SYMBOLS:
+                bm.start_depth_socket(symbol, recorder)
+            await asyncio.sleep(seconds)
+
+    asyncio.run(main())
+    recorder.report('asyncio', seconds)
+
+
+def run_twisted(exchange, seconds):
+    from twisted.internet import reactor
+    from bitrue.websockets import BitrueSocketManager
+
+    recorder = Recorder()
+    bm = BitrueSocketManager()
+    bm.STREAM_URL = exchange.stream_url
+    for symbol in SYMBOLS:
+        lower_symbol = symbol.lower()
+        bm.start_depth_socket(symbol, recorder, lambda lower_symbol=lower_symbol: gen_depth_sub_msg(lower_symbol))
+    bm.daemon = True
+    bm.start()
+    time.sleep(seconds)
+    reactor.callFromThread(bm.close)
+    reactor.callFromThread(reactor.stop)
+    bm.join(5)
+    recorder.report('twisted', seconds)
+
+
+def main(seconds=5.0, rate=500):
+    exchange = MockExchange(rates={'depth': rate}, depth_levels=20, ping_interval=5, seed=1).start_in_thread()
+    try:
+        print("%d depth sockets, %d messages/sec each" % (len(SYMBOLS), rate))
+        run_asyncio(exchange, seconds)
+        time.sleep(0.5)
+        run_twisted(exchange, seconds)
+    finally:
+        exchange.stop_thread()
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0, int(sys.argv[2]) if len(sys.argv) > 2 else 500)
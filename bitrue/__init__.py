@@ -4,5 +4,7 @@
 __version__ = '1.0.1'
 
 from bitrue.client import Client
+from bitrue.async_client import AsyncClient
 from bitrue.depthcache import DepthCacheManager, DepthCache
 from bitrue.websockets import BitrueSocketManager, BitrueClientProtocol, BitrueReconnectingClientFactory, BitrueClientFactory
+from bitrue.async_websockets import AsyncBitrueSocketManager
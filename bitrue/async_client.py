@@ -0,0 +1,348 @@
+# coding=utf-8
+
+import asyncio
+import time
+
+import aiohttp
+
+from bitrue.client import SpotRequestMixin
+from bitrue.bulk import run_bulk_async, DEFAULT_MAX_WORKERS
+from bitrue.clock import ClockSync
+from bitrue import decoding
+from bitrue.exceptions import BitrueAPIException, BitrueRequestException, BitrueRateLimitException
+from bitrue.metrics import RequestMetrics
+from bitrue.ratelimit import RateLimiter, SPOT_WEIGHTS
+from bitrue.signing import encode_params
+
+
+class AsyncClient(SpotRequestMixin):
+    """asyncio version of :class:`bitrue.client.Client`.
+
+    The REST endpoints of ``Client`` are available as coroutines. Requests are sent over a
+    pooled ``aiohttp`` session so many of them can be in flight on one event loop. Signing and
+    parameter ordering are shared with ``Client``, requests take their weight from a
+    :class:`bitrue.ratelimit.RateLimiter` without blocking the event loop and are recorded
+    into ``metrics`` when it is set.
+
+    The helpers built on the blocking request pipeline are not available here: the symbol
+    filter cache and order validation, the balance store, the iter_* pagination helpers,
+    get_historical_klines and the retry and hedging policies.
+
+    Use :meth:`create` to build a client that has already synced its clock with the server.
+    """
+
+    DEFAULT_POOL_SIZE = 100
+
+    # seconds between two rate limiter checks while the request waits behind another one
+    RATE_LIMIT_POLL = 0.01
+
+    def __init__(self, api_key=None, api_secret=None, requests_params=None, tld='com', pool_size=DEFAULT_POOL_SIZE, json_decoder=decoding.loads,
+                 rate_limiter=True, metrics=False):
+        """Bitrue asyncio API Client constructor, no network request is made here.
+        :param api_key: Api Key
+        :type api_key: str.
+        :param api_secret: Api Secret
+        :type api_secret: str.
+        :param requests_params: optional - Dictionary of aiohttp request params to use for all calls
+        :type requests_params: dict.
+        :param pool_size: optional - maximum number of simultaneous connections
+        :type pool_size: int.
+        :param json_decoder: optional - function decoding the response body bytes, defaults to decoding.loads
+        :type json_decoder: function.
+        :param rate_limiter: optional - RateLimiter to use, may be shared with a blocking Client, True for the default limits, False to disable
+        :type rate_limiter: RateLimiter or bool.
+        :param metrics: optional - RequestMetrics to record per endpoint metrics into, True for a new one
+        :type metrics: RequestMetrics or bool.
+        """
+
+        self._init_urls(tld)
+
+        self.API_KEY = api_key
+        self.API_SECRET = api_secret
+        self._signer = None
+        self._pool_size = pool_size
+        # the aiohttp session must be created from inside the event loop
+        self.session = None
+        self._requests_params = requests_params
+        self.response = None
+        self._json_decoder = json_decoder
+        # server time can only be sampled from the event loop, see create
+        self.clock = ClockSync()
+        if rate_limiter is True:
+            rate_limiter = RateLimiter(weights=SPOT_WEIGHTS)
+        self.rate_limiter = rate_limiter or None
+        if metrics is True:
+            metrics = RequestMetrics()
+        self.metrics = metrics or None
+
+    @classmethod
+    async def create(cls, api_key=None, api_secret=None, requests_params=None, tld='com', pool_size=DEFAULT_POOL_SIZE,
+                     json_decoder=decoding.loads, rate_limiter=True, metrics=False):
+        """create a client, warm up the connection pool and sync the timestamp offset
+        """
+        self = cls(api_key, api_secret, requests_params, tld=tld, pool_size=pool_size, json_decoder=json_decoder,
+                   rate_limiter=rate_limiter, metrics=metrics)
+        # init DNS and SSL cert
+        await self.ping()
+        await self.sync_clock()
+        return self
+
+    async def sync_clock(self):
+        """sample the server time to update the timestamp offset
+        """
+        sent = time.time()
+        res = await self.get_server_time()
+        self.clock.add_sample(sent, res['serverTime'], time.time())
+
+    @property
+    def session(self):
+        """the ``aiohttp`` session, None until the first request
+        """
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def _init_session(self):
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self._pool_size),
+            headers={
+                'Accept': 'application/json',
+                'User-Agent': 'Bitrue/Python',
+            }
+        )
+        return session
+
+    async def close_connection(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close_connection()
+
+    async def _reqeust(self, method, uri, signed, force_params=False, decoder=None, endpoint=None, **kwargs):
+        if self.session is None:
+            self.session = self._init_session()
+        kwargs = self._get_request_kwargs(method, uri, signed, force_params, **kwargs)
+        if not isinstance(kwargs['timeout'], aiohttp.ClientTimeout):
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=kwargs['timeout'])
+
+        start = time.perf_counter()
+        try:
+            async with getattr(self.session, method)(uri, **kwargs) as response:
+                self.response = response
+                received = time.perf_counter()
+                content = await response.read()
+                transferred = time.perf_counter()
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.observe_error(endpoint or uri)
+            raise
+        try:
+            return self._handle_response(response, content, decoder)
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.observe_error(endpoint or uri)
+            raise
+        finally:
+            if self.metrics is not None:
+                self._observe(endpoint or uri, response, kwargs, content, start, received, transferred)
+
+    def _observe(self, endpoint, response, kwargs, content, start, received, transferred):
+        done = time.perf_counter()
+        timings = {'total': done - start, 'server': received - start, 'transfer': transferred - received,
+                   'decode': done - transferred}
+        body = kwargs.get('data')
+        bytes_out = len(str(response.url)) + (len(encode_params(body)) if body else 0)
+        self.metrics.observe(endpoint, response.status, timings, bytes_out, len(content))
+
+    def _handle_response(self, response, content, decoder=None):
+        """internal helper for handing API responses from the Bitrue server.
+        Rasises the appropriate exceptions when necessary; otherwise, returns the response
+        """
+        if not (200 <= response.status < 300):
+            if response.status in (418, 429) and self.rate_limiter is not None:
+                # back off the whole client as asked by the exchange
+                self.rate_limiter.pause(int(response.headers.get('Retry-After', 60)))
+            raise BitrueAPIException(response, response.status, content.decode('utf-8', 'replace'))
+
+        try:
+            return (decoder or self._json_decoder)(content)
+        except ValueError:
+            raise BitrueRequestException('Invalid Response: %s' %(content.decode('utf-8', 'replace'),))
+
+    async def _acquire(self, method, path, params, signed):
+        # the limiter is polled instead of blocking the event loop thread
+        while True:
+            try:
+                return self.rate_limiter.acquire_request(method, path, params, signed, blocking=False)
+            except BitrueRateLimitException as ex:
+                if not self.rate_limiter.blocking:
+                    raise
+                await asyncio.sleep(max(ex.retry_after, self.RATE_LIMIT_POLL))
+
+    async def _request_api(self, method, path, signed=False, version=SpotRequestMixin.PUBLIC_API_VERSION, **kwargs):
+        uri = self._create_api_uri(path, signed, version)
+        if self.rate_limiter is not None:
+            await self._acquire(method, path, kwargs.get('data') or kwargs.get('params'), signed)
+        return await self._reqeust(method, uri, signed, endpoint=path, **kwargs)
+
+    async def _request_website(self, method, path, signed=False, **kwargs):
+        uri = self._create_website_uri(path)
+        return await self._reqeust(method, uri, signed, endpoint=path, **kwargs)
+
+    async def _get(self, path, signed=False, version=SpotRequestMixin.PUBLIC_API_VERSION, **kwargs):
+        return await self._request_api('get', path, signed, version, **kwargs)
+
+    async def _post(self, path, signed=False, version=SpotRequestMixin.PUBLIC_API_VERSION, **kwargs):
+        return await self._request_api('post', path, signed, version, **kwargs)
+
+    async def _put(self, path, signed=False, version=SpotRequestMixin.PUBLIC_API_VERSION, **kwargs):
+        return await self._request_api('put', path, signed, version, **kwargs)
+
+    async def _delete(self, path, signed=False, version=SpotRequestMixin.PUBLIC_API_VERSION, **kwargs):
+        return await self._request_api('delete', path, signed, version, **kwargs)
+
+    # exchange endpoints
+    async def get_server_time(self):
+        return await self._get('time')
+
+    async def ping(self):
+        return await self._get('ping')
+
+    async def get_exchange_info(self):
+        return await self._get('exchangeInfo')
+
+    async def get_symbol_info(self, symbol):
+        res = await self.get_exchange_info()
+
+        for item in res['symbols']:
+            if item['symbol'] == symbol.upper():
+                return item
+        return None
+
+    async def get_all_tickers(self):
+        return await self._get('ticker/24hr')
+
+    async def get_all_tickers_raw(self):
+        return await self._get('ticker/24hr', decoder=decoding.raw)
+
+    async def get_all_tickers_compact(self):
+        return await self._get('ticker/24hr', decoder=decoding.tickers)
+
+    async def get_ticker(self, **params):
+        return await self._get('ticker/price', data=params)
+
+    async def get_orderbook_ticker(self, **params):
+        return await self._get("ticker/bookTicker", data=params)
+
+    async def get_order_book(self, **params):
+        return await self._get("depth", data=params)
+
+    async def get_order_book_raw(self, **params):
+        return await self._get("depth", data=params, decoder=decoding.raw)
+
+    async def get_order_book_compact(self, **params):
+        return await self._get("depth", data=params, decoder=decoding.depth)
+
+    async def get_recent_trades(self, **params):
+        return await self._get('trades', data=params)
+
+    async def get_historical_trades(self, **params):
+        return await self._get('historicalTrades', data=params)
+
+    async def get_aggregate_trades(self, **params):
+        return await self._get('aggTrades', data=params)
+
+    async def get_klines(self, **params):
+        return await self._get('market/kline', data=params)
+
+    # Account Endpoints
+
+    async def create_order(self, **params):
+        return await self._post('order', True, data=params)
+
+    async def order_limit(self, timeInForce=SpotRequestMixin.TIME_IN_FORCE_GTC, **params):
+        params.update({
+            'type': self.ORDER_TYPE_LIMIT,
+            'timeInForce': timeInForce
+        })
+        return await self.create_order(**params)
+
+    async def order_limit_buy(self, timeInForce=SpotRequestMixin.TIME_IN_FORCE_GTC, **params):
+        params.update({
+            'side': self.SIDE_BUY,
+        })
+        return await self.order_limit(timeInForce=timeInForce, **params)
+
+    async def order_limit_sell(self, timeInForce=SpotRequestMixin.TIME_IN_FORCE_GTC, **params):
+        params.update({
+            'side': self.SIDE_SELL
+        })
+        return await self.order_limit(timeInForce=timeInForce, **params)
+
+    async def order_market(self, **params):
+        params.update({
+            'type': self.ORDER_TYPE_MARKET
+        })
+        return await self.create_order(**params)
+
+    async def order_market_buy(self, **params):
+        params.update({
+            'side': self.SIDE_BUY
+        })
+        return await self.order_market(**params)
+
+    async def order_market_sell(self, **params):
+        params.update({
+            'side': self.SIDE_SELL
+        })
+        return await self.order_market(**params)
+
+    async def get_order(self, **params):
+        return await self._get('order', True, data=params)
+
+    async def get_all_orders(self, **params):
+        return await self._get('allOrders', True, data=params)
+
+    async def cancel_order(self, **params):
+        return await self._delete('order', True, data=params)
+
+    async def create_orders(self, orders, max_workers=DEFAULT_MAX_WORKERS):
+        """Send in several new orders at once, at most max_workers requests in flight.
+
+        :param orders: list of create_order params dicts
+        :returns: BulkResult in input order, a failed order holds its exception
+        """
+        return await run_bulk_async(self.create_order, orders, max_workers)
+
+    async def cancel_orders(self, orders, max_workers=DEFAULT_MAX_WORKERS):
+        """Cancel several orders at once, at most max_workers requests in flight.
+
+        :param orders: list of cancel_order params dicts
+        :returns: BulkResult in input order, a failed cancel holds its exception
+        """
+        return await run_bulk_async(self.cancel_order, orders, max_workers)
+
+    async def get_open_orders(self, **params):
+        return await self._get('openOrders', True, data=params)
+
+    async def get_account(self, **params):
+        return await self._get('account', True, data=params)
+
+    async def get_asset_balance(self, asset, **params):
+        res = await self.get_account(**params)
+        # find asset balance in list of balances
+        if "balances" in res:
+            for bal in res['balances']:
+                if bal['asset'].lower() == asset.lower():
+                    return bal
+        return None
+
+    async def get_my_trades(self, **params):
+        return await self._get('myTrades', True, data=params)
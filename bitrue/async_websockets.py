@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import collections
+import logging
+
+import aiohttp
+
+from bitrue import decoding
+from bitrue.decoding import FrameDecoder
+from bitrue.helpers import gen_depth_channel, gen_ticker_channel, gen_kline_channel, gen_trade_channel, \
+    gen_depth_sub_msg, gen_ticker_sub_msg, gen_kline_sub_msg, gen_trade_sub_msg, gen_unsub_msg
+from bitrue.streams import DEFAULT_SIZE, KlineBuffer, TradeBuffer, buffered_callback
+
+
+# put into the queue of a socket when it is stopped or gave up reconnecting
+_CLOSED = object()
+
+
+class _Channel(object):
+    """one subscribed channel and where its messages go
+    """
+
+    def __init__(self, name, subscribe, cb_id, callback, queue_size):
+        self.name = name
+        self.subscribe = subscribe
+        self.cb_id = cb_id
+        self.callback = callback
+        self.is_coroutine = asyncio.iscoroutinefunction(callback)
+        # without a callback the messages are read with AsyncBitrueSocketManager.messages
+        self.queue = asyncio.Queue(queue_size) if callback is None else None
+        self.connection = None
+        self.messages = 0
+        self.dropped = 0
+
+    async def deliver(self, obj):
+        if self.callback is not None:
+            try:
+                if self.is_coroutine:
+                    await self.callback(obj)
+                else:
+                    self.callback(obj)
+            except Exception:
+                self.connection.manager.logger.exception("%s callback failed", self.name)
+        elif obj is not None:
+            self.put(obj)
+        if obj is not None:
+            self.messages += 1
+
+    def put(self, obj):
+        try:
+            self.queue.put_nowait(obj)
+        except asyncio.QueueFull:
+            # a slow reader loses the oldest messages, not the connection
+            self.queue.get_nowait()
+            self.queue.put_nowait(obj)
+            self.dropped += 1
+
+    def finish(self):
+        # may run on cancellation, nothing here can be awaited
+        if self.queue is not None:
+            self.put(_CLOSED)
+        elif self.is_coroutine:
+            asyncio.ensure_future(self.deliver(None))
+        else:
+            try:
+                self.callback(None)
+            except Exception:
+                self.connection.manager.logger.exception("%s callback failed", self.name)
+
+
+class _AsyncConnection(object):
+    """one websocket connection carrying many channels, reconnected until it is stopped
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.channels = collections.OrderedDict()
+        self.closed = False
+        self.reconnects = 0
+        self.ws = None
+        self.task = None
+
+    def add(self, channel):
+        channel.connection = self
+        self.channels[channel.name] = channel
+        if self.ws is not None:
+            self.send(channel.subscribe())
+
+    def remove(self, name):
+        channel = self.channels.pop(name)
+        if self.ws is not None:
+            self.send(gen_unsub_msg(channel.cb_id, name))
+        if not self.closed:
+            # the channels of a closed connection were finished with it
+            channel.finish()
+
+    def send(self, msg):
+        asyncio.ensure_future(self._send(self.ws, msg))
+
+    @staticmethod
+    async def _send(ws, msg):
+        try:
+            await ws.send_str(msg)
+        except (ConnectionError, RuntimeError):
+            # subscribed again after the reconnect
+            pass
+
+    async def run(self):
+        manager = self.manager
+        retries = 0
+        delay = manager.INITIAL_DELAY
+        try:
+            while not self.closed:
+                try:
+                    async with manager.get_session().ws_connect(manager.STREAM_URL, heartbeat=manager.heartbeat) as ws:
+                        self.ws = ws
+                        retries = 0
+                        delay = manager.INITIAL_DELAY
+                        # subscribe again every channel of the connection
+                        for channel in list(self.channels.values()):
+                            await ws.send_str(channel.subscribe())
+                        await self.read(ws)
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError) as e:
+                    manager.logger.warning("socket error: %r", e)
+                finally:
+                    self.ws = None
+                if self.closed:
+                    break
+                await self.broadcast(None)
+                retries += 1
+                if retries > manager.MAX_RETRIES:
+                    await self.broadcast(AsyncBitrueSocketManager.RECONNECT_ERROR_PAYLOAD)
+                    break
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, manager.MAX_DELAY)
+        finally:
+            self.closed = True
+            manager._connection_closed(self)
+            for channel in self.channels.values():
+                channel.finish()
+
+    async def read(self, ws):
+        decode = self.manager.decoder.decode
+        channels = self.channels
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.BINARY:
+                obj = decode(msg.data)
+            elif msg.type == aiohttp.WSMsgType.TEXT:
+                obj = decode(msg.data, False)
+            else:
+                break
+            if obj is None:
+                continue
+            if 'ping' in obj:
+                # the server closes connections that do not answer its pings
+                await ws.send_str('{"pong":%d}' % obj['ping'])
+                continue
+            channel = channels.get(obj.get('channel'))
+            if channel is not None:
+                await channel.deliver(obj)
+            else:
+                await self.broadcast(obj)
+
+    async def broadcast(self, obj):
+        for channel in list(self.channels.values()):
+            await channel.deliver(obj)
+
+
+class AsyncBitrueSocketManager(object):
+    """asyncio version of :class:`bitrue.websockets.BitrueSocketManager`.
+
+    The sockets are ``aiohttp`` websockets read by tasks of the caller's event loop, so
+    callbacks run on that loop and can be coroutine functions. Sockets started without a
+    callback are read with :meth:`messages`. Messages are decoded the same way as by the
+    Twisted manager, the ping messages of the server are answered and not delivered.
+
+    Like the Twisted manager, up to ``channels_per_connection`` channels share a connection
+    and are subscribed and unsubscribed on it while it is open. Unlike it, the channels of a
+    connection that gives up reconnecting are not moved to another connection: their
+    callbacks get the reconnect error, their :meth:`messages` iterators end and the sockets
+    stay started until the caller stops them with :meth:`stop_socket`.
+
+    The ``start_*`` methods must be called from the event loop.
+    """
+
+    STREAM_URL = "wss://ws.bitrue.com/kline-api/ws"
+
+    WEBSOCKET_DEPTH_5 = "5"
+    WEBSOCKET_DEPTH_10 = "10"
+    WEBSOCKET_DEPTH_20 = "20"
+
+    DEFAULT_USER_TIMEOUT = 30 * 60  # 30 mintes
+
+    # reconnect delay, doubled up to MAX_DELAY, and retries before giving up
+    INITIAL_DELAY = 0.1
+    MAX_DELAY = 10
+    MAX_RETRIES = 5
+
+    # messages kept for a reader of messages()
+    DEFAULT_QUEUE_SIZE = 10000
+
+    DEFAULT_CHANNELS_PER_CONNECTION = 50
+
+    RECONNECT_ERROR_PAYLOAD = {
+        'e': 'error',
+        'm': "Max reconnect retries reached"
+    }
+
+    def __init__(self, session=None, stream_url=None, json_decoder=decoding.loads, queue_size=DEFAULT_QUEUE_SIZE,
+                 heartbeat=None, user_timeout=DEFAULT_USER_TIMEOUT, channels_per_connection=DEFAULT_CHANNELS_PER_CONNECTION,
+                 skip_unknown_channels=False):
+        """initialize the AsyncBitrueSocketManager, no connection is made here
+
+        Args:
+            session (aiohttp.ClientSession, optional): session the sockets are opened with. Defaults to None, a new one from the event loop.
+            stream_url (str, optional): websocket url. Defaults to STREAM_URL.
+            json_decoder (function, optional): decodes the message bytes. Defaults to decoding.loads.
+            queue_size (int, optional): messages kept per socket read with messages(). Defaults to DEFAULT_QUEUE_SIZE.
+            heartbeat (float, optional): seconds between websocket ping frames of the client. Defaults to None.
+            user_timeout (int, optional): default timeout. Defaults to DEFAULT_USER_TIMEOUT.
+            channels_per_connection (int, optional): channels subscribed over one connection, 1 for a connection per channel. Defaults to DEFAULT_CHANNELS_PER_CONNECTION.
+            skip_unknown_channels (bool, optional): drop messages of channels no socket is started for without parsing them. Defaults to False.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if stream_url:
+            self.STREAM_URL = stream_url
+        self._session = session
+        self._own_session = session is None
+        self.heartbeat = heartbeat
+        self._queue_size = queue_size
+        self._user_timeout = user_timeout
+        self._channels_per_connection = max(1, channels_per_connection)
+        # channel name: _Channel
+        self._conns = {}
+        self._connections = []
+        # conn_key: ring buffer of a kline or trade socket
+        self._buffers = {}
+        self.decoder = FrameDecoder(json_decoder, channels=self._conns if skip_unknown_channels else None)
+
+    def get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def _start_socket(self, name, subscribe, callback, cb_id=None):
+        if name in self._conns:
+            return False
+
+        conn = next((c for c in self._connections if len(c.channels) < self._channels_per_connection), None)
+        if conn is None:
+            conn = _AsyncConnection(self)
+            conn.task = asyncio.get_running_loop().create_task(conn.run())
+            self._connections.append(conn)
+        channel = _Channel(name, subscribe, cb_id, callback, self._queue_size)
+        conn.add(channel)
+        self._conns[name] = channel
+        return name
+
+    def _connection_closed(self, conn):
+        if conn in self._connections:
+            self._connections.remove(conn)
+
+    def get_decode_stats(self):
+        """frames received, dropped as unknown channels and malformed
+        """
+        return self.decoder.stats()
+
+    def get_connection_count(self):
+        """number of open or opening websocket connections
+        """
+        return len(self._connections)
+
+    def start_depth_socket(self, symbol, callback=None, subscribe=None, depth=0, interval=None):
+        """subscribe depth for symbol
+
+        Args:
+            symbol (str): symbol, e.g. 'BTRUSDT'
+            callback (function, optional): called with every message, may be a coroutine function. Defaults to None, read with messages().
+            subscribe (function, optional): returns the subscribe message. Defaults to None, gen_depth_sub_msg.
+            depth (int, optional): depth step. Defaults to 0.
+            interval ([type], optional): not used. Defaults to None.
+
+        Returns:
+            str: the connection key
+        """
+        lower_symbol = symbol.lower()
+        subscribe = subscribe or (lambda: gen_depth_sub_msg(lower_symbol, depth))
+        return self._start_socket(gen_depth_channel(lower_symbol, depth), subscribe, callback, lower_symbol)
+
+    def start_symbol_ticker_socket(self, symbol, callback=None, subscribe=None):
+        """subscribe ticker stream for given symbol
+
+        Args:
+            symbol (str): symbol, e.g. 'BTRUSDT'
+            callback (function, optional): called with every message, may be a coroutine function. Defaults to None, read with messages().
+            subscribe (function, optional): returns the subscribe message. Defaults to None, gen_ticker_sub_msg.
+
+        Returns:
+            str: the connection key
+        """
+        lower_symbol = symbol.lower()
+        subscribe = subscribe or (lambda: gen_ticker_sub_msg(lower_symbol))
+        return self._start_socket(gen_ticker_channel(lower_symbol), subscribe, callback, lower_symbol)
+
+    def start_kline_socket(self, symbol, callback=None, subscribe=None, interval='1min', size=DEFAULT_SIZE):
+        """subscribe kline stream for given symbol, the bars are kept in a KlineBuffer
+
+        Args:
+            symbol (str): symbol, e.g. 'BTRUSDT'
+            callback (function, optional): also called with every message, may be a coroutine function. Defaults to None.
+            subscribe (function, optional): returns the subscribe message. Defaults to None, gen_kline_sub_msg.
+            interval (str, optional): kline interval, e.g. '1min', '60min', '1day'. Defaults to '1min'.
+            size (int, optional): bars kept. Defaults to DEFAULT_SIZE.
+
+        Returns:
+            str: the connection key, see get_buffer
+        """
+        lower_symbol = symbol.lower()
+        interval = interval or '1min'
+        subscribe = subscribe or (lambda: gen_kline_sub_msg(lower_symbol, interval))
+        return self._start_buffer_socket(gen_kline_channel(lower_symbol, interval), KlineBuffer(size), subscribe,
+                                         callback, lower_symbol)
+
+    def start_trade_socket(self, symbol, callback=None, subscribe=None, size=DEFAULT_SIZE):
+        """subscribe trade stream for given symbol, the trades are kept in a TradeBuffer
+
+        Args:
+            symbol (str): symbol, e.g. 'BTRUSDT'
+            callback (function, optional): also called with every message, may be a coroutine function. Defaults to None.
+            subscribe (function, optional): returns the subscribe message. Defaults to None, gen_trade_sub_msg.
+            size (int, optional): trades kept. Defaults to DEFAULT_SIZE.
+
+        Returns:
+            str: the connection key, see get_buffer
+        """
+        lower_symbol = symbol.lower()
+        subscribe = subscribe or (lambda: gen_trade_sub_msg(lower_symbol))
+        return self._start_buffer_socket(gen_trade_channel(lower_symbol), TradeBuffer(size), subscribe, callback,
+                                         lower_symbol)
+
+    def _start_buffer_socket(self, name, buffer, subscribe, callback, cb_id):
+        conn_key = self._start_socket(name, subscribe, buffered_callback(buffer, callback), cb_id)
+        if conn_key:
+            self._buffers[conn_key] = buffer
+        return conn_key
+
+    def get_buffer(self, conn_key):
+        """the KlineBuffer or TradeBuffer of a kline or trade socket, None for other sockets
+        """
+        return self._buffers.get(conn_key)
+
+    async def messages(self, conn_key):
+        """iterate over the messages of a socket started without a callback
+
+        Ends when the socket is stopped or gave up reconnecting, after yielding RECONNECT_ERROR_PAYLOAD.
+        """
+        channel = self._conns.get(conn_key)
+        if channel is None or channel.queue is None:
+            raise ValueError("no socket %r read with messages()" % (conn_key,))
+        while True:
+            obj = await channel.queue.get()
+            if obj is _CLOSED:
+                return
+            yield obj
+
+    def stats(self, conn_key):
+        """messages delivered, messages dropped by a slow reader and reconnects of the connection of a socket
+        """
+        channel = self._conns[conn_key]
+        conn = channel.connection
+        return {'messages': channel.messages, 'dropped': channel.dropped, 'reconnects': conn.reconnects,
+                'connected': conn.ws is not None, 'channels': len(conn.channels)}
+
+    def stop_socket(self, conn_key):
+        """stop a websocket given the connection key, the connection is closed with its last channel
+
+        Args:
+            conn_key (string): the connection key
+        """
+        channel = self._conns.pop(conn_key, None)
+        if channel is None:
+            return
+        self._buffers.pop(conn_key, None)
+        conn = channel.connection
+        conn.remove(conn_key)
+        if not conn.channels:
+            # disable reconnecting if we are closing
+            conn.closed = True
+            conn.task.cancel()
+            self._connection_closed(conn)
+
+    async def close(self):
+        """Close all connections and the session the manager opened
+        """
+        tasks = [conn.task for conn in self._connections]
+        for key in list(self._conns.keys()):
+            self.stop_socket(key)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from decimal import Decimal
+
+
+def _dec(num):
+    return num if isinstance(num, Decimal) else Decimal(str(num))
+
+
+class BalanceStore(object):
+    """Account balances indexed by upper-case asset.
+
+    Loaded from the account endpoint once, then refreshed on demand or on a schedule, and
+    adjusted locally from order fills in between, so balance checks are dict lookups.
+    Amounts are kept as Decimal.
+    """
+
+    def __init__(self, loader):
+        """initialize the BalanceStore
+
+        Args:
+            loader (function): returns the account response, a dict with a 'balances' list
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._loader = loader
+        self._balances = None
+        self._lock = threading.RLock()
+        self._refresh_stop = None
+        self._refresh_thread = None
+
+    def update(self, account):
+        """replace the balances with those of an account response
+        """
+        balances = {}
+        for bal in account.get('balances') or ():
+            balances[bal['asset'].upper()] = {'free': _dec(bal['free']), 'locked': _dec(bal['locked'])}
+        with self._lock:
+            self._balances = balances
+
+    def refresh(self):
+        """reload the balances from the exchange
+        """
+        self.update(self._loader())
+
+    def _ensure_loaded(self):
+        if self._balances is None:
+            with self._lock:
+                if self._balances is None:
+                    self.refresh()
+
+    def get(self, asset):
+        """get the balance of an asset as returned by the account endpoint, None for an unknown asset
+        """
+        self._ensure_loaded()
+        with self._lock:
+            bal = self._balances.get(asset.upper())
+            if bal is None:
+                return None
+            return {'asset': asset.upper(), 'free': str(bal['free']), 'locked': str(bal['locked'])}
+
+    def free(self, asset):
+        self._ensure_loaded()
+        with self._lock:
+            bal = self._balances.get(asset.upper())
+            return bal['free'] if bal else Decimal(0)
+
+    def locked(self, asset):
+        self._ensure_loaded()
+        with self._lock:
+            bal = self._balances.get(asset.upper())
+            return bal['locked'] if bal else Decimal(0)
+
+    def assets(self):
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._balances.keys())
+
+    def adjust(self, asset, free=0, locked=0):
+        """add ``free`` and ``locked`` to the balance of an asset, negative to subtract
+        """
+        self._ensure_loaded()
+        with self._lock:
+            bal = self._balances.setdefault(asset.upper(), {'free': Decimal(0), 'locked': Decimal(0)})
+            bal['free'] += _dec(free)
+            bal['locked'] += _dec(locked)
+
+    def apply_fill(self, base_asset, quote_asset, side, qty, price, commission=0, commission_asset=None):
+        """update the balances from a fill of one of our resting limit orders
+
+        Args:
+            base_asset (string): e.g. 'BTR' of BTRUSDT
+            quote_asset (string): e.g. 'USDT' of BTRUSDT
+            side (string): 'BUY' or 'SELL'
+            qty: filled quantity
+            price: fill price
+            commission (optional): commission paid. Defaults to 0.
+            commission_asset (string, optional): asset the commission is paid in. Defaults to None.
+        """
+        qty = _dec(qty)
+        amount = qty * _dec(price)
+        with self._lock:
+            if side == 'BUY':
+                # quote was locked by the order
+                self.adjust(base_asset, free=qty)
+                self.adjust(quote_asset, locked=-amount)
+            else:
+                self.adjust(base_asset, locked=-qty)
+                self.adjust(quote_asset, free=amount)
+            if commission and commission_asset:
+                self.adjust(commission_asset, free=-_dec(commission))
+
+    def start_refresh(self, interval):
+        """reload the balances every ``interval`` seconds in a background thread
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(interval, self._refresh_stop), daemon=True)
+        self._refresh_thread.start()
+
+    def stop_refresh(self):
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+        self._refresh_thread = None
+
+    def _refresh_loop(self, interval, stop):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # keep the local balances until the next attempt
+                self.logger.exception("balance refresh failed")
+            if stop.wait(interval):
+                break
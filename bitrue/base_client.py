@@ -0,0 +1,318 @@
+# coding=utf-8
+
+import threading
+from decimal import ROUND_DOWN
+from bitrue.exceptions import BitrueAPIException, BitrueRequestException, BitrueRateLimitException
+from bitrue.metadata import SymbolInfoCache
+from bitrue.balances import BalanceStore
+from bitrue.clock import ClockSync
+from bitrue.signing import HmacSigner
+from bitrue import decoding
+from bitrue.metrics import Instrumentation, RequestInfo, RequestMetrics
+from bitrue.retry import RequestRetrier, IDEMPOTENT_METHODS
+from bitrue.singleflight import SingleFlight, request_key
+from bitrue.ratelimit import RateLimiter
+from bitrue.transport import HttpTransport
+from bitrue.validation import OrderValidator
+
+
+class SigningMixin(object):
+    """Urls, api key header, HMAC signer and timestamp offset, shared by the blocking and the asyncio clients.
+
+    The class using it sets ``API_KEY``, ``API_SECRET``, ``_signer`` and ``clock``.
+    """
+
+    API_URL = None
+    WEBSITE_URL = 'https://www.bitrue.{}'
+
+    PUBLIC_API_VERSION = 'v1'
+    PRIVATE_API_VERSION = 'v1'
+
+    def _init_urls(self, tld):
+        self.API_URL = self.API_URL.format(tld)
+        self.WEBSITE_URL = self.WEBSITE_URL.format(tld)
+
+    @property
+    def timestamp_offset(self):
+        """milliseconds between local and Bitrue server time, see ``clock``
+        """
+        return self.clock.offset
+
+    @timestamp_offset.setter
+    def timestamp_offset(self, value):
+        self.clock.offset = value
+
+    def _auth_headers(self, headers=None):
+        headers = dict(headers or ())
+        if self.API_KEY:
+            headers['X-MBX-APIKEY'] = self.API_KEY
+        return headers
+
+    def _create_api_uri(self, path, signed=True, version=PUBLIC_API_VERSION):
+        return self.API_URL + '/' + version + '/' + path
+
+    def _create_website_uri(self, path):
+        return self.WEBSITE_URL + "/" + path
+
+    def _get_signer(self):
+        # keyed once, rebuilt only when the secret changes
+        if self._signer is None or self._signer.secret is not self.API_SECRET:
+            self._signer = HmacSigner(self.API_SECRET)
+        return self._signer
+
+
+class BaseClient(SigningMixin):
+    """Request plumbing shared by :class:`bitrue.client.Client` and :class:`bitrue.future_client.FutureClient`.
+
+    Subclasses define the urls, the request weights and how a request is signed in
+    ``_get_request_kwargs``, everything from rate limiting to decoding the response is done here.
+    """
+
+    # request weights of the default RateLimiter
+    REQUEST_WEIGHTS = None
+    # whether a RateLimiter is created when the rate_limiter param is not given
+    RATE_LIMITED = True
+
+    # never coalesced or cached, a shared or cached server time would skew the clock samples
+    UNCOALESCED_PATHS = ('time',)
+
+    # create_order params checked by validate_order
+    ORDER_SYMBOL_PARAM = 'symbol'
+    ORDER_QUANTITY_PARAM = 'quantity'
+
+    def __init__(self, api_key=None, api_secret=None, requests_params=None, tld='com', symbol_info_ttl=SymbolInfoCache.DEFAULT_TTL, rate_limiter=None,
+                 warm_up=True, clock_sync_interval=None, json_decoder=decoding.loads,
+                 metrics=False, request_policy=None, coalesce=False, micro_cache_ttl=0, transport=None, metadata_path=None,
+                 validate_orders=True):
+        """Bitrue API Client constructor
+        :param api_key: Api Key
+        :type api_key: str.
+        :param api_secret: Api Secret
+        :type api_secret: str.
+        :param requests_params: optional - Dictionary of requests params to use for all calls
+        :type requests_params: dict.
+        :param symbol_info_ttl: optional - seconds get_symbol_info keeps the cached symbol list
+        :type symbol_info_ttl: int.
+        :param rate_limiter: optional - RateLimiter to use, True for the default limits, False to disable, default RATE_LIMITED
+        :type rate_limiter: RateLimiter or bool.
+        :param warm_up: optional - open the connection and sync the clock in a background thread
+        :type warm_up: bool.
+        :param clock_sync_interval: optional - seconds between background server time samples, None samples only once
+        :type clock_sync_interval: int.
+        :param json_decoder: optional - function decoding the response body bytes, defaults to decoding.loads
+        :type json_decoder: function.
+        :param metrics: optional - RequestMetrics to record per endpoint metrics into, True for a new one
+        :type metrics: RequestMetrics or bool.
+        :param request_policy: optional - default timeout, retry and hedging RequestPolicy of GET requests, see set_request_policy
+        :type request_policy: RequestPolicy.
+        :param coalesce: optional - concurrent identical GET requests share one round-trip and decoded result
+        :type coalesce: bool.
+        :param micro_cache_ttl: optional - seconds a coalesced GET result is reused, e.g. 0.05
+        :type micro_cache_ttl: float.
+        :param transport: optional - HttpTransport with the connection pools to use, may be shared with other clients
+        :type transport: HttpTransport.
+        :param metadata_path: optional - file the symbol list is saved to, a new client serves it and downloads the list again in the background
+        :type metadata_path: str.
+        :param validate_orders: optional - check new orders against the cached symbol filters before sending them
+        :type validate_orders: bool.
+        """
+
+        self._init_urls(tld)
+
+        self.API_KEY = api_key
+        self.API_SECRET = api_secret
+        self._signer = None
+        self.transport = transport or HttpTransport()
+        self._requests_params = requests_params
+        self.response = None
+        self._json_decoder = json_decoder
+        if metrics is True:
+            metrics = RequestMetrics()
+        self.metrics = metrics or None
+        self.instrumentation = Instrumentation(self.metrics)
+        self.retrier = RequestRetrier(request_policy)
+        self.single_flight = SingleFlight(micro_cache_ttl) if coalesce or micro_cache_ttl else None
+        self.clock = ClockSync(lambda: self.get_server_time()['serverTime'])
+        if rate_limiter is None:
+            rate_limiter = self.RATE_LIMITED
+        if rate_limiter is True:
+            rate_limiter = RateLimiter(weights=self.REQUEST_WEIGHTS)
+        self.rate_limiter = rate_limiter or None
+        self.balances = BalanceStore(self.get_account)
+        self.symbol_cache = SymbolInfoCache(self._load_symbol_info, ttl=symbol_info_ttl, path=metadata_path, source=self.API_URL)
+        if metadata_path:
+            self.symbol_cache.warm_start()
+        self.validate_orders = validate_orders
+        self.order_validator = OrderValidator(self.symbol_cache, self._compile_filters)
+
+        if clock_sync_interval:
+            # the first sample also opens the connection
+            self.clock.start(clock_sync_interval)
+        elif warm_up:
+            threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _load_symbol_info(self):
+        raise NotImplementedError()
+
+    def _compile_filters(self, info):
+        raise NotImplementedError()
+
+    @property
+    def session(self):
+        """the ``requests`` session of the transport
+        """
+        return self.transport.session
+
+    @session.setter
+    def session(self, session):
+        self.transport.session = session
+
+    def _warm_up(self):
+        try:
+            self.warm_up()
+        except Exception:
+            # nothing to do, the first request opens the connection again
+            pass
+
+    def warm_up(self):
+        """Init DNS and SSL cert and calculate the timestamp offset ahead of the first request.
+        """
+        self.ping()
+        self.clock.ensure()
+
+    def close_connection(self):
+        """close the pooled connections of the transport
+        """
+        self.transport.close()
+
+    def _get_request_kwargs(self, method, uri, signed, force_params=False, **kwargs):
+        raise NotImplementedError()
+
+    def _reqeust(self, method, uri, signed, force_params=False, decoder=None, endpoint=None, **kwargs):
+        policy = self.retrier.get_policy(endpoint)
+        kwargs['timeout'] = policy.timeout
+        if method not in IDEMPOTENT_METHODS or not (policy.retries or policy.hedge):
+            return self._attempt(method, uri, signed, force_params, decoder, endpoint, kwargs)
+
+        data = kwargs.get('data')
+
+        def attempt():
+            # prepare and sign every attempt again, a retry must not reuse an old timestamp
+            attempt_kwargs = dict(kwargs, data=dict(data)) if isinstance(data, dict) else dict(kwargs)
+            return self._attempt(method, uri, signed, force_params, decoder, endpoint, attempt_kwargs)
+
+        def on_retry(retry):
+            if self.metrics is not None:
+                self.metrics.observe_retry(endpoint or uri)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_request(method, endpoint, data or kwargs.get('params'), signed)
+
+        def on_hedge():
+            # a hedge is one more request on the wire, only sent when the limiter has capacity right now
+            if self.rate_limiter is not None:
+                try:
+                    self.rate_limiter.acquire_request(method, endpoint, data or kwargs.get('params'), signed, blocking=False)
+                except BitrueRateLimitException:
+                    return False
+            if self.metrics is not None:
+                self.metrics.observe_hedge(endpoint or uri)
+            return True
+
+        return self.retrier.call(endpoint or uri, policy, attempt, on_retry, on_hedge)
+
+    def _attempt(self, method, uri, signed, force_params, decoder, endpoint, kwargs):
+        kwargs = self._get_request_kwargs(method, uri, signed, force_params, **kwargs)
+        if self.instrumentation.enabled:
+            info = RequestInfo(method, endpoint or uri, uri, kwargs)
+            return self.instrumentation.call(info, lambda: self._send(method, uri, kwargs),
+                                             lambda response: self._handle_response(response, decoder))
+        return self._handle_response(self._send(method, uri, kwargs), decoder)
+
+    def _send(self, method, uri, kwargs):
+        response = self.transport.request(method, uri, **kwargs)
+        self.response = response
+        return response
+
+    def _request_api(self, method, path, signed=False, version=SigningMixin.PUBLIC_API_VERSION, **kwargs):
+        uri = self._create_api_uri(path, signed, version)
+        if self.single_flight is not None and method in IDEMPOTENT_METHODS and path not in self.UNCOALESCED_PATHS:
+            # coalesced callers do not use any request weight
+            return self.single_flight.do(request_key(method, uri, kwargs),
+                                         lambda: self._limited_request(method, path, uri, signed, kwargs))
+        return self._limited_request(method, path, uri, signed, kwargs)
+
+    def _limited_request(self, method, path, uri, signed, kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_request(method, path, kwargs.get('data') or kwargs.get('params'), signed)
+        return self._reqeust(method, uri, signed, endpoint=path, **kwargs)
+
+    def _request_website(self, method, path, signed=False, **kwargs):
+        uri = self._create_website_uri(path)
+        return self._reqeust(method, uri, signed, endpoint=path, **kwargs)
+
+    def set_request_policy(self, endpoint, policy):
+        """Use a RequestPolicy for one endpoint path, e.g. 'depth'. Retries and hedging only apply to GET requests.
+        """
+        self.retrier.set_policy(endpoint, policy)
+
+    def get_retry_stats(self):
+        """Requests, retries, hedges sent, skipped and won, and failures per endpoint.
+        """
+        return self.retrier.stats()
+
+    def add_request_hook(self, event, hook):
+        """Call hook(RequestInfo) on every REST request, event is one of 'before', 'after' or 'error'.
+        'after' hooks find the decoded response in RequestInfo.result.
+        """
+        self.instrumentation.add_hook(event, hook)
+
+    def remove_request_hook(self, event, hook):
+        self.instrumentation.remove_hook(event, hook)
+
+    def _handle_response(self, response=None, decoder=None):
+        """internal helper for handing API responses from the Bitrue server.
+        Rasises the appropriate exceptions when necessary; otherwise, returns the response
+        """
+        if response is None:
+            response = self.response
+        if not (200 <= response.status_code < 300):
+            if response.status_code in (418, 429) and self.rate_limiter is not None:
+                # back off the whole client as asked by the exchange
+                self.rate_limiter.pause(int(response.headers.get('Retry-After', 60)))
+            raise BitrueAPIException(response)
+
+        try:
+            return (decoder or self._json_decoder)(response.content)
+        except ValueError:
+            raise BitrueRequestException('Invalid Response: %s' %(response.text,))
+
+    def validate_order(self, **params):
+        """Check create_order params against the cached symbol filters, raises the BitrueOrderException the exchange would.
+        """
+        symbol = params.get(self.ORDER_SYMBOL_PARAM)
+        if symbol is None:
+            return
+        price = None if params.get('type') == 'MARKET' else params.get('price')
+        self.order_validator.validate(symbol, price, params.get(self.ORDER_QUANTITY_PARAM))
+
+    def round_price(self, symbol, price, rounding=ROUND_DOWN):
+        """Round a price to the tick size of the symbol, as a Decimal.
+        """
+        return self.order_validator.filters(symbol).round_price(price, rounding)
+
+    def round_quantity(self, symbol, quantity, rounding=ROUND_DOWN):
+        """Round a quantity to the step size of the symbol, as a Decimal.
+        """
+        return self.order_validator.filters(symbol).round_quantity(quantity, rounding)
+
+    def _get(self, path, signed=False, version=SigningMixin.PUBLIC_API_VERSION, **kwargs):
+        return self._request_api('get', path, signed, version, **kwargs)
+
+    def _post(self, path, signed=False, version=SigningMixin.PUBLIC_API_VERSION, **kwargs):
+        return self._request_api('post', path, signed, version, **kwargs)
+
+    def _put(self, path, signed=False, version=SigningMixin.PUBLIC_API_VERSION, **kwargs):
+        return self._request_api('put', path, signed, version, **kwargs)
+
+    def _delete(self, path, signed=False, version=SigningMixin.PUBLIC_API_VERSION, **kwargs):
+        return self._request_api('delete', path, signed, version, **kwargs)
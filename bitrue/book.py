@@ -23,6 +23,44 @@ def to_int(num, precision):
     dec = to_dec(num, precision)
     return int(dec * 10 ** precision)
 
+def _fixed_to_int(num, precision, pad):
+    cls = num.__class__
+    if cls is float:
+        num = repr(num)
+        cls = str
+    if cls is str and 'e' not in num and 'E' not in num:
+        whole, _, frac = num.partition('.')
+        try:
+            return int(whole + (frac + pad)[:precision])
+        except ValueError:
+            pass
+    elif cls is int:
+        return num * 10 ** precision
+    return to_int(num, precision)
+
+def to_ints(nums, precision):
+    """to_int of a whole column of prices or volumes.
+
+    Decimal strings are parsed as fixed point, truncated like to_int, other values fall back to to_int.
+    """
+    pad = '0' * precision
+    try:
+        # one pass in C tells whether the column is plain decimal strings
+        text = ''.join(nums)
+    except TypeError:
+        text = 'e'
+    if 'e' not in text and 'E' not in text:
+        result = []
+        append = result.append
+        try:
+            for num in nums:
+                whole, _, frac = num.partition('.')
+                append(int(whole + (frac + pad)[:precision]))
+            return result
+        except ValueError:
+            pass
+    return [_fixed_to_int(num, precision, pad) for num in nums]
+
 def fmt_dec(num: int, precision):
     return round(to_dec(num / (10 ** precision)), precision)
 
@@ -53,14 +91,41 @@ class CompactOrdBk(object):
         self.dbg_ask_set = set(())
         self.dbg_lck = RLock()
     
-        if bids:
-            for bid in bids:
-                # self.bid_ob[bid[0]] = bid[1]  # [px,amt]
-                self._add_bid(to_int(bid[0], self.precision), to_int(bid[1], self.volume_prec))
-        if asks:
-            for ask in asks:
-                # self.ask_ob[ask[0]] = ask[1]  # [px, amt]
-                self._add_ask(to_int(ask[0], self.precision), to_int(ask[1], self.volume_prec))
+        if bids or asks:
+            self.load(bids or (), asks or ())
+
+    @classmethod
+    def from_depth(cls, depth, precision=4, vol_prec=4):
+        """build an order book from a depth snapshot of the REST api
+
+        Args:
+            depth: get_order_book response, dict with 'bids', 'asks' and 'lastUpdateId', or a decoding.Depth
+            precision (int, optional): price precision. Defaults to 4.
+            vol_prec (int, optional): volume precision. Defaults to 4.
+        """
+        if isinstance(depth, dict):
+            seq, bids, asks = depth.get('lastUpdateId') or 1, depth['bids'], depth['asks']
+        else:
+            seq, bids, asks = depth
+        return cls(seq, bids, asks, precision=precision, vol_prec=vol_prec)
+
+    def _levels(self, pairs):
+        # convert whole columns, then build the dict in one go
+        return dict(zip(to_ints([pair[0] for pair in pairs], self.precision),
+                        to_ints([pair[1] for pair in pairs], self.volume_prec)))
+
+    def load(self, bids, asks, seq=None):
+        """replace both sides with [price, volume] pairs, e.g. of a depth snapshot, under one lock
+        """
+        bid_levels = self._levels(bids)
+        ask_levels = self._levels(asks)
+        with self.lock:
+            if seq:
+                self.seq = seq
+            self.bid_ob.clear()
+            self.bid_ob.update(bid_levels)
+            self.ask_ob.clear()
+            self.ask_ob.update(ask_levels)
     
     def add_or_upd(self, side, px, amnt):
         if side == Side.BID:
@@ -151,17 +216,15 @@ class CompactOrdBk(object):
     def reset(self, side, pairs, ts=None):
         if ts:
             self.seq = ts
+        levels = self._levels(pairs)
         if side == Side.BID:
             with self.lock:
                 self.bid_ob.clear()
-            for bid in pairs:
-                # self.bid_ob[bid[0]] = bid[1]  # [px,amt]
-                self._add_bid(to_int(bid[0], self.precision), to_int(bid[1], self.volume_prec))
+                self.bid_ob.update(levels)
         elif side == Side.ASK:
             with self.lock:
                 self.ask_ob.clear()
-            for ask in pairs:
-                self._add_ask(to_int(ask[0], self.precision), to_int(ask[1], self.volume_prec))
+                self.ask_ob.update(levels)
     
     def update_batch(self, side, pairs, ts):
         self.seq = ts
@@ -329,7 +392,7 @@ class TrackBook(object):
     @staticmethod
     def __add(levels, order_id, side, price, volume, status):
         idx = levels.bisect_key_left(price)
-        level = None if idx == 0 or idx == len(levels) else levels[idx]
+        level = levels[idx] if idx < len(levels) and levels[idx].get_price() == price else None
         if level is None:
             level = PriceLevel(side, price)
             levels.add(level)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_MAX_WORKERS = 10
+
+
+class BulkResult(list):
+    """Results of a bulk call in input order.
+
+    A failed item holds the exception it raised instead of the API response.
+    """
+
+    def __init__(self, results, latencies, elapsed):
+        super(BulkResult, self).__init__(results)
+        # seconds spent on each item, in input order
+        self.latencies = latencies
+        # wall clock seconds for the whole batch
+        self.elapsed = elapsed
+
+    @property
+    def errors(self):
+        """list of (index, exception) for the failed items
+        """
+        return [(i, res) for i, res in enumerate(self) if isinstance(res, Exception)]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def max_latency(self):
+        return max(self.latencies) if self.latencies else 0.0
+
+
+def run_bulk(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """call ``func(**item)`` for every item on a bounded thread pool
+
+    Args:
+        func (function): client method to call, e.g. ``Client.create_order``
+        items (list): list of keyword argument dicts
+        max_workers (int, optional): maximum requests in flight. Defaults to DEFAULT_MAX_WORKERS.
+
+    Returns:
+        BulkResult: results in the order of ``items``
+    """
+    items = list(items)
+    results = [None] * len(items)
+    latencies = [0.0] * len(items)
+
+    def call(idx):
+        start = time.perf_counter()
+        try:
+            results[idx] = func(**items[idx])
+        except Exception as ex:
+            results[idx] = ex
+        latencies[idx] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if items:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            list(executor.map(call, range(len(items))))
+    return BulkResult(results, latencies, time.perf_counter() - start)
+
+
+async def run_bulk_async(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """await ``func(**item)`` for every item, at most ``max_workers`` at a time
+
+    Args:
+        func (function): coroutine function to call, e.g. ``AsyncClient.create_order``
+        items (list): list of keyword argument dicts
+        max_workers (int, optional): maximum requests in flight. Defaults to DEFAULT_MAX_WORKERS.
+
+    Returns:
+        BulkResult: results in the order of ``items``
+    """
+    items = list(items)
+    latencies = [0.0] * len(items)
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def call(idx):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                res = await func(**items[idx])
+            except Exception as ex:
+                res = ex
+            latencies[idx] = time.perf_counter() - start
+            return res
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[call(idx) for idx in range(len(items))])
+    return BulkResult(results, latencies, time.perf_counter() - start)
@@ -1,15 +1,19 @@
 # coding=utf-8
 
-import hashlib
-import hmac
-import requests
 import time
-from operator import itemgetter
-from bitrue.helpers import date_to_milliseconds, interval_to_milliseconds, extend
-from bitrue.exceptions import BitrueAPIException, BitrueRequestException
+from bitrue.base_client import BaseClient, SigningMixin
+from bitrue.signing import encode_params
+from bitrue.bulk import run_bulk, DEFAULT_MAX_WORKERS
+from bitrue import decoding
+from bitrue import pagination
+from bitrue import klines as kline_utils
+from bitrue.ratelimit import SPOT_WEIGHTS
+from bitrue.validation import SymbolFilters
 
-
-class Client(object):
+class SpotRequestMixin(SigningMixin):
+    """Spot constants, parameter ordering and request signing, shared by :class:`Client` and
+    :class:`bitrue.async_client.AsyncClient`.
+    """
 
     API_URL = 'https://www.bitrue.{}/api'
     WEBSITE_URL = 'https://www.bitrue.{}'
@@ -72,59 +76,8 @@ class Client(object):
     AGG_BUYER_MAKES = 'm'
     AGG_BEST_MATCH = 'M'
 
-
-    def __init__(self, api_key=None, api_secret=None, requests_params=None, tld='com'):
-        """Bitrue API Client constructor
-        :param api_key: Api Key
-        :type api_key: str.
-        :param api_secret: Api Secret
-        :type api_secret: str.
-        :param requests_params: optional - Dictionary of requests params to use for all calls
-        :type requests_params: dict.
-        """
-
-        self.API_URL = self.API_URL.format(tld)
-        # self.WITHDRAW_API_URL = self.WITHDRAW_API_URL.format(tld)
-        # self.MARGIN_API_URL = self.MARGIN_API_URL.format(tld)
-        self.WEBSITE_URL = self.WEBSITE_URL.format(tld)
-        # self.FUTURES_URL = self.FUTURES_URL.format(tld)
-        # self.FUTURES_DATA_URL = self.FUTURES_DATA_URL.format(tld)
-        # self.FUTURES_COIN_URL = self.FUTURES_COIN_URL.format(tld)
-        # self.FUTURES_COIN_DATA_URL = self.FUTURES_COIN_DATA_URL.format(tld)
-
-        self.API_KEY = api_key
-        self.API_SECRET = api_secret
-        self.session = self._init_session()
-        self._requests_params = requests_params
-        self.response = None
-        self.timestamp_offset = 0
-
-        # init DNS and SSL cert
-        self.ping()
-        # calculate timestamp offset between local and Bitrue server
-        res = self.get_server_time()
-        self.timestamp_offset = res['serverTime'] - int(time.time() * 1000)
-    
-    def _init_session(self):
-        session = requests.session()
-        session.headers.update({
-            'Accept': 'application/json',
-            'User-Agent': 'Bitrue/Python',
-            'X-MBX-APIKEY': self.API_KEY
-        })
-        return session
-    
-    def _create_api_uri(self, path, signed=True, version=PUBLIC_API_VERSION):
-        return self.API_URL + '/' + version + '/' + path
-    
-    def _create_website_uri(self, path):
-        return self.WEBSITE_URL + "/" + path
-    
     def _generate_signature(self, data):
-        # ordered_data = self._order_params(data)
-        query_string = '&'.join(["{}={}".format(k, v) for k, v in data.items()])
-        m = hmac.new(self.API_SECRET.encode("utf-8"), query_string.encode('utf-8'), hashlib.sha256)
-        return m.hexdigest()
+        return self._get_signer().sign_params(data)
     
     def _order_params(self, data):
         """Convert params to list with signature as last element.
@@ -144,14 +97,15 @@ class Client(object):
             params.append(('signature', data['signature']))
         return params
     
-    def _reqeust(self, method, uri, signed, force_params=False, **kwargs):
+    def _get_request_kwargs(self, method, uri, signed, force_params=False, **kwargs):
 
         # set default request timeout
-        kwargs['timeout'] = 10
+        kwargs.setdefault('timeout', 10)
 
         # add our global requests params
         if self._requests_params:
             kwargs.update(self._requests_params)
+        kwargs['headers'] = self._auth_headers(kwargs.get('headers'))
         
         data = kwargs.get('data', None)
         if data and isinstance(data, dict):
@@ -164,58 +118,37 @@ class Client(object):
                 del(kwargs['data']['requests_params'])
         
         if signed:
-            # generate signature
+            self.clock.ensure()
             kwargs['data']['timestamp'] = int(time.time() * 1000 + self.timestamp_offset)
-            kwargs['data']['signature'] = self._generate_signature(kwargs['data'])
         
-        # sort get and post params to match signature order
         if data:
-            # sort post params
-            kwargs['data'] = self._order_params(kwargs['data'])
-            # remove any arguments with values of None
-            null_args = [i for i, (k, v) in enumerate(kwargs['data']) if v is None]
-            for i in reversed(null_args):
-                del(kwargs['data'][i])
-        
-        # if get request assign data array to params value for requests lib
-        if data and (method == 'get' or force_params):
-            kwargs['params'] = '&'.join('%s=%s' %(data[0], data[1]) for data in kwargs['data'])
-            del(kwargs['data'])
-        self.response = getattr(self.session, method)(uri, **kwargs)
-        return self._handle_response()
-    
-    def _request_api(self, method, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        uri = self._create_api_uri(path, signed, version)
-        return self._reqeust(method, uri, signed, **kwargs)
-    
-    def _request_website(self, method, path, signed=False, **kwargs):
-        uri = self._create_website_uri(path)
-        return self._reqeust(method, uri, signed, **kwargs)
-    
-    def _handle_response(self):
-        """internal helper for handing API responses from the Bitrue server.
-        Rasises the appropriate exceptions when necessary; otherwise, returns the response
-        """
-        if not (200 <= self.response.status_code < 300):
-            raise BitrueAPIException(self.response)
-        
-        try:
-            return self.response.json()
-        except ValueError:
-            raise BitrueRequestException('Invalid Response: %s' %(self.response.text,))
+            # sort params and remove any arguments with values of None
+            params = [(k, v) for k, v in self._order_params(kwargs['data']) if v is not None]
+            query_string = encode_params(params)
+            if signed:
+                # sign exactly the query string that is sent
+                signature = self._get_signer().sign(query_string)
+                params.append(('signature', signature))
+                query_string = '%s&signature=%s' % (query_string, signature)
+            kwargs['data'] = params
+
+            # if get request assign data array to params value for requests lib
+            if method == 'get' or force_params:
+                kwargs['params'] = query_string
+                del(kwargs['data'])
+        return kwargs
+
+
+class Client(SpotRequestMixin, BaseClient):
+
+    REQUEST_WEIGHTS = SPOT_WEIGHTS
+
+    def _load_symbol_info(self):
+        return self.get_exchange_info()['symbols']
+
+    def _compile_filters(self, info):
+        return SymbolFilters.from_symbol_info(info)
 
-    def _get(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('get', path, signed, version, **kwargs)
-    
-    def _post(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('post', path, signed, version, **kwargs)
-    
-    def _put(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('put', path, signed, version, **kwargs)
-    
-    def _delete(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('delete', path, signed, version, **kwargs)
-    
     # exchange endpoints
     def get_server_time(self):
         return self._get('time')
@@ -227,12 +160,14 @@ class Client(object):
         return self._get('exchangeInfo')
     
     def get_symbol_info(self, symbol):
-        res = self.get_exchange_info()
+        """Get the exchangeInfo entry of a symbol, served from ``symbol_cache``.
+        """
+        return self.symbol_cache.get(symbol)
 
-        for item in res['symbols']:
-            if item['symbol'] == symbol.upper():
-                return item
-        return None
+    def refresh_symbol_info(self):
+        """Reload the cached exchangeInfo symbol list.
+        """
+        self.symbol_cache.refresh()
     
     def get_all_tickers(self):
         """24 hour price change statistics. Careful when accessing this with no symbol.
@@ -243,6 +178,16 @@ class Client(object):
         """
         return self._get('ticker/24hr')
     
+    def get_all_tickers_raw(self):
+        """24 hour price change statistics as the undecoded response bytes.
+        """
+        return self._get('ticker/24hr', decoder=decoding.raw)
+    
+    def get_all_tickers_compact(self):
+        """24 hour price change statistics as a dict of symbol to decoding.Ticker.
+        """
+        return self._get('ticker/24hr', decoder=decoding.tickers)
+    
     def get_ticker(self, **params):
         return self._get('ticker/price', data=params)
     
@@ -252,6 +197,16 @@ class Client(object):
     def get_order_book(self, **params):
         return self._get("depth", data=params)
     
+    def get_order_book_raw(self, **params):
+        """Order book as the undecoded response bytes.
+        """
+        return self._get("depth", data=params, decoder=decoding.raw)
+    
+    def get_order_book_compact(self, **params):
+        """Order book as a decoding.Depth of (price, quantity) float tuples.
+        """
+        return self._get("depth", data=params, decoder=decoding.depth)
+    
     def get_recent_trades(self, **params):
         return self._get('trades', data=params)
 
@@ -261,25 +216,80 @@ class Client(object):
     def get_aggregate_trades(self, **params):
         return self._get('aggTrades', data=params)
     
+    def get_klines(self, **params):
+        """Kline/candlestick bars for a symbol, params: symbol, scale (1m, 5m, 15m, 30m, 1H, 2H, 4H, 12H, 1D, 1W),
+        fromIdx (open time in seconds of the first bar) and limit (at most 1440).
+        """
+        return self._get('market/kline', data=params)
+    
+    def get_historical_klines(self, symbol, interval, start_str, end_str=None, limit=500, as_numpy=False,
+                              max_workers=kline_utils.DEFAULT_MAX_WORKERS):
+        """Get klines over a date range as [open time, open, high, low, close, volume] lists, fetched as
+        concurrent limit-sized windows.
+
+        :param interval: market/kline scale or interval, e.g. '1H' or KLINE_INTERVAL_1HOUR
+        :param start_str: start date string in UTC format or timestamp in milliseconds
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :param limit: optional - klines per request, at most 1440
+        :param as_numpy: optional - return a dict of NumPy columns instead of a list of klines
+        """
+        scale = kline_utils.to_scale(interval)
+        interval_ms = kline_utils.SCALES[scale]
+        limit = min(limit, kline_utils.MAX_LIMIT)
+        start_ms = kline_utils.to_milliseconds(start_str)
+        end_ms = kline_utils.to_milliseconds(end_str) or int(time.time() * 1000)
+
+        def fetch(start, end):
+            # a window starts at the open time of its first bar, in seconds
+            first_open = start - start % interval_ms
+            res = self.get_klines(symbol=symbol, scale=scale, fromIdx=first_open // 1000, limit=limit)
+            return [kline for kline in kline_utils.parse_klines(res) if start_ms <= kline[0] <= end]
+
+        klines = kline_utils.fetch_chunks(fetch, kline_utils.split_range(start_ms, end_ms, interval_ms, limit), max_workers)
+        return kline_utils.klines_to_arrays(klines) if as_numpy else klines
+    
+    def iter_historical_trades(self, symbol, from_id=None, limit=500, prefetch=True):
+        """Iterate over older trades from from_id onwards, one page in memory at a time.
+        """
+        params = {'symbol': symbol}
+        if from_id is not None:
+            params['fromId'] = from_id
+        return pagination.iterate_pages(self.get_historical_trades, pagination.HISTORICAL_TRADES, params, limit, prefetch=prefetch)
+    
+    def iter_aggregate_trades(self, symbol, from_id=None, start_time=None, end_time=None, limit=500, prefetch=True):
+        """Iterate over aggregate trades from from_id or start_time (ms) up to end_time (ms).
+        """
+        params = {'symbol': symbol}
+        if from_id is not None:
+            params['fromId'] = from_id
+        elif start_time is not None:
+            params['startTime'] = start_time
+        return pagination.iterate_pages(self.get_aggregate_trades, pagination.AGGREGATE_TRADES, params, limit,
+                                        end_time=end_time, prefetch=prefetch)
+    
     # Account Endpoints
 
-    def create_order(self, **params):
+    def create_order(self, validate=True, **params):
+        """Send in a new order, checked against the cached symbol filters first unless validate is False.
+        """
+        if validate and self.validate_orders:
+            self.validate_order(**params)
         return self._post('order', True, data=params)
 
-    def order_limit(self, timeInForce=TIME_IN_FORCE_GTC, **params):
+    def order_limit(self, timeInForce=SpotRequestMixin.TIME_IN_FORCE_GTC, **params):
         params.update({
             'type': self.ORDER_TYPE_LIMIT,
             'timeInForce': timeInForce
         })
         return self.create_order(**params)
     
-    def order_limit_buy(self, timeInForce=TIME_IN_FORCE_GTC, **params):
+    def order_limit_buy(self, timeInForce=SpotRequestMixin.TIME_IN_FORCE_GTC, **params):
         params.update({
             'side': self.SIDE_BUY,
         })
         return self.order_limit(timeInForce=timeInForce, **params)
     
-    def order_limit_sell(self, timeInForce=TIME_IN_FORCE_GTC, **params):
+    def order_limit_sell(self, timeInForce=SpotRequestMixin.TIME_IN_FORCE_GTC, **params):
         """Send in a new limit sell order
         """
         params.update({
@@ -326,6 +336,22 @@ class Client(object):
         """
         return self._delete('order', True, data=params)
     
+    def create_orders(self, orders, max_workers=DEFAULT_MAX_WORKERS):
+        """Send in several new orders at once, over at most max_workers concurrent requests.
+
+        :param orders: list of create_order params dicts
+        :returns: BulkResult in input order, a failed order holds its exception
+        """
+        return run_bulk(self.create_order, orders, max_workers)
+    
+    def cancel_orders(self, orders, max_workers=DEFAULT_MAX_WORKERS):
+        """Cancel several orders at once, over at most max_workers concurrent requests.
+
+        :param orders: list of cancel_order params dicts
+        :returns: BulkResult in input order, a failed cancel holds its exception
+        """
+        return run_bulk(self.cancel_order, orders, max_workers)
+    
     def get_open_orders(self, **params):
         """Get all open orders on a symbol.
         """
@@ -339,10 +365,16 @@ class Client(object):
         """
         return self._get('account', True, data=params)
     
-    def get_asset_balance(self, asset, **params):
+    def get_asset_balance(self, asset, cached=False, **params):
         """Get current asset balance.
+
+        :param cached: optional - look the balance up in ``balances`` instead of fetching the account
         """
+        if cached:
+            return self.balances.get(asset)
         res = self.get_account(**params)
+        # keep the balance store up to date with every full account fetch
+        self.balances.update(res)
         # find asset balance in list of balances
         if "balances" in res:
             for bal in res['balances']:
@@ -355,4 +387,26 @@ class Client(object):
         """
         return self._get('myTrades', True, data=params)
 
+    def iter_all_orders(self, symbol, order_id=None, start_time=None, end_time=None, limit=500, prefetch=True, **params):
+        """Iterate over all account orders of a symbol from order_id or start_time (ms) up to end_time (ms).
+        """
+        params['symbol'] = symbol
+        if order_id is not None:
+            params['orderId'] = order_id
+        elif start_time is not None:
+            params['startTime'] = start_time
+        return pagination.iterate_pages(self.get_all_orders, pagination.ALL_ORDERS, params, limit,
+                                        end_time=end_time, prefetch=prefetch)
+    
+    def iter_my_trades(self, symbol, from_id=None, start_time=None, end_time=None, limit=500, prefetch=True, **params):
+        """Iterate over the account trades of a symbol from from_id or start_time (ms) up to end_time (ms).
+        """
+        params['symbol'] = symbol
+        if from_id is not None:
+            params['fromId'] = from_id
+        elif start_time is not None:
+            params['startTime'] = start_time
+        return pagination.iterate_pages(self.get_my_trades, pagination.MY_TRADES, params, limit,
+                                        end_time=end_time, prefetch=prefetch)
+
 
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+from collections import deque
+
+
+class ClockSync(object):
+    """Estimate the offset between the local clock and the Bitrue server clock.
+
+    Each sample measures the round-trip time of a server time request and assumes the
+    server read its clock half way through. The offset is taken from the sample with the
+    smallest round-trip time in the last ``window`` samples, the one with the least
+    network jitter. Samples can be taken on demand or from a background thread.
+    """
+
+    DEFAULT_INTERVAL = 60  # seconds
+    DEFAULT_WINDOW = 8
+
+    def __init__(self, server_time=None, window=DEFAULT_WINDOW):
+        """initialize the ClockSync
+
+        Args:
+            server_time (function, optional): returns the server time in milliseconds. Defaults to None.
+            window (int, optional): number of recent samples to pick the offset from. Defaults to DEFAULT_WINDOW.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._server_time = server_time
+        self._samples = deque(maxlen=window)
+        self._offset = 0
+        self._best = None
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    @property
+    def offset(self):
+        """milliseconds to add to the local time to get the server time
+        """
+        return self._offset
+
+    @offset.setter
+    def offset(self, value):
+        with self._lock:
+            self._offset = value
+
+    @property
+    def synced(self):
+        return self._best is not None
+
+    def add_sample(self, sent, server_ms, received):
+        """record a server time reading
+
+        Args:
+            sent (float): local time in seconds the request was sent
+            server_ms (int): server time in milliseconds
+            received (float): local time in seconds the response was received
+        """
+        rtt = (received - sent) * 1000
+        offset = server_ms - (sent + received) * 500
+        with self._lock:
+            self._samples.append((rtt, offset, received))
+            self._best = min(self._samples, key=lambda s: s[0])
+            self._offset = int(self._best[1])
+
+    def _sample(self):
+        sent = time.time()
+        server_ms = self._server_time()
+        self.add_sample(sent, server_ms, time.time())
+
+    def sample(self):
+        """take one sample from the server
+        """
+        with self._sample_lock:
+            self._sample()
+
+    def ensure(self):
+        """take a first sample if there is none yet, used before a signed request
+        """
+        if self._best is None and self._server_time is not None:
+            with self._sample_lock:
+                # another thread may have synced while we waited for the lock
+                if self._best is None:
+                    self._sample()
+
+    def stats(self):
+        with self._lock:
+            rtts = [s[0] for s in self._samples]
+            return {
+                'offset': self._offset,
+                'rtt': self._best[0] if self._best else None,
+                'min_rtt': min(rtts) if rtts else None,
+                'max_rtt': max(rtts) if rtts else None,
+                'samples': len(rtts),
+                'last_sync': self._samples[-1][2] if rtts else None,
+            }
+
+    def start(self, interval=DEFAULT_INTERVAL):
+        """sample the server time every ``interval`` seconds in a background thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(interval, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        self._thread = None
+
+    def _run(self, interval, stop):
+        while True:
+            try:
+                self.sample()
+            except Exception:
+                self.logger.warning("server time sample failed", exc_info=True)
+            if stop.wait(interval):
+                break
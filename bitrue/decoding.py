@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import re
+import zlib
+from collections import namedtuple
+
+# fastest available decoder, all of them take bytes
+try:
+    import orjson as fast_json
+except ImportError:
+    try:
+        import ujson as fast_json
+    except ImportError:
+        import json as fast_json
+
+
+# order book with (price, quantity) float tuples, best level first
+Depth = namedtuple('Depth', ['last_update_id', 'bids', 'asks'])
+
+# the numeric fields of a 24hr ticker as floats
+Ticker = namedtuple('Ticker', ['symbol', 'last_price', 'bid_price', 'ask_price', 'open_price', 'high_price',
+                               'low_price', 'volume', 'quote_volume', 'price_change_percent', 'close_time'])
+
+
+def loads(content):
+    """default response decoder, decodes the response bytes with orjson or ujson
+    """
+    return fast_json.loads(content)
+
+
+def raw(content):
+    """decoder for raw mode, keeps the response bytes
+    """
+    return content
+
+
+def _levels(levels):
+    return [(float(level[0]), float(level[1])) for level in levels]
+
+
+def depth(content):
+    """decode a depth response into a Depth
+    """
+    obj = fast_json.loads(content)
+    return Depth(obj.get('lastUpdateId', obj.get('time')), _levels(obj.get('bids') or ()), _levels(obj.get('asks') or ()))
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+def _ticker(obj):
+    get = obj.get
+    return Ticker(get('symbol'), _float(get('lastPrice')), _float(get('bidPrice')), _float(get('askPrice')),
+                  _float(get('openPrice')), _float(get('highPrice')), _float(get('lowPrice')), _float(get('volume')),
+                  _float(get('quoteVolume')), _float(get('priceChangePercent')), get('closeTime'))
+
+
+def tickers(content):
+    """decode a 24hr ticker response into a dict of symbol to Ticker
+    """
+    obj = fast_json.loads(content)
+    if isinstance(obj, dict):
+        obj = [obj]
+    return {item['symbol']: _ticker(item) for item in obj}
+
+
+# the channel of a websocket message, read without parsing the message
+_CHANNEL_RE = re.compile(rb'"channel"\s*:\s*"([^"]*)"')
+
+
+def peek_channel(data):
+    """the channel of a websocket message as str, None when it has none
+    """
+    match = _CHANNEL_RE.search(data)
+    return match.group(1).decode('utf8') if match is not None else None
+
+
+class FrameDecoder(object):
+    """Decode the gzip JSON frames of the websocket streams.
+
+    Every frame is a gzip stream of its own, it is inflated in one zlib call and parsed
+    straight from bytes. With ``channels`` set, a frame of a channel not in it is dropped
+    after a peek at its ``channel``, before it is parsed. Frames that do not inflate or
+    parse are counted as malformed instead of silently dropped.
+    """
+
+    def __init__(self, loads=loads, channels=None):
+        """initialize the FrameDecoder
+
+        Args:
+            loads (function, optional): parses the message bytes. Defaults to decoding.loads.
+            channels (container, optional): channels to parse, read on every frame so it may change. Defaults to None, every channel.
+        """
+        self._loads = loads
+        self.channels = channels
+        self.frames = 0
+        self.dropped = 0
+        self.malformed = 0
+
+    def decode(self, data, is_binary=True):
+        """the message of a frame, None when it is dropped or malformed
+        """
+        self.frames += 1
+        if is_binary:
+            try:
+                data = zlib.decompress(data, 31)
+            except zlib.error:
+                self.malformed += 1
+                return None
+        elif isinstance(data, str):
+            data = data.encode('utf8')
+        channels = self.channels
+        if channels is not None:
+            channel = peek_channel(data)
+            if channel is not None and channel not in channels:
+                self.dropped += 1
+                return None
+        try:
+            return self._loads(data)
+        except ValueError:
+            self.malformed += 1
+            return None
+
+    def stats(self):
+        return {'frames': self.frames, 'dropped': self.dropped, 'malformed': self.malformed}
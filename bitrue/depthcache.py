@@ -108,7 +108,8 @@ class DepthCacheManager(object):
         if self._bm is None:
             self._bm = BitrueSocketManager()
         
-        self._conn_key = self._bm.start_depth_socket(self._symbol, self._depth_event, self._subscribe, interval=self._ws_interval)
+        self._conn_key = self._bm.start_depth_socket(self._symbol, self._depth_event, self._subscribe, depth=self._limit,
+                                                     interval=self._ws_interval)
         if not self._bm.is_alive():
             self._bm.start()
         
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import logging
+import threading
+
+
+# overflow policies of a full channel queue
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+# keep only the latest pending message, for channels that send whole snapshots
+CONFLATE = 'conflate'
+
+POLICIES = (BLOCK, DROP_OLDEST, CONFLATE)
+
+DEFAULT_MAX_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+# policy by channel kind, see channel_kind
+DEFAULT_POLICIES = {'depth': CONFLATE, 'ticker': CONFLATE, 'trade': DROP_OLDEST, 'kline': DROP_OLDEST}
+
+
+def channel_kind(channel):
+    """'depth', 'ticker', 'trade', 'kline' or None for a channel name of helpers.gen_*_channel
+    """
+    if '_depth_step' in channel:
+        return 'depth'
+    if channel.endswith('_trade_ticker'):
+        return 'trade'
+    if channel.endswith('_ticker'):
+        return 'ticker'
+    if '_kline_' in channel:
+        return 'kline'
+    return None
+
+
+class _ChannelQueue(object):
+
+    def __init__(self, channel, callback, policy, max_size):
+        self.channel = channel
+        self.callback = callback
+        self.policy = policy
+        self.max_size = max_size
+        self.items = collections.deque()
+        # waiting in the ready queue or run by a worker
+        self.scheduled = False
+        self.high_water = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.errors = 0
+
+
+class Dispatcher(object):
+    """Run socket callbacks on a pool of worker threads instead of the socket thread.
+
+    Every channel has a bounded queue, its messages are delivered in order and by one worker
+    at a time, while the workers take turns over the channels with pending messages so a slow
+    callback only holds up its own channel. A full queue either blocks the socket thread,
+    drops its oldest message or, with CONFLATE, keeps only the latest message.
+
+    The workers run from :meth:`start` to :meth:`stop`, messages submitted while they are
+    stopped are dropped and counted in ``rejected``.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_size=DEFAULT_MAX_SIZE, policy=DROP_OLDEST, policies=None):
+        """initialize the Dispatcher
+
+        Args:
+            workers (int, optional): worker threads. Defaults to DEFAULT_WORKERS.
+            max_size (int, optional): messages queued per channel. Defaults to DEFAULT_MAX_SIZE.
+            policy (str, optional): overflow policy of the channels not in policies. Defaults to DROP_OLDEST.
+            policies (dict, optional): overflow policy by channel kind or channel name. Defaults to DEFAULT_POLICIES.
+        """
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        for name in [policy] + list(self.policies.values()):
+            if name not in POLICIES:
+                raise ValueError("unknown policy %r" % (name,))
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.workers = workers
+        self.max_size = max_size
+        self.policy = policy
+        self._queues = {}
+        self._ready = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._running = False
+        self._threads = []
+        # messages submitted while the workers were stopped
+        self.rejected = 0
+
+    def policy_for(self, channel):
+        return self.policies.get(channel) or self.policies.get(channel_kind(channel)) or self.policy
+
+    def wrap(self, channel, callback):
+        """socket callback queueing the messages of ``channel`` for ``callback``
+        """
+        return lambda msg: self.submit(channel, callback, msg)
+
+    def submit(self, channel, callback, msg):
+        """queue a message of a channel, called from the socket thread
+        """
+        with self._lock:
+            if not self._running:
+                self.rejected += 1
+                return
+            queue = self._queues.get(channel)
+            if queue is None:
+                queue = self._queues[channel] = _ChannelQueue(channel, callback, self.policy_for(channel), self.max_size)
+            items = queue.items
+            if queue.policy == CONFLATE and items and _is_data(items[-1]) and _is_data(msg):
+                # only the latest snapshot is worth delivering
+                items[-1] = msg
+                queue.conflated += 1
+                return
+            if len(items) >= queue.max_size:
+                if queue.policy == BLOCK:
+                    while len(items) >= queue.max_size and self._running and self._queues.get(channel) is queue:
+                        self._not_full.wait()
+                    if not self._running:
+                        self.rejected += 1
+                        return
+                    if self._queues.get(channel) is not queue:
+                        # discarded while waiting, the socket is gone
+                        return
+                else:
+                    items.popleft()
+                    queue.dropped += 1
+            items.append(msg)
+            queue.high_water = max(queue.high_water, len(items))
+            if not queue.scheduled:
+                queue.scheduled = True
+                self._ready.append(queue)
+                self._not_empty.notify()
+
+    def discard(self, channel):
+        """forget a channel and its pending messages, e.g. when its socket is stopped
+        """
+        with self._lock:
+            queue = self._queues.pop(channel, None)
+            if queue is not None:
+                queue.items.clear()
+                self._not_full.notify_all()
+
+    def stats(self):
+        """queue depth, high water mark and delivered, dropped, conflated and failed messages by channel
+        """
+        with self._lock:
+            return {channel: {'depth': len(q.items), 'high_water': q.high_water, 'delivered': q.delivered,
+                              'dropped': q.dropped, 'conflated': q.conflated, 'errors': q.errors, 'policy': q.policy}
+                    for channel, q in self._queues.items()}
+
+    def start(self):
+        """start the worker threads, messages are only accepted once they run
+        """
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        """stop the workers after the queued messages are delivered
+        """
+        with self._lock:
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._ready and self._running:
+                    self._not_empty.wait()
+                if not self._ready:
+                    return
+                queue = self._ready.popleft()
+                if not queue.items:
+                    # discarded while it waited
+                    queue.scheduled = False
+                    continue
+                msg = queue.items.popleft()
+                self._not_full.notify_all()
+            try:
+                queue.callback(msg)
+            except Exception:
+                queue.errors += 1
+                self.logger.exception("%s callback failed", queue.channel)
+            with self._lock:
+                queue.delivered += 1
+                if queue.items:
+                    self._ready.append(queue)
+                    self._not_empty.notify()
+                else:
+                    queue.scheduled = False
+
+
+def _is_data(msg):
+    # None, subscription replies and errors are never conflated away
+    return msg is not None and 'tick' in msg
@@ -1,17 +1,20 @@
 # encoding=utf8
 
+import json
+
+
 class BitrueAPIException(Exception):
 
-    def __init__(self, response):
+    def __init__(self, response, status_code=None, text=None):
         self.code = 0
         try:
-            json_res = response.json()
+            json_res = response.json() if text is None else json.loads(text)
         except ValueError:
-            self.message = 'Invalid JSON error message from Bitrue: {}'.format(response.text)
+            self.message = 'Invalid JSON error message from Bitrue: {}'.format(response.text if text is None else text)
         else:
             self.code = json_res['code']
             self.message = json_res['msg']
-        self.status_code = response.status_code
+        self.status_code = response.status_code if status_code is None else status_code
         self.response = response
         self.request = getattr(response, 'request', None)
 
@@ -27,6 +30,15 @@ class BitrueRequestException(Exception):
         return 'BitrueRequestException: %s' % self.message
 
 
+class BitrueRateLimitException(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        self.message = 'Request weight limit reached, retry after %.3fs' % retry_after
+
+    def __str__(self):
+        return 'BitrueRateLimitException: %s' % self.message
+
+
 class BitrueOrderException(Exception):
 
     def __init__(self, code, message):
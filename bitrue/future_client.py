@@ -1,21 +1,23 @@
 # coding=utf-8
 
 
-import hashlib
-import hmac
-import requests
 import time
 from urllib.parse import urlparse
 from operator import itemgetter
-from bitrue.helpers import date_to_milliseconds, interval_to_milliseconds, extend
-from bitrue.exceptions import BitrueAPIException, BitrueRequestException
+from bitrue.base_client import BaseClient
+from bitrue.signing import encode_params
+from bitrue.bulk import run_bulk, DEFAULT_MAX_WORKERS
+from bitrue import decoding
+from bitrue import klines as kline_utils
+from bitrue.ratelimit import FUTURE_WEIGHTS
+from bitrue.validation import SymbolFilters
 
 try:
     import simplejson as json
 except Exception as ex:
     import json
 
-class FutureClient(object):
+class FutureClient(BaseClient):
 
     API_URL = 'https://fapi.bitrue.{}/fapi'        # 'https://futuresopenapi.byqian.{}/fapi'
     FUTURES_URL = 'https://fapi.bitrue.{}/fapi'    # 'https://futuresopenapi.byqian.{}/fapi'
@@ -79,73 +81,33 @@ class FutureClient(object):
     AGG_BUYER_MAKES = 'm'
     AGG_BEST_MATCH = 'M'
 
+    REQUEST_WEIGHTS = FUTURE_WEIGHTS
+    # the futures request weights and limits are not published, limiting with the spot
+    # ones would be a guess, so a RateLimiter is only used when one is passed in
+    RATE_LIMITED = False
 
-    def __init__(self, api_key=None, api_secret=None, requests_params=None, tld='com'):
-        """Bitrue API Client constructor
-        :param api_key: Api Key
-        :type api_key: str.
-        :param api_secret: Api Secret
-        :type api_secret: str.
-        :param requests_params: optional - Dictionary of requests params to use for all calls
-        :type requests_params: dict.
-        """
+    ORDER_SYMBOL_PARAM = 'contractName'
+    ORDER_QUANTITY_PARAM = 'volume'
 
-        self.API_URL = self.API_URL.format(tld)
-        # self.WITHDRAW_API_URL = self.WITHDRAW_API_URL.format(tld)
-        # self.MARGIN_API_URL = self.MARGIN_API_URL.format(tld)
-        self.WEBSITE_URL = self.WEBSITE_URL.format(tld)
+    def _init_urls(self, tld):
+        super(FutureClient, self)._init_urls(tld)
         self.FUTURES_URL = self.FUTURES_URL.format(tld)
-        # self.FUTURES_DATA_URL = self.FUTURES_DATA_URL.format(tld)
-        # self.FUTURES_COIN_URL = self.FUTURES_COIN_URL.format(tld)
-        # self.FUTURES_COIN_DATA_URL = self.FUTURES_COIN_DATA_URL.format(tld)
-
-        self.API_KEY = api_key
-        self.API_SECRET = api_secret
-        self.session = self._init_session()
-        self._requests_params = requests_params
-        self.response = None
-        self.timestamp_offset = 0
-
-        # init DNS and SSL cert
-        self.ping()
-        # calculate timestamp offset between local and Bitrue server
-        res = self.get_server_time()
-        self.timestamp_offset = res['serverTime'] - int(time.time() * 1000)
-    
-    def _init_session(self):
-        session = requests.session()
-        session.headers.update({
-            'Accept': 'application/json',
-            'User-Agent': 'Bitrue/Python',
-            'X-MBX-APIKEY': self.API_KEY
-        })
-        return session
-    
-    def _create_api_uri(self, path, signed=True, version=PUBLIC_API_VERSION):
-        return self.API_URL + '/' + version + '/' + path
-    
-    def _create_website_uri(self, path):
-        return self.WEBSITE_URL + "/" + path
-    
-    def _generate_signature(self, ts, method, path, params={}, payload=None):
-        # sig_explain = '&'.join(["{}={}".format(k, v) for k, v in body.items()])
-        if params:
-            qs = '&'.join(["{}={}".format(k, v) for k, v in params.items()])
-            if path.find('?') > -1:
-                qs = "?" + qs
-            sig_explain = "%d%s%s%s%s" %(ts, method.upper(), path, qs, "" if not payload else payload)
-        else:
-            sig_explain = "%d%s%s%s" %(ts, method.upper(), path, "" if not payload else payload)
-        print("\n\n", sig_explain, "\n\n")
-
-        m = hmac.new(self.API_SECRET.encode("utf-8"), sig_explain.encode('utf-8'), hashlib.sha256)
-        return m.hexdigest()
+
+    def _load_symbol_info(self):
+        return self.get_contracts()
+
+    def _compile_filters(self, info):
+        return SymbolFilters.from_contract(info)
+
+    def _generate_signature(self, ts, method, path, params=None, payload=None):
+        if isinstance(params, (dict, list)):
+            params = encode_params(params)
+        return self._get_signer().sign_request(ts, method, path, params, payload)
     
-    def _reqeust(self, method, uri, signed, force_params=False, **kwargs):
+    def _get_request_kwargs(self, method, uri, signed, force_params=False, **kwargs):
 
         # set default request timeout
-        kwargs['timeout'] = 10
-        headers = None
+        kwargs.setdefault('timeout', 10)
 
         # add our global requests params
         if self._requests_params:
@@ -154,80 +116,44 @@ class FutureClient(object):
         a_payload = None
         data = kwargs.get('data', None)
 
-        # if get request assign data array to params value for requests lib
-        if data and (method == 'get' or force_params):
-            kwargs['params'] = '&'.join('%s=%s' %(data[0], data[1]) for data in kwargs['data'])
-            del(kwargs['data'])
-            data = None
-
         if data and isinstance(data, dict):
-            kwargs['data'] = data
-
             # find any requests params passed and apply them
-            if 'requests_params' in kwargs['data']:
+            if 'requests_params' in data:
                 # merge requests params into kwargs
-                kwargs.update(kwargs['data']['requests_params'])
-                del(kwargs['data']['requests_params'])
+                kwargs.update(data['requests_params'])
+                del(data['requests_params'])
              
             if method == 'get' or force_params:
-                kwargs['params'] = '&'.join('%s=%s' %(data[0], data[1]) for data in kwargs['data'])
+                # if get request assign data to params value for requests lib
+                kwargs['params'] = encode_params(data)
+                del(kwargs['data'])
             else:
-                a_payload = json.dumps(kwargs['data'])
-                kwargs['json'] = kwargs['data']
-            del(kwargs['data'])
+                # send the exact json that is signed
+                a_payload = json.dumps(data)
+                kwargs['data'] = a_payload
+
+        # build the query string once so the signed and the sent one are the same
+        if isinstance(kwargs.get('params'), dict):
+            kwargs['params'] = encode_params(kwargs['params'])
         
-        headers =  {'Content-Type': 'application/json'}
+        headers = self._auth_headers(kwargs.get('headers'))
+        headers['Content-Type'] = 'application/json'
 
         if signed:
+            self.clock.ensure()
             ts = int(time.time() * 1000 + self.timestamp_offset)
             pr = urlparse(uri)
             path = pr.path
             if pr.query:
-                path = path.join(['?', pr.query])
+                path = '%s?%s' % (path, pr.query)
 
             # generate signature
             headers['X-CH-TS'] = str(ts)
             headers['X-CH-APIKEY'] = self.API_KEY
-            headers['X-CH-SIGN'] = self._generate_signature(ts, method, path, params=kwargs.get('params',{}), payload=a_payload)
-        # print(headers)
+            headers['X-CH-SIGN'] = self._generate_signature(ts, method, path, kwargs.get('params'), a_payload)
         kwargs.update({'headers' :headers})
-        print(kwargs)
-        
-        self.response = getattr(self.session, method)(uri, **kwargs)
-        return self._handle_response()
-    
-    def _request_api(self, method, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        uri = self._create_api_uri(path, signed, version)
-        return self._reqeust(method, uri, signed, **kwargs)
-    
-    def _request_website(self, method, path, signed=False, **kwargs):
-        uri = self._create_website_uri(path)
-        return self._reqeust(method, uri, signed, **kwargs)
-    
-    def _handle_response(self):
-        """internal helper for handing API responses from the Bitrue server.
-        Rasises the appropriate exceptions when necessary; otherwise, returns the response
-        """
-        if not (200 <= self.response.status_code < 300):
-            raise BitrueAPIException(self.response)
-        
-        try:
-            return self.response.json()
-        except ValueError:
-            raise BitrueRequestException('Invalid Response: %s' %(self.response.text,))
+        return kwargs
 
-    def _get(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('get', path, signed, version, **kwargs)
-    
-    def _post(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('post', path, signed, version, **kwargs)
-    
-    def _put(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('put', path, signed, version, **kwargs)
-    
-    def _delete(self, path, signed=False, version=PUBLIC_API_VERSION, **kwargs):
-        return self._request_api('delete', path, signed, version, **kwargs)
-    
     # public endpoints
     def get_time(self):
         return self.get_server_time()
@@ -242,12 +168,14 @@ class FutureClient(object):
         return self._get('contracts')
     
     def get_symbol_info(self, symbol):
-        res = self.get_contracts()
+        """Get the contract entry of a symbol, served from ``symbol_cache``.
+        """
+        return self.symbol_cache.get(symbol)
 
-        for item in res:
-            if item['symbol'] == symbol.upper():
-                return item
-        return None
+    def refresh_symbol_info(self):
+        """Reload the cached contract list.
+        """
+        self.symbol_cache.refresh()
     
     def get_ticker(self, **params):
         return self._get('ticker', params=params)
@@ -258,15 +186,46 @@ class FutureClient(object):
     def get_order_book(self, **params):
         return self._get("depth", params=params)
     
+    def get_order_book_raw(self, **params):
+        """Order book as the undecoded response bytes.
+        """
+        return self._get("depth", params=params, decoder=decoding.raw)
+    
+    def get_order_book_compact(self, **params):
+        """Order book as a decoding.Depth of (price, quantity) float tuples.
+        """
+        return self._get("depth", params=params, decoder=decoding.depth)
+    
     def get_klines(self, **params):
         return self._get("klines", params=params)
     
+    def get_historical_klines(self, contractName, interval, start_str, end_str=None, limit=300, as_numpy=False):
+        """Get klines over a date range, as [open time, open, high, low, close, volume] lists.
+
+        The futures klines endpoint has no time range params and only serves the latest
+        limit klines, so the range is cut out of that window.
+
+        :param start_str: start date string in UTC format or timestamp in milliseconds
+        :param end_str: optional - end date string in UTC format or timestamp in milliseconds, default now
+        :param as_numpy: optional - return a dict of NumPy columns instead of a list of klines
+        """
+        start_ms = kline_utils.to_milliseconds(start_str)
+        end_ms = kline_utils.to_milliseconds(end_str) or int(time.time() * 1000)
+        res = self.get_klines(contractName=contractName, interval=interval, limit=limit)
+        klines = [[k['idx'], k['open'], k['high'], k['low'], k['close'], k['vol']] for k in sorted(res, key=itemgetter('idx'))
+                  if start_ms <= k['idx'] <= end_ms]
+        return kline_utils.klines_to_arrays(klines) if as_numpy else klines
+    
     # Account Endpoints
 
-    def create_order(self, **params):
+    def create_order(self, validate=True, **params):
         """
         volume, price, contractName, type, side, open, position, clientOrderId, timeInForce
+
+        checked against the cached contract filters first unless validate is False
         """
+        if validate and self.validate_orders:
+            self.validate_order(**params)
         return self._post('order', True, data=params)
 
     def order_limit(self, timeInForce=TIME_IN_FORCE_GTC, **params):
@@ -329,6 +288,22 @@ class FutureClient(object):
         """
         return self._post('cancel', True, data=params)
     
+    def create_orders(self, orders, max_workers=DEFAULT_MAX_WORKERS):
+        """Send in several new orders at once, over at most max_workers concurrent requests.
+
+        :param orders: list of create_order params dicts
+        :returns: BulkResult in input order, a failed order holds its exception
+        """
+        return run_bulk(self.create_order, orders, max_workers)
+    
+    def cancel_orders(self, orders, max_workers=DEFAULT_MAX_WORKERS):
+        """Cancel several orders at once, over at most max_workers concurrent requests.
+
+        :param orders: list of cancel_order params dicts
+        :returns: BulkResult in input order, a failed cancel holds its exception
+        """
+        return run_bulk(self.cancel_order, orders, max_workers)
+    
     def get_open_orders(self, **params):
         """Get all open orders on a symbol.
         """
@@ -342,10 +317,16 @@ class FutureClient(object):
         """
         return self._get('account', True, data=params)
     
-    def get_asset_balance(self, asset, **params):
+    def get_asset_balance(self, asset, cached=False, **params):
         """Get current asset balance.
+
+        :param cached: optional - look the balance up in ``balances`` instead of fetching the account
         """
+        if cached:
+            return self.balances.get(asset)
         res = self.get_account(**params)
+        # keep the balance store up to date with every full account fetch
+        self.balances.update(res)
         # find asset balance in list of balances
         if "balances" in res:
             for bal in res['balances']:
@@ -60,7 +60,7 @@ def gen_ticker_channel(lower_symbol):
     return "market_%s_ticker" %(lower_symbol,)
 
 def gen_kline_channel(lower_symbol, interval='1min'):
-    return 'market_$%s_kline_%s' %(lower_symbol, interval)
+    return 'market_%s_kline_%s' %(lower_symbol, interval)
 
 def gen_trade_channel(lower_symbol):
     return 'market_%s_trade_ticker' %(lower_symbol,)
@@ -77,6 +77,9 @@ def gen_kline_sub_msg(lower_symbol, interval='1min'):
 def gen_trade_sub_msg(lower_symbol):
     return '{"event":"sub","params":{"cb_id":"%s","channel":"%s"}}' %(lower_symbol, gen_trade_channel(lower_symbol))
 
+def gen_unsub_msg(cb_id, channel):
+    return '{"event":"unsub","params":{"cb_id":"%s","channel":"%s"}}' %(cb_id, channel)
+
 def equals(f1, f2, rel_tol=1e-9, abs_tol=0.0):
     return math.isclose(f1, f2, rel_tol=rel_tol, abs_tol=abs_tol)
 
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from bitrue.helpers import date_to_milliseconds
+
+
+DEFAULT_MAX_WORKERS = 4
+
+# klines returned by one market/kline request at most
+MAX_LIMIT = 1440
+
+# market/kline scales in milliseconds
+SCALES = {
+    '1m': 60 * 1000,
+    '5m': 5 * 60 * 1000,
+    '15m': 15 * 60 * 1000,
+    '30m': 30 * 60 * 1000,
+    '1H': 60 * 60 * 1000,
+    '2H': 2 * 60 * 60 * 1000,
+    '4H': 4 * 60 * 60 * 1000,
+    '12H': 12 * 60 * 60 * 1000,
+    '1D': 24 * 60 * 60 * 1000,
+    '1W': 7 * 24 * 60 * 60 * 1000,
+}
+
+# columns of a kline returned by klines_to_arrays
+KLINE_COLUMNS = ('open_time', 'open', 'high', 'low', 'close', 'volume')
+
+
+def to_milliseconds(value):
+    """milliseconds from an int or float timestamp in milliseconds or a date string such as "1 day ago UTC"
+    """
+    if value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return int(value)
+    return date_to_milliseconds(value)
+
+
+def to_scale(interval):
+    """market/kline scale of an interval such as '1h' or Client.KLINE_INTERVAL_1HOUR, e.g. '1H'
+    """
+    scale = interval[:-1] + interval[-1].upper() if interval and interval[-1] in 'hdw' else interval
+    if scale not in SCALES:
+        raise ValueError("Unknown kline interval %s" % interval)
+    return scale
+
+
+def parse_klines(res):
+    """[open time ms, open, high, low, close, volume] lists of a market/kline response, oldest first
+    """
+    return sorted([[k['i'] * 1000, k['o'], k['h'], k['l'], k['c'], k['v']] for k in res.get('data') or ()],
+                  key=lambda kline: kline[0])
+
+
+def split_range(start_ms, end_ms, interval_ms, limit):
+    """split [start_ms, end_ms] into windows of at most ``limit`` klines
+
+    Returns:
+        list: (start, end) tuples in milliseconds
+    """
+    step = interval_ms * limit
+    chunks = []
+    start = start_ms
+    while start <= end_ms:
+        chunks.append((start, min(start + step - 1, end_ms)))
+        start += step
+    return chunks
+
+
+def fetch_chunks(fetch, chunks, max_workers=DEFAULT_MAX_WORKERS):
+    """fetch every chunk concurrently and stitch the klines in time order
+
+    Args:
+        fetch (function): fetch(start, end) returns the klines of one window, open time first
+        chunks (list): (start, end) tuples from split_range
+        max_workers (int, optional): maximum requests in flight. Defaults to DEFAULT_MAX_WORKERS.
+    """
+    if not chunks:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        pages = list(executor.map(lambda chunk: fetch(*chunk), chunks))
+
+    klines = []
+    last_open = None
+    for page in pages:
+        for kline in page:
+            # windows may overlap by a kline on their boundaries
+            if last_open is not None and kline[0] <= last_open:
+                continue
+            last_open = kline[0]
+            klines.append(kline)
+    return klines
+
+
+def klines_to_arrays(klines):
+    """convert klines to NumPy columns
+
+    Returns:
+        dict: 'open_time' int64 array and 'open', 'high', 'low', 'close', 'volume' float64 arrays
+    """
+    if np is None:
+        raise ImportError("numpy is required for as_numpy=True")
+    rows = len(klines)
+    open_time = np.fromiter((k[0] for k in klines), dtype=np.int64, count=rows)
+    values = np.array([k[1:6] for k in klines], dtype=np.float64).reshape(rows, 5)
+    arrays = {'open_time': open_time}
+    for i, name in enumerate(KLINE_COLUMNS[1:]):
+        arrays[name] = np.ascontiguousarray(values[:, i])
+    return arrays
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import threading
+import time
+
+from bitrue.decoding import fast_json
+
+
+class SymbolInfoCache(object):
+    """Exchange metadata indexed by upper-case symbol.
+
+    The symbol list is downloaded once through ``loader`` and kept for ``ttl`` seconds, so
+    looking up a symbol is a dict access instead of a full ``exchangeInfo``/``contracts``
+    round-trip. Used by both ``Client`` and ``FutureClient``.
+
+    With a ``path`` every download is also saved there, and :meth:`warm_start` serves a new
+    process from that snapshot while the list is downloaded again in the background.
+    """
+
+    DEFAULT_TTL = 60 * 30  # 30 minutes
+
+    # format of the snapshot file, older or newer snapshots are ignored
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, loader, ttl=DEFAULT_TTL, path=None, source=None):
+        """initialize the SymbolInfoCache
+
+        Args:
+            loader (function): returns the list of symbol info dicts, each with a 'symbol' key
+            ttl (int, optional): seconds before the cached list is reloaded, None never expires. Defaults to DEFAULT_TTL.
+            path (string, optional): file the symbol list is saved to and warm started from. Defaults to None.
+            source (string, optional): where the list comes from, e.g. the api url, a snapshot of another source is ignored. Defaults to None.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._loader = loader
+        self._ttl = ttl
+        self.path = path
+        self.source = source
+        self._index = {}
+        self._loaded_at = None
+        self.snapshot_saved_at = None
+        self._lock = threading.RLock()
+        self._refresh_stop = None
+        self._refresh_thread = None
+
+    def _load(self, items):
+        index = {}
+        for item in items:
+            index[item['symbol'].upper()] = item
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.time()
+
+    def refresh(self):
+        """reload the symbol list from the exchange
+        """
+        with self._lock:
+            items = self._loader()
+            self._load(items)
+        if self.path:
+            try:
+                self.save_snapshot(items)
+            except (OSError, TypeError, ValueError):
+                self.logger.exception("saving the symbol info snapshot failed")
+
+    def save_snapshot(self, items=None):
+        """write the symbol list to ``path``, replacing the file at once so readers never see a partial one
+        """
+        if items is None:
+            items = list(self._index.values())
+        snapshot = {'version': self.SNAPSHOT_VERSION, 'source': self.source, 'saved_at': time.time(), 'symbols': items}
+        tmp_path = '%s.%d.%d.tmp' % (self.path, os.getpid(), threading.get_ident())
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, 'w') as fo:
+            json.dump(snapshot, fo, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def load_snapshot(self):
+        """load the symbol list saved at ``path``
+
+        Returns:
+            bool: False when there is no usable snapshot
+        """
+        try:
+            with open(self.path, 'rb') as fi:
+                snapshot = fast_json.loads(fi.read())
+        except (OSError, ValueError):
+            return False
+        if not isinstance(snapshot, dict) or snapshot.get('version') != self.SNAPSHOT_VERSION \
+                or snapshot.get('source') != self.source or not isinstance(snapshot.get('symbols'), list):
+            return False
+        with self._lock:
+            self._load(snapshot['symbols'])
+            self.snapshot_saved_at = snapshot.get('saved_at')
+        return True
+
+    def warm_start(self):
+        """serve the saved snapshot, if any, and download the list again in a background thread
+
+        Returns:
+            bool: True when the snapshot was loaded
+        """
+        if not self.path or not self.load_snapshot():
+            return False
+        threading.Thread(target=self._revalidate, daemon=True).start()
+        return True
+
+    def _revalidate(self):
+        try:
+            self.refresh()
+        except Exception:
+            # keep serving the snapshot, the next lookup after the ttl tries again
+            self.logger.exception("symbol info revalidation failed")
+
+    def is_stale(self):
+        if self._loaded_at is None:
+            return True
+        return self._ttl is not None and time.time() - self._loaded_at > self._ttl
+
+    def _ensure_loaded(self):
+        if self.is_stale():
+            with self._lock:
+                # another thread may have refreshed while we waited for the lock
+                if self.is_stale():
+                    self.refresh()
+
+    def get(self, symbol):
+        """get the symbol info, None for an unknown symbol
+
+        Args:
+            symbol (string): symbol name, case insensitive
+        """
+        self._ensure_loaded()
+        return self._index.get(symbol.upper())
+
+    def symbols(self):
+        """get all known symbol names
+        """
+        self._ensure_loaded()
+        return list(self._index.keys())
+
+    def __contains__(self, symbol):
+        return self.get(symbol) is not None
+
+    def start_refresh(self, interval=None):
+        """reload the symbol list in a background thread so lookups never wait on the network
+
+        Args:
+            interval (int, optional): seconds between reloads. Defaults to the ttl.
+        """
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        interval = interval or self._ttl or self.DEFAULT_TTL
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, args=(interval, self._refresh_stop), daemon=True)
+        self._refresh_thread.start()
+
+    def stop_refresh(self):
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+        self._refresh_thread = None
+
+    def _refresh_loop(self, interval, stop):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # keep serving the previous list until the next attempt
+                self.logger.exception("symbol info refresh failed")
+            if stop.wait(interval):
+                break
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# request phases timed for every call:
+#   server: request sent until response headers received, includes opening a new connection
+#   transfer: reading the response body
+#   decode: status check and body decoding
+#   total: all of the above
+PHASES = ('total', 'server', 'transfer', 'decode')
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, the last bound is +Inf
+        """
+        total = 0
+        res = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            res.append((bound, total))
+        return res
+
+    def quantile(self, q):
+        """upper bound of the bucket holding the q quantile, None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+    def to_dict(self):
+        return {'count': self.count, 'sum': self.sum,
+                'buckets': {('+Inf' if bound == float('inf') else bound): total for bound, total in self.cumulative()}}
+
+
+class EndpointMetrics(object):
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.latency = {phase: Histogram(buckets) for phase in PHASES}
+        self.status_codes = Counter()
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def to_dict(self):
+        return {
+            'latency': {phase: hist.to_dict() for phase, hist in self.latency.items()},
+            'status_codes': dict(self.status_codes),
+            'errors': self.errors,
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+        }
+
+
+class RequestMetrics(object):
+    """Per endpoint latency histograms, status code counts, errors, retries, hedges and bytes in/out.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint):
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints.setdefault(endpoint, EndpointMetrics(self.buckets))
+        return metrics
+
+    def endpoint(self, endpoint):
+        return self._endpoints.get(endpoint)
+
+    def observe(self, endpoint, status_code, timings, bytes_out=0, bytes_in=0):
+        with self._lock:
+            metrics = self._get(endpoint)
+            for phase, value in timings.items():
+                metrics.latency[phase].observe(value)
+            if status_code is not None:
+                metrics.status_codes[status_code] += 1
+            metrics.bytes_out += bytes_out
+            metrics.bytes_in += bytes_in
+
+    def observe_error(self, endpoint):
+        with self._lock:
+            self._get(endpoint).errors += 1
+
+    def observe_retry(self, endpoint):
+        with self._lock:
+            self._get(endpoint).retries += 1
+
+    def observe_hedge(self, endpoint):
+        with self._lock:
+            self._get(endpoint).hedges += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def to_dict(self):
+        with self._lock:
+            return {endpoint: metrics.to_dict() for endpoint, metrics in self._endpoints.items()}
+
+    def to_prometheus(self, prefix='bitrue_rest'):
+        """metrics in the Prometheus text exposition format
+        """
+        lines = ['# TYPE %s_request_seconds histogram' % prefix]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for endpoint, metrics in endpoints:
+                for phase in PHASES:
+                    hist = metrics.latency[phase]
+                    labels = 'endpoint="%s",phase="%s"' % (endpoint, phase)
+                    for bound, total in hist.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append('%s_request_seconds_bucket{%s,le="%s"} %d' % (prefix, labels, le, total))
+                    lines.append('%s_request_seconds_sum{%s} %r' % (prefix, labels, hist.sum))
+                    lines.append('%s_request_seconds_count{%s} %d' % (prefix, labels, hist.count))
+            lines.append('# TYPE %s_responses_total counter' % prefix)
+            for endpoint, metrics in endpoints:
+                for code, count in sorted(metrics.status_codes.items()):
+                    lines.append('%s_responses_total{endpoint="%s",code="%s"} %d' % (prefix, endpoint, code, count))
+            for name, attr in (('errors_total', 'errors'), ('retries_total', 'retries'), ('hedges_total', 'hedges'),
+                               ('received_bytes_total', 'bytes_in'), ('sent_bytes_total', 'bytes_out')):
+                lines.append('# TYPE %s_%s counter' % (prefix, name))
+                for endpoint, metrics in endpoints:
+                    lines.append('%s_%s{endpoint="%s"} %d' % (prefix, name, endpoint, getattr(metrics, attr)))
+        return '\n'.join(lines) + '\n'
+
+
+class RequestInfo(object):
+    """what request hooks receive, filled in as the request progresses
+    """
+
+    def __init__(self, method, endpoint, uri, kwargs):
+        self.method = method
+        self.endpoint = endpoint
+        self.uri = uri
+        self.kwargs = kwargs
+        self.response = None
+        # the decoded response, set before the 'after' hooks run
+        self.result = None
+        self.exception = None
+        self.timings = {}
+
+
+class Instrumentation(object):
+    """Request hooks and metrics around the REST calls of a client.
+
+    Hooks are called with a :class:`RequestInfo`: 'before' ahead of sending, 'after' with
+    the raw and the decoded response in ``response`` and ``result``, and 'error' with
+    ``exception`` when the request raised. When there is no hook and
+    no metrics the client skips this layer entirely.
+    """
+
+    EVENTS = ('before', 'after', 'error')
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.hooks = {event: [] for event in self.EVENTS}
+
+    @property
+    def enabled(self):
+        return self.metrics is not None or any(self.hooks.values())
+
+    def add_hook(self, event, hook):
+        if event not in self.hooks:
+            raise ValueError("Unknown request hook event %s" % event)
+        self.hooks[event].append(hook)
+
+    def remove_hook(self, event, hook):
+        self.hooks[event].remove(hook)
+
+    def call(self, info, send, handle):
+        """time ``send()`` and ``handle(response)``, run the hooks and record the metrics
+        """
+        for hook in self.hooks['before']:
+            hook(info)
+        start = time.perf_counter()
+        try:
+            response = info.response = send()
+            received = time.perf_counter()
+            result = handle(response)
+        except Exception as ex:
+            info.exception = ex
+            if self.metrics is not None:
+                self.metrics.observe_error(info.endpoint)
+                if info.response is not None:
+                    self._observe(info, start, received, time.perf_counter())
+            for hook in self.hooks['error']:
+                hook(info)
+            raise
+        self._observe(info, start, received, time.perf_counter())
+        info.result = result
+        for hook in self.hooks['after']:
+            hook(info)
+        return result
+
+    def _observe(self, info, start, received, done):
+        response = info.response
+        total = received - start
+        elapsed = getattr(response, 'elapsed', None)
+        server = min(elapsed.total_seconds(), total) if elapsed is not None else total
+        info.timings = {'total': done - start, 'server': server, 'transfer': total - server, 'decode': done - received}
+        if self.metrics is not None:
+            request = getattr(response, 'request', None)
+            body = getattr(request, 'body', None)
+            bytes_out = len(getattr(request, 'url', None) or '') + (len(body) if body else 0)
+            self.metrics.observe(info.endpoint, response.status_code, info.timings, bytes_out, len(response.content))
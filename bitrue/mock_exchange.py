@@ -0,0 +1,686 @@
+# -*- coding: utf-8 -*-
+"""A local stand-in of the Bitrue exchange for offline load and latency tests.
+
+Serves the spot (``/api/v1``) and futures (``/fapi/v1``) REST endpoints used by
+:class:`bitrue.client.Client` and :class:`bitrue.future_client.FutureClient`, checking the
+signatures of signed requests, and the gzip websocket channels of ``helpers.gen_*_sub_msg``
+on ``/kline-api/ws``. Market data is a seeded random walk.
+
+Run it with ``python -m bitrue.mock_exchange --port 8080 --depth-rate 100 --latency 0.005``.
+"""
+
+import argparse
+import asyncio
+import collections
+import gzip
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl
+
+from aiohttp import web, WSMsgType
+
+
+# symbol: (base asset, quote asset, start price, price precision, quantity precision)
+DEFAULT_SYMBOLS = {
+    'BTRUSDT': ('BTR', 'USDT', 0.1234, 4, 1),
+    'ETHUSDT': ('ETH', 'USDT', 2000.0, 2, 4),
+    'XRPUSDT': ('XRP', 'USDT', 0.5, 4, 1),
+}
+
+# contract name: (start price, price precision)
+DEFAULT_CONTRACTS = {
+    'E-BTC-USDT': (30000.0, 1),
+    'E-ETH-USDT': (2000.0, 2),
+}
+
+DEFAULT_BALANCES = {'BTR': '100000', 'ETH': '10', 'XRP': '100000', 'USDT': '100000'}
+
+# websocket messages per second of every subscription, by channel kind
+DEFAULT_RATES = {'depth': 10, 'ticker': 1, 'trade': 5, 'kline': 1}
+
+CHANNEL_RE = re.compile(r'^market_\$?([a-z0-9_]+?)_(depth_step\d+|ticker|trade_ticker|kline_\w+)$')
+
+_KLINE_INTERVALS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _interval_seconds(interval):
+    # '1m', '1H' of the REST endpoints and '1min', '60min' of the kline channels
+    match = re.match(r'^(\d+)(min|m|H|h|day|D|d|week|W|w|month|M)$', interval or '')
+    if match is None:
+        return 60
+    unit = match.group(2)
+    unit = {'min': 'm', 'H': 'h', 'day': 'd', 'D': 'd', 'week': 'w', 'W': 'w', 'month': 'M'}.get(unit, unit)
+    return int(match.group(1)) * _KLINE_INTERVALS[unit]
+
+
+class _Market(object):
+    """random walk of one symbol
+    """
+
+    def __init__(self, price, precision, qty_precision, rng):
+        self.price = price
+        self.precision = precision
+        self.qty_precision = qty_precision
+        self.tick = 10 ** -precision
+        self.rng = rng
+        self.open = price
+        self.high = price
+        self.low = price
+        self.volume = 0.0
+        self.trade_ids = itertools.count(1)
+        self.update_ids = itertools.count(1)
+
+    def step(self):
+        self.price = max(self.tick, self.price * (1 + self.rng.gauss(0, 0.0005)))
+        self.high = max(self.high, self.price)
+        self.low = min(self.low, self.price)
+        return self.price
+
+    def fmt(self, price):
+        return '%.*f' % (self.precision, price)
+
+    def qty(self):
+        return round(self.rng.uniform(0.1, 100), self.qty_precision)
+
+    def book(self, levels):
+        mid = self.step()
+        step = max(self.tick, mid * 0.0001)
+        bids = [(self.fmt(mid - step * (i + 1)), self.qty()) for i in range(levels)]
+        asks = [(self.fmt(mid + step * (i + 1)), self.qty()) for i in range(levels)]
+        return bids, asks
+
+    def trade(self):
+        price = self.step()
+        qty = self.qty()
+        self.volume += qty
+        return next(self.trade_ids), price, qty, self.rng.random() < 0.5
+
+
+class MockExchange(object):
+    """Local Bitrue exchange serving REST and websocket market data.
+
+    Every REST response is delayed by ``latency`` plus up to ``jitter`` seconds, every websocket
+    message is sent that much after it is generated. ``rates`` sets the messages per second of
+    each subscription by channel kind, 'depth', 'ticker', 'trade' and 'kline'. Both can be
+    changed while serving.
+    """
+
+    def __init__(self, api_key='key', api_secret='secret', symbols=None, contracts=None, balances=None,
+                 latency=0, jitter=0, rates=None, depth_levels=20, ping_interval=30, verify_signatures=True, seed=None):
+        """initialize the MockExchange
+
+        Args:
+            api_key (string, optional): accepted api key. Defaults to 'key'.
+            api_secret (string, optional): secret signatures are checked with. Defaults to 'secret'.
+            symbols (dict, optional): spot symbols, see DEFAULT_SYMBOLS. Defaults to None.
+            contracts (dict, optional): futures contracts, see DEFAULT_CONTRACTS. Defaults to None.
+            balances (dict, optional): free balance by asset. Defaults to None.
+            latency (float, optional): seconds every response and message is delayed. Defaults to 0.
+            jitter (float, optional): up to that many more seconds of random delay. Defaults to 0.
+            rates (dict, optional): websocket messages per second by channel kind, see DEFAULT_RATES. Defaults to None.
+            depth_levels (int, optional): price levels of each side of a websocket depth message. Defaults to 20.
+            ping_interval (int, optional): seconds between the websocket pings of the server. Defaults to 30.
+            verify_signatures (bool, optional): reject signed requests with a wrong signature. Defaults to True.
+            seed (int, optional): seed of the market data. Defaults to None.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.latency = latency
+        self.jitter = jitter
+        self.rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.depth_levels = depth_levels
+        self.ping_interval = ping_interval
+        self.verify_signatures = verify_signatures
+        self.rng = random.Random(seed)
+        self.symbols = dict(DEFAULT_SYMBOLS if symbols is None else symbols)
+        self.contracts = dict(DEFAULT_CONTRACTS if contracts is None else contracts)
+        self.balances = {asset: {'free': free, 'locked': '0'} for asset, free in (balances or DEFAULT_BALANCES).items()}
+        self._markets = {}
+        for symbol, (_, _, price, precision, qty_precision) in self.symbols.items():
+            self._markets[symbol] = _Market(price, precision, qty_precision, self.rng)
+        for name, (price, precision) in self.contracts.items():
+            self._markets[name] = _Market(price, precision, 0, self.rng)
+        self.orders = collections.OrderedDict()
+        self._order_ids = itertools.count(1)
+        self.requests = collections.Counter()
+        self.counters = collections.Counter()
+        self.url = None
+        self._runner = None
+        self._loop = None
+        self._thread = None
+
+    # urls to point the clients to
+    @property
+    def api_url(self):
+        return self.url + '/api'
+
+    @property
+    def futures_url(self):
+        return self.url + '/fapi'
+
+    @property
+    def stream_url(self):
+        return self.url.replace('http://', 'ws://', 1) + '/kline-api/ws'
+
+    def configure(self, client):
+        """point a Client or FutureClient to this exchange
+        """
+        from bitrue.future_client import FutureClient
+        client.API_URL = self.futures_url if isinstance(client, FutureClient) else self.api_url
+        client.WEBSITE_URL = self.url
+        return client
+
+    def stats(self):
+        """requests by path and the websocket and signature counters
+        """
+        return {'requests': dict(self.requests), 'counters': dict(self.counters)}
+
+    def _market(self, symbol):
+        market = self._markets.get(symbol)
+        if market is None:
+            # any other symbol trades around 1.0
+            market = self._markets[symbol] = _Market(1.0, 4, 2, self.rng)
+        return market
+
+    def _delay(self):
+        return self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+
+    # server
+    def app(self):
+        app = web.Application(middlewares=[self._middleware])
+        for method, path, handler in self._routes():
+            app.router.add_route(method, path, handler)
+        app.router.add_get('/kline-api/ws', self._websocket)
+        return app
+
+    def _routes(self):
+        return [
+            ('GET', '/api/v1/ping', self._ping),
+            ('GET', '/api/v1/time', self._time),
+            ('GET', '/api/v1/exchangeInfo', self._exchange_info),
+            ('GET', '/api/v1/depth', self._depth),
+            ('GET', '/api/v1/ticker/price', self._ticker_price),
+            ('GET', '/api/v1/ticker/24hr', self._ticker_24hr),
+            ('GET', '/api/v1/ticker/bookTicker', self._book_ticker),
+            ('GET', '/api/v1/trades', self._trades),
+            ('GET', '/api/v1/historicalTrades', self._trades),
+            ('GET', '/api/v1/aggTrades', self._agg_trades),
+            ('GET', '/api/v1/market/kline', self._klines),
+            ('POST', '/api/v1/order', self._spot_signed(self._create_order)),
+            ('GET', '/api/v1/order', self._spot_signed(self._get_order)),
+            ('DELETE', '/api/v1/order', self._spot_signed(self._cancel_order)),
+            ('GET', '/api/v1/openOrders', self._spot_signed(self._open_orders)),
+            ('GET', '/api/v1/allOrders', self._spot_signed(self._all_orders)),
+            ('GET', '/api/v1/account', self._spot_signed(self._account)),
+            ('GET', '/api/v1/myTrades', self._spot_signed(self._my_trades)),
+            ('GET', '/fapi/v1/ping', self._ping),
+            ('GET', '/fapi/v1/time', self._time),
+            ('GET', '/fapi/v1/contracts', self._contracts),
+            ('GET', '/fapi/v1/depth', self._futures_depth),
+            ('GET', '/fapi/v1/ticker', self._futures_ticker),
+            ('GET', '/fapi/v1/index', self._futures_index),
+            ('GET', '/fapi/v1/klines', self._futures_klines),
+            ('POST', '/fapi/v1/order', self._futures_signed(self._create_order)),
+            ('GET', '/fapi/v1/order', self._futures_signed(self._get_order)),
+            ('POST', '/fapi/v1/cancel', self._futures_signed(self._cancel_order)),
+            ('GET', '/fapi/v1/openOrders', self._futures_signed(self._open_orders)),
+            ('GET', '/fapi/v1/allOrders', self._futures_signed(self._all_orders)),
+            ('GET', '/fapi/v1/account', self._futures_signed(self._account)),
+            ('GET', '/fapi/v1/myTrades', self._futures_signed(self._my_trades)),
+        ]
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.requests[request.path] += 1
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return await handler(request)
+
+    async def start(self, host='127.0.0.1', port=0):
+        """serve on the running event loop, port 0 picks a free port
+        """
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = 'http://%s:%d' % (host, port)
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host='127.0.0.1', port=0):
+        """serve from an event loop in a daemon thread, for the blocking clients
+        """
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start(host, port))
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop_thread(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    # helpers
+    @staticmethod
+    def _error(code, msg, status=400):
+        return web.json_response({'code': code, 'msg': msg}, status=status)
+
+    def _signature(self, payload):
+        return hmac.new(self.api_secret.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _spot_signed(self, handler):
+        async def signed(request):
+            if request.headers.get('X-MBX-APIKEY') != self.api_key:
+                return self._error(-2015, 'Invalid API-key, IP, or permissions for action.', 401)
+            body = (await request.read()).decode('utf-8')
+            # the signature is the last parameter of the query string or form body
+            payload, _, signature = (body or request.rel_url.raw_query_string).rpartition('&signature=')
+            if self.verify_signatures and not hmac.compare_digest(signature, self._signature(payload)):
+                self.counters['signature_failures'] += 1
+                return self._error(-1022, 'Signature for this request is not valid.')
+            params = dict(request.query)
+            params.update(parse_qsl(body))
+            return await handler(params)
+        return signed
+
+    def _futures_signed(self, handler):
+        async def signed(request):
+            if request.headers.get('X-CH-APIKEY') != self.api_key:
+                return self._error(-2015, 'Invalid API-key, IP, or permissions for action.', 401)
+            body = (await request.read()).decode('utf-8')
+            path = request.rel_url.raw_path
+            if request.rel_url.raw_query_string:
+                path = '%s?%s' % (path, request.rel_url.raw_query_string)
+            payload = '%s%s%s%s' % (request.headers.get('X-CH-TS', ''), request.method, path, body)
+            if self.verify_signatures and not hmac.compare_digest(request.headers.get('X-CH-SIGN', ''), self._signature(payload)):
+                self.counters['signature_failures'] += 1
+                return self._error(-1022, 'Signature for this request is not valid.')
+            params = dict(request.query)
+            if body:
+                params.update(json.loads(body))
+            return await handler(params)
+        return signed
+
+    # public spot endpoints
+    async def _ping(self, request):
+        return web.json_response({})
+
+    async def _time(self, request):
+        return web.json_response({'serverTime': _now_ms()})
+
+    async def _exchange_info(self, request):
+        symbols = []
+        for symbol, (base, quote, _, precision, qty_precision) in self.symbols.items():
+            symbols.append({
+                'symbol': symbol,
+                'status': 'TRADING',
+                'baseAsset': base.lower(),
+                'baseAssetPrecision': qty_precision,
+                'quoteAsset': quote.lower(),
+                'quotePrecision': precision,
+                'orderTypes': ['MARKET', 'LIMIT'],
+                'icebergAllowed': False,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': '%.*f' % (precision, 10 ** -precision), 'maxPrice': '1000000',
+                     'tickSize': '%.*f' % (precision, 10 ** -precision)},
+                    {'filterType': 'LOT_SIZE', 'minQty': '%.*f' % (qty_precision, 10 ** -qty_precision), 'maxQty': '1000000',
+                     'stepSize': '%.*f' % (qty_precision, 10 ** -qty_precision)},
+                    {'filterType': 'MIN_NOTIONAL', 'minNotional': '1'},
+                ],
+            })
+        return web.json_response({'timezone': 'UTC', 'serverTime': _now_ms(), 'rateLimits': [], 'exchangeFilters': [],
+                                  'symbols': symbols})
+
+    async def _depth(self, request):
+        market = self._market(request.query.get('symbol', ''))
+        bids, asks = market.book(min(int(request.query.get('limit', 100)), 1000))
+        return web.json_response({'lastUpdateId': next(market.update_ids),
+                                  'bids': [[price, '%s' % qty] for price, qty in bids],
+                                  'asks': [[price, '%s' % qty] for price, qty in asks]})
+
+    def _symbols_of(self, request):
+        symbol = request.query.get('symbol')
+        return [symbol] if symbol else list(self.symbols)
+
+    def _one_or_all(self, request, items):
+        return web.json_response(items[0] if request.query.get('symbol') else items)
+
+    async def _ticker_price(self, request):
+        return self._one_or_all(request, [{'symbol': s, 'price': self._market(s).fmt(self._market(s).step())}
+                                          for s in self._symbols_of(request)])
+
+    async def _ticker_24hr(self, request):
+        tickers = []
+        for symbol in self._symbols_of(request):
+            market = self._market(symbol)
+            last = market.step()
+            tickers.append({
+                'symbol': symbol,
+                'priceChange': market.fmt(last - market.open),
+                'priceChangePercent': '%.2f' % ((last / market.open - 1) * 100),
+                'lastPrice': market.fmt(last),
+                'bidPrice': market.fmt(last - market.tick),
+                'askPrice': market.fmt(last + market.tick),
+                'openPrice': market.fmt(market.open),
+                'highPrice': market.fmt(market.high),
+                'lowPrice': market.fmt(market.low),
+                'volume': '%.4f' % market.volume,
+                'openTime': _now_ms() - 86400000,
+                'closeTime': _now_ms(),
+            })
+        return self._one_or_all(request, tickers)
+
+    async def _book_ticker(self, request):
+        tickers = []
+        for symbol in self._symbols_of(request):
+            market = self._market(symbol)
+            (bid, bid_qty), (ask, ask_qty) = [side[0] for side in market.book(1)]
+            tickers.append({'symbol': symbol, 'bidPrice': bid, 'bidQty': '%s' % bid_qty,
+                            'askPrice': ask, 'askQty': '%s' % ask_qty})
+        return self._one_or_all(request, tickers)
+
+    async def _trades(self, request):
+        market = self._market(request.query.get('symbol', ''))
+        trades = []
+        for _ in range(min(int(request.query.get('limit', 100)), 1000)):
+            trade_id, price, qty, buyer_maker = market.trade()
+            trades.append({'id': trade_id, 'price': market.fmt(price), 'qty': '%s' % qty, 'time': _now_ms(),
+                           'isBuyerMaker': buyer_maker, 'isBestMatch': True})
+        return web.json_response(trades)
+
+    async def _agg_trades(self, request):
+        market = self._market(request.query.get('symbol', ''))
+        trades = []
+        for _ in range(min(int(request.query.get('limit', 100)), 1000)):
+            trade_id, price, qty, buyer_maker = market.trade()
+            trades.append({'a': trade_id, 'p': market.fmt(price), 'q': '%s' % qty, 'f': trade_id, 'l': trade_id,
+                           'T': _now_ms(), 'm': buyer_maker, 'M': True})
+        return web.json_response(trades)
+
+    def _candles(self, market, interval, start_ms, end_ms, limit):
+        interval_ms = _interval_seconds(interval) * 1000
+        end_ms = end_ms or _now_ms()
+        start_ms = start_ms or end_ms - interval_ms * limit
+        open_ms = start_ms - start_ms % interval_ms
+        candles = []
+        while open_ms <= end_ms and len(candles) < limit:
+            open_price = market.price
+            prices = [market.step() for _ in range(4)]
+            candles.append((open_ms, open_price, max(prices + [open_price]), min(prices + [open_price]), prices[-1],
+                            market.qty(), interval_ms))
+            open_ms += interval_ms
+        return candles
+
+    async def _klines(self, request):
+        # bars from the open time fromIdx in seconds, the latest ones without it
+        query = request.query
+        symbol = query.get('symbol', '')
+        market = self._market(symbol)
+        candles = self._candles(market, query.get('scale'), int(query.get('fromIdx', 0)) * 1000, 0,
+                                min(int(query.get('limit', 100)), 1440))
+        return web.json_response({'symbol': symbol, 'scale': query.get('scale'), 'data': [
+            {'i': open_ms // 1000, 'a': '%.4f' % (vol * c), 'v': '%s' % vol, 'c': market.fmt(c), 'h': market.fmt(h),
+             'l': market.fmt(l), 'o': market.fmt(o)} for open_ms, o, h, l, c, vol, _ in candles]})
+
+    # public futures endpoints
+    async def _contracts(self, request):
+        return web.json_response([{'symbol': name, 'pricePrecision': precision, 'side': 1, 'maxMarketVolume': 100000,
+                                   'multiplier': 0.01, 'minOrderVolume': 1, 'maxMarketMoney': 10000000, 'type': 'E',
+                                   'maxLimitVolume': 100000, 'maxValidOrder': 20, 'multiplierCoin': name.split('-')[1],
+                                   'minOrderMoney': 1, 'maxLimitMoney': 10000000, 'status': 1}
+                                  for name, (_, precision) in self.contracts.items()])
+
+    async def _futures_depth(self, request):
+        market = self._market(request.query.get('contractName', ''))
+        bids, asks = market.book(min(int(request.query.get('limit', 100)), 100))
+        return web.json_response({'time': _now_ms(), 'bids': [[float(p), q] for p, q in bids],
+                                  'asks': [[float(p), q] for p, q in asks]})
+
+    async def _futures_ticker(self, request):
+        market = self._market(request.query.get('contractName', ''))
+        last = market.step()
+        return web.json_response({'high': market.high, 'vol': market.volume, 'last': last, 'low': market.low,
+                                  'buy': last - market.tick, 'sell': last + market.tick,
+                                  'rose': last / market.open - 1, 'time': _now_ms()})
+
+    async def _futures_index(self, request):
+        market = self._market(request.query.get('contractName', ''))
+        return web.json_response({'currentFundRate': 0.0001, 'time': _now_ms(), 'indexPrice': market.price,
+                                  'tagPrice': market.price, 'nextFundRate': 0.0001})
+
+    async def _futures_klines(self, request):
+        query = request.query
+        market = self._market(query.get('contractName', ''))
+        candles = self._candles(market, query.get('interval'), 0, 0, min(int(query.get('limit', 100)), 300))
+        return web.json_response([{'idx': open_ms, 'open': o, 'high': h, 'low': l, 'close': c, 'vol': vol}
+                                  for open_ms, o, h, l, c, vol, _ in candles])
+
+    # signed endpoints, the same for spot and futures
+    async def _create_order(self, params):
+        symbol = params.get('symbol') or params.get('contractName')
+        order_type = params.get('type', 'LIMIT')
+        order = {
+            'symbol': symbol,
+            'orderId': next(self._order_ids),
+            'clientOrderId': params.get('newClientOrderId') or params.get('clientOrderId') or '',
+            'transactTime': _now_ms(),
+            'price': params.get('price', '0'),
+            'origQty': params.get('quantity') or params.get('volume', '0'),
+            'executedQty': '0',
+            'status': 'FILLED' if order_type == 'MARKET' else 'NEW',
+            'timeInForce': params.get('timeInForce', 'GTC'),
+            'type': order_type,
+            'side': params.get('side', 'BUY'),
+        }
+        if order_type == 'MARKET':
+            order['executedQty'] = order['origQty']
+        self.orders[order['orderId']] = order
+        return web.json_response(order)
+
+    def _find_order(self, params):
+        order_id = params.get('orderId')
+        if order_id is not None:
+            return self.orders.get(int(order_id))
+        client_id = params.get('origClientOrderId') or params.get('clientOrderId')
+        for order in self.orders.values():
+            if client_id and order['clientOrderId'] == client_id:
+                return order
+        return None
+
+    async def _get_order(self, params):
+        order = self._find_order(params)
+        if order is None:
+            return self._error(-2013, 'Order does not exist.')
+        return web.json_response(order)
+
+    async def _cancel_order(self, params):
+        order = self._find_order(params)
+        if order is None or order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+            return self._error(-2011, 'Unknown order sent.')
+        order['status'] = 'CANCELED'
+        return web.json_response(order)
+
+    def _orders_of(self, params):
+        symbol = params.get('symbol') or params.get('contractName')
+        return [order for order in self.orders.values() if not symbol or order['symbol'] == symbol]
+
+    async def _open_orders(self, params):
+        return web.json_response([order for order in self._orders_of(params) if order['status'] in ('NEW', 'PARTIALLY_FILLED')])
+
+    async def _all_orders(self, params):
+        from_id = int(params.get('orderId', 0))
+        orders = [order for order in self._orders_of(params) if order['orderId'] >= from_id]
+        return web.json_response(orders[:int(params.get('limit', 500))])
+
+    async def _account(self, params):
+        return web.json_response({'makerCommission': 0, 'takerCommission': 0, 'canTrade': True, 'canWithdraw': True,
+                                  'canDeposit': True, 'updateTime': _now_ms(),
+                                  'balances': [{'asset': asset.lower(), 'free': bal['free'], 'locked': bal['locked']}
+                                               for asset, bal in self.balances.items()]})
+
+    async def _my_trades(self, params):
+        return web.json_response([])
+
+    # websocket
+    async def _websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.counters['ws_connections'] += 1
+        outbox = asyncio.Queue()
+        tasks = {}
+        sender = asyncio.ensure_future(self._send_loop(ws, outbox))
+        pinger = asyncio.ensure_future(self._ping_loop(outbox))
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    data = msg.data
+                elif msg.type == WSMsgType.BINARY:
+                    data = gzip.decompress(msg.data).decode('utf-8')
+                else:
+                    break
+                self._on_ws_message(data, outbox, tasks)
+        finally:
+            for task in list(tasks.values()) + [sender, pinger]:
+                task.cancel()
+        return ws
+
+    def _on_ws_message(self, data, outbox, tasks):
+        try:
+            msg = json.loads(data)
+        except ValueError:
+            self.counters['ws_malformed'] += 1
+            return
+        if 'pong' in msg:
+            self.counters['ws_pongs'] += 1
+            return
+        params = msg.get('params') or {}
+        channel = params.get('channel', '')
+        event = msg.get('event')
+        match = CHANNEL_RE.match(channel)
+        if event == 'sub' and match:
+            if channel not in tasks:
+                tasks[channel] = asyncio.ensure_future(self._publish(channel, match.group(1), match.group(2), outbox))
+            reply = {'event_rep': 'subed', 'channel': channel, 'cb_id': params.get('cb_id'), 'ts': _now_ms(), 'status': 'ok'}
+        elif event == 'unsub' and channel in tasks:
+            tasks.pop(channel).cancel()
+            reply = {'event_rep': 'unsubed', 'channel': channel, 'cb_id': params.get('cb_id'), 'ts': _now_ms(), 'status': 'ok'}
+        else:
+            reply = {'event_rep': event, 'channel': channel, 'cb_id': params.get('cb_id'), 'ts': _now_ms(), 'status': 'error'}
+        self._enqueue(outbox, reply)
+
+    def _enqueue(self, outbox, msg):
+        outbox.put_nowait((time.monotonic() + self._delay(), msg))
+
+    async def _send_loop(self, ws, outbox):
+        while True:
+            due, msg = await outbox.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await ws.send_bytes(gzip.compress(json.dumps(msg).encode('utf-8'), compresslevel=1))
+            except ConnectionError:
+                return
+            self.counters['ws_messages'] += 1
+
+    async def _ping_loop(self, outbox):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            self._enqueue(outbox, {'ping': _now_ms()})
+
+    async def _publish(self, channel, symbol, kind, outbox):
+        market = self._market(symbol.upper())
+        rate_key = kind.split('_')[0] if not kind.startswith('trade') else 'trade'
+        loop = asyncio.get_event_loop()
+        next_at = loop.time()
+        while True:
+            rate = self.rates.get(rate_key) or 1
+            self._enqueue(outbox, {'channel': channel, 'ts': _now_ms(), 'tick': self._tick(market, kind)})
+            # keep the rate even when a message took longer than its interval
+            next_at += 1.0 / rate
+            wait = next_at - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            elif wait < -1:
+                next_at = loop.time()
+            else:
+                await asyncio.sleep(0)
+
+    def _tick(self, market, kind):
+        if kind.startswith('depth'):
+            bids, asks = market.book(self.depth_levels)
+            return {'buys': [list(bid) for bid in bids], 'asks': [list(ask) for ask in asks]}
+        if kind == 'ticker':
+            last = market.step()
+            return {'amount': market.volume * last, 'rose': last / market.open - 1, 'close': last, 'high': market.high,
+                    'vol': market.volume, 'low': market.low, 'open': market.open}
+        if kind == 'trade_ticker':
+            trade_id, price, qty, buyer_maker = market.trade()
+            ts = _now_ms()
+            return {'data': [{'id': trade_id, 'side': 'SELL' if buyer_maker else 'BUY', 'price': price, 'vol': qty,
+                              'amount': price * qty, 'ts': ts,
+                              'ds': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts / 1000))}], 'ts': ts}
+        # kline_<interval>
+        interval = _interval_seconds(kind[len('kline_'):])
+        open_price = market.price
+        close = market.step()
+        return {'id': int(time.time()) // interval * interval, 'open': open_price, 'close': close,
+                'high': max(open_price, close), 'low': min(open_price, close), 'vol': market.qty(),
+                'amount': close * market.volume}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local mock of the Bitrue REST and websocket API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--api-key', default='key')
+    parser.add_argument('--api-secret', default='secret')
+    parser.add_argument('--latency', type=float, default=0, help='seconds every response and message is delayed')
+    parser.add_argument('--jitter', type=float, default=0, help='up to that many more seconds of random delay')
+    parser.add_argument('--depth-rate', type=float, default=DEFAULT_RATES['depth'], help='depth messages per second')
+    parser.add_argument('--ticker-rate', type=float, default=DEFAULT_RATES['ticker'], help='ticker messages per second')
+    parser.add_argument('--trade-rate', type=float, default=DEFAULT_RATES['trade'], help='trade messages per second')
+    parser.add_argument('--kline-rate', type=float, default=DEFAULT_RATES['kline'], help='kline messages per second')
+    parser.add_argument('--depth-levels', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    exchange = MockExchange(args.api_key, args.api_secret, latency=args.latency, jitter=args.jitter,
+                            rates={'depth': args.depth_rate, 'ticker': args.ticker_rate,
+                                   'trade': args.trade_rate, 'kline': args.kline_rate},
+                            depth_levels=args.depth_levels, seed=args.seed)
+    web.run_app(exchange.app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
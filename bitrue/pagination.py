@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PageSpec(object):
+    """how to walk one paginated endpoint
+
+    Args:
+        id_key (string): record field holding the increasing id
+        id_param (string): request param to start a page from an id
+        time_key (string): record field holding the record time in milliseconds
+    """
+
+    def __init__(self, id_key, id_param, time_key):
+        self.id_key = id_key
+        self.id_param = id_param
+        self.time_key = time_key
+
+
+HISTORICAL_TRADES = PageSpec('id', 'fromId', 'time')
+AGGREGATE_TRADES = PageSpec('a', 'fromId', 'T')
+ALL_ORDERS = PageSpec('orderId', 'orderId', 'time')
+MY_TRADES = PageSpec('id', 'fromId', 'time')
+
+
+def iterate_pages(fetch, spec, params, limit, end_time=None, prefetch=True):
+    """yield the records of a paginated endpoint one by one
+
+    The first page is requested with ``params`` as given, e.g. a startTime or a fromId.
+    Every following page starts from the id after the last record, and is requested in
+    a background thread while the current page is consumed. Records repeated across a
+    page boundary are skipped, and only one page is held in memory at a time.
+
+    Args:
+        fetch (function): client method returning one page, a list sorted by id
+        spec (PageSpec): record and param names of the endpoint
+        params (dict): params of the first request
+        limit (int): page size, the walk stops at the first shorter page
+        end_time (int, optional): stop at the first record after this time in milliseconds. Defaults to None.
+        prefetch (bool, optional): request the next page while the current one is consumed. Defaults to True.
+    """
+    params = dict(params)
+    params['limit'] = limit
+    if end_time is not None:
+        params['endTime'] = end_time
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    pending = None
+    last_id = None
+    try:
+        page = fetch(**params)
+        while page:
+            next_params = None
+            if len(page) >= limit:
+                next_params = {k: v for k, v in params.items() if k not in ('startTime', 'endTime')}
+                next_params[spec.id_param] = page[-1][spec.id_key] + 1
+                if executor is not None:
+                    pending = executor.submit(fetch, **next_params)
+
+            for record in page:
+                if last_id is not None and record[spec.id_key] <= last_id:
+                    continue
+                if end_time is not None and record[spec.time_key] > end_time:
+                    return
+                last_id = record[spec.id_key]
+                yield record
+
+            if next_params is None:
+                return
+            if pending is not None:
+                page, pending = pending.result(), None
+            else:
+                page = fetch(**next_params)
+    finally:
+        if pending is not None:
+            pending.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
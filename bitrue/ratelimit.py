@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+import threading
+import time
+
+from bitrue.exceptions import BitrueRateLimitException
+
+
+# priority lanes, lower value is served first
+PRIORITY_CANCEL = 0
+PRIORITY_ORDER = 1
+PRIORITY_ACCOUNT = 2
+PRIORITY_MARKET = 3
+
+
+def _weight_without_symbol(weight):
+    def calc(params):
+        return 1 if params and params.get('symbol') else weight
+    return calc
+
+
+def _depth_weight(params):
+    limit = int(params.get('limit') or 100) if params else 100
+    if limit <= 100:
+        return 1
+    if limit <= 500:
+        return 5
+    if limit <= 1000:
+        return 10
+    return 50
+
+
+# request weight of the spot endpoints, a callable gets the request params
+SPOT_WEIGHTS = {
+    'exchangeInfo': 1,
+    'ticker/24hr': _weight_without_symbol(40),
+    'ticker/price': _weight_without_symbol(2),
+    'ticker/bookTicker': _weight_without_symbol(2),
+    'depth': _depth_weight,
+    'historicalTrades': 5,
+    'allOrders': 5,
+    'openOrders': _weight_without_symbol(40),
+    'account': 5,
+    'myTrades': 5,
+}
+
+# the futures weights are not published, every endpoint of a limiter built with these weighs 1
+FUTURE_WEIGHTS = {}
+
+
+class TokenBucket(object):
+    """``capacity`` tokens refilled continuously over ``interval`` seconds.
+    """
+
+    def __init__(self, capacity, interval):
+        self.capacity = capacity
+        self.interval = interval
+        self.rate = float(capacity) / interval
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount, now):
+        """seconds until ``amount`` tokens are available, 0 if they are available now
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self, now):
+        self.tokens = 0
+        self.updated = now
+
+
+class RateLimiter(object):
+    """Request weight aware limiter in front of the REST endpoints.
+
+    Two token buckets are kept: one for the request weight of every call and one for
+    new orders. Waiting callers are served by priority lane (cancels, then orders, then
+    signed reads, then market data) and in arrival order within a lane. In blocking mode
+    ``acquire`` sleeps until the request can be sent, otherwise it raises
+    :class:`BitrueRateLimitException`.
+    """
+
+    DEFAULT_REQUEST_WEIGHT = 1200  # per minute
+    DEFAULT_ORDERS = 10  # per second
+
+    def __init__(self, request_weight=DEFAULT_REQUEST_WEIGHT, request_interval=60, orders=DEFAULT_ORDERS, order_interval=1,
+                 weights=None, blocking=True):
+        """initialize the RateLimiter
+
+        Args:
+            request_weight (int, optional): request weight allowed per request_interval. Defaults to DEFAULT_REQUEST_WEIGHT.
+            request_interval (int, optional): seconds. Defaults to 60.
+            orders (int, optional): new orders allowed per order_interval. Defaults to DEFAULT_ORDERS.
+            order_interval (int, optional): seconds. Defaults to 1.
+            weights (dict, optional): endpoint path to weight or callable(params). Defaults to SPOT_WEIGHTS.
+            blocking (bool, optional): wait for capacity instead of raising. Defaults to True.
+        """
+        self.request_bucket = TokenBucket(request_weight, request_interval)
+        self.order_bucket = TokenBucket(orders, order_interval)
+        self.weights = SPOT_WEIGHTS if weights is None else weights
+        self.blocking = blocking
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._paused_until = 0
+
+    def weight(self, path, params=None):
+        weight = self.weights.get(path, 1)
+        return weight(params) if callable(weight) else weight
+
+    @staticmethod
+    def priority(method, path, signed):
+        if method == 'delete' or path == 'cancel':
+            return PRIORITY_CANCEL
+        if method == 'post' and path == 'order':
+            return PRIORITY_ORDER
+        if signed:
+            return PRIORITY_ACCOUNT
+        return PRIORITY_MARKET
+
+    def _wait_time(self, weight, order, now):
+        wait = max(self._paused_until - now, self.request_bucket.wait_time(weight, now))
+        if order:
+            wait = max(wait, self.order_bucket.wait_time(1, now))
+        return wait
+
+    def acquire(self, weight=1, order=False, priority=PRIORITY_MARKET, blocking=None, timeout=None):
+        """take ``weight`` request tokens, and an order token when ``order`` is set
+
+        Args:
+            weight (int, optional): request weight. Defaults to 1.
+            order (bool, optional): the request places a new order. Defaults to False.
+            priority (int, optional): priority lane. Defaults to PRIORITY_MARKET.
+            blocking (bool, optional): overrides the limiter blocking mode. Defaults to None.
+            timeout (float, optional): maximum seconds to wait in blocking mode. Defaults to None.
+
+        Returns:
+            float: seconds spent waiting
+        """
+        blocking = self.blocking if blocking is None else blocking
+        start = time.monotonic()
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiters[0] == ticket:
+                        wait = self._wait_time(weight, order, now)
+                        if wait <= 0:
+                            self.request_bucket.take(weight)
+                            if order:
+                                self.order_bucket.take(1)
+                            return now - start
+                    else:
+                        # queued behind a request with a higher priority or an earlier arrival
+                        wait = None
+                    if not blocking:
+                        raise BitrueRateLimitException(wait or 0)
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            raise BitrueRateLimitException(wait or 0)
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def acquire_request(self, method, path, params=None, signed=False, blocking=None):
+        """acquire the capacity a REST call needs, ``blocking`` overrides the limiter blocking mode
+        """
+        return self.acquire(self.weight(path, params), order=(method == 'post' and path == 'order'),
+                            priority=self.priority(method, path, signed), blocking=blocking)
+
+    def pause(self, seconds):
+        """stop sending requests for ``seconds``, used when the exchange answers 429 or 418
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self.request_bucket.drain(now)
+            self._cond.notify_all()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import logging
+import threading
+import time
+
+from bitrue.book import Side, to_ints, fmt_dec
+
+
+ReconcileResult = collections.namedtuple('ReconcileResult', 'missing extra resized')
+ReconcileResult.__doc__ = """order ids added to, removed from and resized in the TrackBook by one reconciliation"""
+
+_SIDES = {'BUY': Side.BID, 'SELL': Side.ASK}
+
+
+class OrderReconciler(object):
+    """Keep a TrackBook in line with the open orders of the exchange.
+
+    Each run fetches the open orders of the symbol and only applies the differences: orders
+    missing from the book are entered, orders the exchange no longer has are removed and
+    orders whose remaining volume differs are resized. Orders entered while a run was in
+    flight are left alone.
+    """
+
+    def __init__(self, client, track_book, fetch=None):
+        """initialize the OrderReconciler
+
+        Args:
+            client (Client): client the open orders are fetched with
+            track_book (TrackBook): book of our resting orders of one symbol
+            fetch (function, optional): returns the open orders, spot get_open_orders fields. Defaults to client.get_open_orders of the book symbol.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.book = track_book
+        self._fetch = fetch or (lambda: client.get_open_orders(symbol=track_book.get_symbol()))
+        self.runs = 0
+        self.failures = 0
+        self.drift = collections.Counter()
+        self.last_result = None
+        self.last_duration = None
+        self._stop = None
+        self._thread = None
+
+    def reconcile(self):
+        """fetch the open orders once and apply the differences
+
+        Returns:
+            ReconcileResult
+        """
+        start = time.perf_counter()
+        book = self.book
+        # orders entered after this point may not be in the response yet
+        known = set(book.orders.keys())
+        orders = self._fetch()
+
+        prices = to_ints([o['price'] for o in orders], book.quote_prec)
+        remaining = [orig - executed for orig, executed in
+                     zip(to_ints([o['origQty'] for o in orders], book.vol_prec),
+                         to_ints([o.get('executedQty') or '0' for o in orders], book.vol_prec))]
+
+        missing, resized = [], []
+        open_ids = set()
+        with book.lock:
+            for order, price, volume in zip(orders, prices, remaining):
+                order_id = order['orderId']
+                open_ids.add(order_id)
+                entry = book.orders.get(order_id)
+                if entry is None:
+                    book.entry(order_id, _SIDES[order['side']], fmt_dec(price, book.quote_prec),
+                               fmt_dec(volume, book.vol_prec), order.get('status'))
+                    missing.append(order_id)
+                elif entry.price_level.get_price() != price:
+                    book.remove(order_id)
+                    book.entry(order_id, _SIDES[order['side']], fmt_dec(price, book.quote_prec),
+                               fmt_dec(volume, book.vol_prec), order.get('status'))
+                    resized.append(order_id)
+                elif entry.volume != volume:
+                    book.new_size(order_id, _SIDES[order['side']], fmt_dec(price, book.quote_prec), fmt_dec(volume, book.vol_prec),
+                                  order.get('status'))
+                    resized.append(order_id)
+            extra = [order_id for order_id in known if order_id not in open_ids and order_id in book.orders]
+            for order_id in extra:
+                book.remove(order_id)
+
+        result = ReconcileResult(missing, extra, resized)
+        self.runs += 1
+        self.drift['missing'] += len(missing)
+        self.drift['extra'] += len(extra)
+        self.drift['resized'] += len(resized)
+        self.last_result = result
+        self.last_duration = time.perf_counter() - start
+        if missing or extra or resized:
+            self.logger.warning("%s drift: %d missing, %d extra, %d resized", book.get_symbol(),
+                                len(missing), len(extra), len(resized))
+        return result
+
+    def stats(self):
+        """runs, failures, total drift by kind and the last run
+        """
+        last = self.last_result
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'drift': dict(self.drift),
+            'last_drift': len(last.missing) + len(last.extra) + len(last.resized) if last else 0,
+            'last_duration': self.last_duration,
+        }
+
+    def start(self, interval):
+        """reconcile every ``interval`` seconds in a background thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(interval, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        self._thread = None
+
+    def _run(self, interval, stop):
+        while not stop.wait(interval):
+            try:
+                self.reconcile()
+            except Exception:
+                self.failures += 1
+                self.logger.exception("open order reconciliation failed")
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from bitrue.exceptions import BitrueAPIException
+
+
+# only these methods are retried or hedged, sending them twice has no side effect
+IDEMPOTENT_METHODS = ('get',)
+
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class RequestPolicy(object):
+    """Timeout, retry and hedging settings of an endpoint.
+
+    Args:
+        timeout (float, optional): seconds to wait for a response. Defaults to 10.
+        retries (int, optional): extra attempts after a connection error, a timeout or a 5xx reply. Defaults to 0.
+        backoff (float, optional): seconds before the first retry, doubled for each retry. Defaults to 0.05.
+        backoff_max (float, optional): upper bound of the backoff. Defaults to 1.
+        jitter (bool, optional): sleep a random time between 0 and the backoff. Defaults to True.
+        hedge (bool, optional): send a second request when the first one is slow, first answer wins. Defaults to False.
+        hedge_delay (float, optional): seconds before hedging, None uses the hedge_quantile latency. Defaults to None.
+        hedge_quantile (float, optional): latency quantile used as the hedge delay. Defaults to 0.95.
+    """
+
+    def __init__(self, timeout=10, retries=0, backoff=0.05, backoff_max=1.0, jitter=True, retry_status_codes=RETRY_STATUS_CODES,
+                 hedge=False, hedge_delay=None, hedge_quantile=0.95):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_status_codes = retry_status_codes
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.hedge_quantile = hedge_quantile
+
+    def backoff_delay(self, retry):
+        delay = min(self.backoff_max, self.backoff * (2 ** (retry - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def should_retry(self, ex):
+        if isinstance(ex, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        return isinstance(ex, BitrueAPIException) and ex.status_code in self.retry_status_codes
+
+
+class RetryStats(object):
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        # hedges not sent because on_hedge refused them, e.g. no rate limiter capacity
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+        self.failures = 0
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class RequestRetrier(object):
+    """Runs request attempts according to the endpoint policies and counts retries and hedges.
+    """
+
+    # latencies kept per endpoint to compute the hedge delay, and the minimum before hedging
+    LATENCY_WINDOW = 256
+    MIN_LATENCY_SAMPLES = 20
+
+    def __init__(self, policy=None, max_workers=16):
+        self.policy = policy or RequestPolicy()
+        self.policies = {}
+        self._max_workers = max_workers
+        self._executor = None
+        self._stats = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def set_policy(self, endpoint, policy):
+        self.policies[endpoint] = policy
+
+    def get_policy(self, endpoint):
+        return self.policies.get(endpoint, self.policy)
+
+    def _get_stats(self, endpoint):
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats.setdefault(endpoint, RetryStats())
+        return stats
+
+    def stats(self):
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in self._stats.items()}
+
+    def latency_quantile(self, endpoint, q):
+        """latency quantile of the recent successful attempts, None with too few samples
+        """
+        samples = self._latencies.get(endpoint)
+        if not samples or len(samples) < self.MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _timed(self, endpoint, attempt):
+        start = time.perf_counter()
+        res = attempt()
+        elapsed = time.perf_counter() - start
+        samples = self._latencies.get(endpoint)
+        if samples is None:
+            samples = self._latencies.setdefault(endpoint, deque(maxlen=self.LATENCY_WINDOW))
+        samples.append(elapsed)
+        return res
+
+    def call(self, endpoint, policy, attempt, on_retry=None, on_hedge=None):
+        """run ``attempt()`` until it succeeds or the policy gives up
+
+        Args:
+            endpoint (string): endpoint path, the key of the stats
+            policy (RequestPolicy): policy of the endpoint
+            attempt (function): sends the request once and returns the decoded response
+            on_retry (function, optional): called with the retry number before each retry. Defaults to None.
+            on_hedge (function, optional): called before a hedge is sent, the hedge is skipped when it returns False. Defaults to None.
+        """
+        with self._lock:
+            stats = self._get_stats(endpoint)
+            stats.requests += 1
+        retry = 0
+        while True:
+            try:
+                if policy.hedge:
+                    return self._hedged(endpoint, policy, attempt, stats, on_hedge)
+                return self._timed(endpoint, attempt)
+            except Exception as ex:
+                if retry >= policy.retries or not policy.should_retry(ex):
+                    with self._lock:
+                        stats.failures += 1
+                    raise
+            retry += 1
+            with self._lock:
+                stats.retries += 1
+            time.sleep(policy.backoff_delay(retry))
+            if on_retry is not None:
+                on_retry(retry)
+
+    def _hedged(self, endpoint, policy, attempt, stats, on_hedge=None):
+        delay = policy.hedge_delay
+        if delay is None:
+            delay = self.latency_quantile(endpoint, policy.hedge_quantile)
+            if delay is None:
+                # not enough samples yet to know what slow means
+                return self._timed(endpoint, attempt)
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        primary = self._executor.submit(self._timed, endpoint, attempt)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if on_hedge is not None and not on_hedge():
+            with self._lock:
+                stats.hedges_skipped += 1
+            return primary.result()
+        with self._lock:
+            stats.hedges += 1
+        hedge = self._executor.submit(self._timed, endpoint, attempt)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    res = future.result()
+                except Exception as ex:
+                    error = ex
+                    continue
+                if future is hedge:
+                    with self._lock:
+                        stats.hedge_wins += 1
+                return res
+        raise error
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import hmac
+
+
+def encode_params(params):
+    """build a query string from a dict or a list of (key, value) pairs, skipping None values
+    """
+    if isinstance(params, dict):
+        params = params.items()
+    return '&'.join(['%s=%s' % (k, v) for k, v in params if v is not None])
+
+
+class HmacSigner(object):
+    """HMAC-SHA256 signer keyed once with the api secret.
+
+    The keyed HMAC state is kept and copied for every request, so the secret is not
+    re-encoded and the key is not re-hashed on the hot path.
+    """
+
+    def __init__(self, secret):
+        self.secret = secret
+        self._hmac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def sign(self, payload):
+        """hex signature of a str payload
+        """
+        m = self._hmac.copy()
+        m.update(payload.encode('utf-8'))
+        return m.hexdigest()
+
+    def sign_params(self, params):
+        """spot scheme, the signature of the query string
+        """
+        return self.sign(encode_params(params))
+
+    def sign_request(self, ts, method, path, query=None, body=None):
+        """futures scheme, the signature of timestamp + METHOD + path[?query] + body
+
+        Args:
+            ts (int): request timestamp in milliseconds
+            method (string): http method
+            path (string): request path, may already contain a query
+            query (string, optional): query string. Defaults to None.
+            body (string, optional): json body. Defaults to None.
+        """
+        if query:
+            path = '%s%s%s' % (path, '&' if '?' in path else '?', query)
+        return self.sign('%d%s%s%s' % (ts, method.upper(), path, body or ''))
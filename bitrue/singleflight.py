@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+def request_key(method, uri, kwargs):
+    """key of a request, identical reads have the same key
+    """
+    data = kwargs.get('data') or kwargs.get('params')
+    if isinstance(data, dict):
+        data = tuple(sorted((k, repr(v)) for k, v in data.items()))
+    return (method, uri, data, kwargs.get('decoder'))
+
+
+class SingleFlight(object):
+    """Coalesce concurrent identical requests into one.
+
+    The first caller of a key runs the request, callers arriving while it is in flight wait
+    for it and get the same decoded result, or the same exception. With ``cache_ttl`` a
+    result is also kept for that many seconds. Shared results must not be modified.
+    """
+
+    # cached results kept before expired ones are purged
+    MAX_CACHE_SIZE = 1024
+
+    def __init__(self, cache_ttl=0):
+        """initialize the SingleFlight
+
+        Args:
+            cache_ttl (float, optional): seconds a result is reused after its request finished. Defaults to 0.
+        """
+        self.cache_ttl = cache_ttl
+        self._calls = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def do(self, key, func):
+        """return ``func()``, shared with the concurrent callers of the same key
+        """
+        with self._lock:
+            if self.cache_ttl:
+                cached = self._cache.get(key)
+                if cached is not None and cached[0] > time.monotonic():
+                    self.cache_hits += 1
+                    return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.requests += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as ex:
+            call.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if self.cache_ttl and call.exception is None:
+                    self._store(key, call.result)
+            call.event.set()
+        return call.result
+
+    def _store(self, key, result):
+        now = time.monotonic()
+        if len(self._cache) >= self.MAX_CACHE_SIZE:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+        self._cache[key] = (now + self.cache_ttl, result)
+
+    def clear(self):
+        with self._lock:
+            self._cache = {}
+
+    def stats(self):
+        return {'requests': self.requests, 'coalesced': self.coalesced, 'cache_hits': self.cache_hits}
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+import array
+import asyncio
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+DEFAULT_SIZE = 1000
+
+# side column of TradeBuffer
+BUY = 1
+SELL = -1
+
+
+class RingBuffer(object):
+    """Fixed size columns of the latest rows of a stream.
+
+    Every column is an ``array.array`` allocated once, a row is written in place over the
+    oldest one. Rows are read newest last.
+    """
+
+    # (name, array typecode) of each column
+    COLUMNS = ()
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """initialize the RingBuffer
+
+        Args:
+            size (int, optional): rows kept. Defaults to DEFAULT_SIZE.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.names = tuple(name for name, _ in self.COLUMNS)
+        self._columns = [array.array(code, [0]) * size for _, code in self.COLUMNS]
+        # rows written so far, the next row goes to count % size
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, *values):
+        with self.lock:
+            idx = self.count % self.size
+            for column, value in zip(self._columns, values):
+                column[idx] = value
+            self.count += 1
+
+    def replace_last(self, *values):
+        """overwrite the newest row, or append the first one
+        """
+        with self.lock:
+            if not self.count:
+                self.count = 1
+            idx = (self.count - 1) % self.size
+            for column, value in zip(self._columns, values):
+                column[idx] = value
+
+    def _indexes(self, n):
+        rows = min(self.count, self.size)
+        n = rows if n is None else min(n, rows)
+        start = self.count - n
+        return [i % self.size for i in range(start, self.count)]
+
+    def latest(self, n=None):
+        """the latest ``n`` rows as tuples, newest last
+
+        Args:
+            n (int, optional): rows to read. Defaults to None, every row kept.
+        """
+        with self.lock:
+            indexes = self._indexes(n)
+            columns = self._columns
+            return [tuple(column[i] for column in columns) for i in indexes]
+
+    def last(self):
+        """the newest row as a dict, None before the first row
+        """
+        with self.lock:
+            if not self.count:
+                return None
+            idx = (self.count - 1) % self.size
+            return {name: column[idx] for name, column in zip(self.names, self._columns)}
+
+    def column(self, name, n=None, as_numpy=False):
+        """the latest ``n`` values of a column, newest last
+
+        Args:
+            name (str): column name
+            n (int, optional): values to read. Defaults to None, every row kept.
+            as_numpy (bool, optional): return a NumPy array. Defaults to False.
+        """
+        column = self._columns[self.names.index(name)]
+        with self.lock:
+            indexes = self._indexes(n)
+            if not indexes or indexes[0] <= indexes[-1]:
+                values = column[indexes[0]:indexes[-1] + 1] if indexes else column[:0]
+            else:
+                # wrapped around the end of the buffer
+                values = column[indexes[0]:] + column[:indexes[-1] + 1]
+        if as_numpy:
+            if np is None:
+                raise ImportError("numpy is required for as_numpy=True")
+            return np.frombuffer(values, dtype=values.typecode)
+        return values.tolist()
+
+
+class TradeBuffer(RingBuffer):
+    """latest trades of a symbol from its trade channel, side is BUY or SELL
+    """
+
+    COLUMNS = (('id', 'q'), ('ts', 'q'), ('price', 'd'), ('qty', 'd'), ('side', 'b'))
+
+    def on_message(self, msg):
+        """write the trades of a trade channel message, trades already kept are skipped after a resubscribe
+        """
+        if not msg:
+            return
+        tick = msg.get('tick')
+        if not tick:
+            return
+        for trade in tick.get('data') or ():
+            trade_id = int(trade['id'])
+            if self.count and trade_id <= self._columns[0][(self.count - 1) % self.size]:
+                continue
+            self.append(trade_id, int(trade['ts']), float(trade['price']), float(trade['vol']),
+                        BUY if trade['side'] == 'BUY' else SELL)
+
+
+class KlineBuffer(RingBuffer):
+    """latest bars of a symbol from its kline channel, the open bar is updated in place
+    """
+
+    COLUMNS = (('open_time', 'q'), ('open', 'd'), ('high', 'd'), ('low', 'd'), ('close', 'd'), ('volume', 'd'),
+               ('amount', 'd'))
+
+    def on_message(self, msg):
+        """write the bar of a kline channel message
+        """
+        if not msg:
+            return
+        tick = msg.get('tick')
+        if not tick:
+            return
+        open_time = int(tick['id'])
+        values = (open_time, float(tick['open']), float(tick['high']), float(tick['low']), float(tick['close']),
+                  float(tick['vol']), float(tick.get('amount') or 0))
+        if self.count and self._columns[0][(self.count - 1) % self.size] == open_time:
+            self.replace_last(*values)
+        else:
+            self.append(*values)
+
+
+def buffered_callback(buffer, callback=None):
+    """socket callback writing into ``buffer`` first, then calling ``callback`` if there is one
+    """
+    if callback is None:
+        return buffer.on_message
+    if asyncio.iscoroutinefunction(callback):
+        async def on_message(msg):
+            buffer.on_message(msg)
+            await callback(msg)
+    else:
+        def on_message(msg):
+            buffer.on_message(msg)
+            callback(msg)
+    return on_message
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import logging
+import queue
+import threading
+import time
+
+
+TickerEvent = collections.namedtuple('TickerEvent', 'symbol changes ts source')
+TickerEvent.__doc__ = """changed fields of one symbol, ``changes`` maps field name to new value, ``source`` is the endpoint"""
+
+# fields kept of each endpoint, 24hr is ticker/24hr, price ticker/price and bookTicker ticker/bookTicker
+ENDPOINT_FIELDS = collections.OrderedDict([
+    ('24hr', ('lastPrice', 'priceChange', 'priceChangePercent', 'openPrice', 'highPrice', 'lowPrice', 'volume', 'quoteVolume')),
+    ('price', ('price',)),
+    ('bookTicker', ('bidPrice', 'bidQty', 'askPrice', 'askQty')),
+])
+
+# seconds between polls of each endpoint
+DEFAULT_INTERVALS = {'24hr': 10, 'price': 1, 'bookTicker': 1}
+
+
+class _Subscriber(object):
+
+    def __init__(self, callback, queue, symbols, fields):
+        self.callback = callback
+        self.queue = queue
+        self.symbols = set(s.upper() for s in symbols) if symbols else None
+        self.fields = set(fields) if fields else None
+        self.dropped = 0
+
+
+class TickerPoller(object):
+    """Poll the all-symbol ticker endpoints of a Client and push what changed.
+
+    The last value of every field is kept in one row per symbol, each poll is diffed against
+    it and subscribers get a TickerEvent with only the changed fields of a symbol. The first
+    poll of an endpoint reports every field of every symbol.
+    """
+
+    def __init__(self, client, intervals=None, symbols=None):
+        """initialize the TickerPoller
+
+        Args:
+            client (Client): client the tickers are fetched with
+            intervals (dict, optional): seconds between polls by endpoint, endpoints not listed are not polled. Defaults to DEFAULT_INTERVALS.
+            symbols (list, optional): only keep these symbols. Defaults to None, all symbols.
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._fetchers = {
+            '24hr': client.get_all_tickers,
+            'price': client.get_ticker,
+            'bookTicker': client.get_orderbook_ticker,
+        }
+        self.intervals = dict(DEFAULT_INTERVALS if intervals is None else intervals)
+        self._symbols = set(s.upper() for s in symbols) if symbols else None
+        self.columns = []
+        for fields in ENDPOINT_FIELDS.values():
+            self.columns.extend(field for field in fields if field not in self.columns)
+        # (field, column) pairs of each endpoint
+        self._slots = {endpoint: [(field, self.columns.index(field)) for field in fields]
+                       for endpoint, fields in ENDPOINT_FIELDS.items()}
+        self._rows = {}
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self.polls = collections.Counter()
+        self.events = 0
+        self._stop = None
+        self._thread = None
+
+    def subscribe(self, callback=None, queue=None, symbols=None, fields=None):
+        """get change events by calling ``callback(event)`` or putting them into ``queue``
+
+        Args:
+            callback (function, optional): called with every TickerEvent from the polling thread. Defaults to None.
+            queue (queue.Queue, optional): queue the events are put into without blocking. Defaults to None.
+            symbols (list, optional): only changes of these symbols. Defaults to None.
+            fields (list, optional): only changes of these fields. Defaults to None.
+
+        Returns:
+            the subscription, to pass to unsubscribe
+        """
+        if callback is None and queue is None:
+            raise ValueError("a callback or a queue is required")
+        subscriber = _Subscriber(callback, queue, symbols, fields)
+        with self._lock:
+            # copy on write, publishing iterates without the lock
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def get(self, symbol):
+        """get the last known fields of a symbol, None for an unknown symbol
+        """
+        row = self._rows.get(symbol.upper())
+        if row is None:
+            return None
+        return {field: value for field, value in zip(self.columns, row) if value is not None}
+
+    def symbols(self):
+        return list(self._rows.keys())
+
+    def poll(self, endpoint):
+        """fetch one endpoint now, apply and publish its changes
+
+        Returns:
+            list: the TickerEvents
+        """
+        items = self._fetchers[endpoint]()
+        self.polls[endpoint] += 1
+        return self.apply(endpoint, items)
+
+    def apply(self, endpoint, items, ts=None):
+        """diff a ticker response of an endpoint against the table and publish the changes
+
+        Returns:
+            list: the TickerEvents
+        """
+        if isinstance(items, dict):
+            items = [items]
+        ts = ts or int(time.time() * 1000)
+        slots = self._slots[endpoint]
+        width = len(self.columns)
+        events = []
+        with self._lock:
+            for item in items:
+                symbol = item['symbol'].upper()
+                if self._symbols is not None and symbol not in self._symbols:
+                    continue
+                row = self._rows.get(symbol)
+                if row is None:
+                    row = self._rows[symbol] = [None] * width
+                changes = None
+                for field, col in slots:
+                    value = item.get(field)
+                    if value != row[col]:
+                        row[col] = value
+                        if changes is None:
+                            changes = {}
+                        changes[field] = value
+                if changes:
+                    events.append(TickerEvent(symbol, changes, ts, endpoint))
+            self.events += len(events)
+        if events:
+            self._publish(events)
+        return events
+
+    def _publish(self, events):
+        for subscriber in self._subscribers:
+            for event in events:
+                if subscriber.symbols is not None and event.symbol not in subscriber.symbols:
+                    continue
+                if subscriber.fields is not None:
+                    changes = {k: v for k, v in event.changes.items() if k in subscriber.fields}
+                    if not changes:
+                        continue
+                    event = event._replace(changes=changes)
+                self._deliver(subscriber, event)
+
+    def _deliver(self, subscriber, event):
+        if subscriber.callback is not None:
+            try:
+                subscriber.callback(event)
+            except Exception:
+                self.logger.exception("ticker callback failed")
+        if subscriber.queue is not None:
+            try:
+                subscriber.queue.put_nowait(event)
+            except queue.Full:
+                subscriber.dropped += 1
+
+    def start(self):
+        """poll every endpoint of ``intervals`` in a background thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+        self._thread = None
+
+    def _run(self, stop):
+        due = {endpoint: time.monotonic() for endpoint in self.intervals}
+        while due:
+            endpoint = min(due, key=due.get)
+            if stop.wait(max(0, due[endpoint] - time.monotonic())):
+                break
+            try:
+                self.poll(endpoint)
+            except Exception:
+                # keep the table until the next poll
+                self.logger.exception("%s ticker poll failed", endpoint)
+            # skip the missed polls instead of catching up with a burst
+            due[endpoint] = max(due[endpoint] + self.intervals[endpoint], time.monotonic())
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import os
+import socket
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'User-Agent': 'Bitrue/Python',
+}
+
+# every transport of the process, their sessions are dropped in a forked child
+_transports = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for transport in list(_transports):
+        transport._forget_session()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter opening its connections with the given socket options.
+    """
+
+    def __init__(self, socket_options=None, **kwargs):
+        self.socket_options = socket_options
+        super(TunedHTTPAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super(TunedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        if self.socket_options is not None:
+            proxy_kwargs.setdefault('socket_options', self.socket_options)
+        return super(TunedHTTPAdapter, self).proxy_manager_for(proxy, **proxy_kwargs)
+
+
+class HttpTransport(object):
+    """Pooled HTTP connections of the REST clients.
+
+    One transport can be shared by a Client and a FutureClient, it keeps a pool of up to
+    ``pool_maxsize`` open connections per host so that many threads can send requests at the
+    same time without waiting for a free connection. The session is created on first use and
+    again in a forked child process, connections of the parent are never reused by a child.
+    """
+
+    # number of hosts a pool is kept for, spot, futures and website
+    DEFAULT_POOL_CONNECTIONS = 4
+    # open connections kept per host
+    DEFAULT_POOL_MAXSIZE = 32
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keep_alive=True, tcp_nodelay=True, compress=True, headers=None):
+        """initialize the HttpTransport
+
+        Args:
+            pool_connections (int, optional): number of hosts a connection pool is kept for. Defaults to DEFAULT_POOL_CONNECTIONS.
+            pool_maxsize (int, optional): open connections kept per host. Defaults to DEFAULT_POOL_MAXSIZE.
+            pool_block (bool, optional): wait for a free connection instead of opening one more than pool_maxsize. Defaults to False.
+            keep_alive (bool, optional): reuse connections and probe idle ones with TCP keep-alive. Defaults to True.
+            tcp_nodelay (bool, optional): disable Nagle's algorithm so small requests are sent at once. Defaults to True.
+            compress (bool, optional): accept gzip and deflate (and brotli when installed) compressed responses. Defaults to True.
+            headers (dict, optional): headers sent with every request. Defaults to None.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.tcp_nodelay = tcp_nodelay
+        self.compress = compress
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+        _transports.add(self)
+
+    @property
+    def session(self):
+        """the ``requests`` session of the current process
+        """
+        session = self._session
+        if session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._create_session()
+                    self._pid = os.getpid()
+                session = self._session
+        return session
+
+    @session.setter
+    def session(self, session):
+        with self._lock:
+            self._session = session
+            self._pid = os.getpid()
+
+    def socket_options(self):
+        options = [opt for opt in HTTPConnection.default_socket_options
+                   if opt[:2] != (socket.IPPROTO_TCP, socket.TCP_NODELAY)]
+        if self.tcp_nodelay:
+            options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+        if self.keep_alive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            # find dead pooled connections before a request is sent on them
+            for name, value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+                if hasattr(socket, name):
+                    options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+        return options
+
+    def _create_session(self):
+        session = requests.session()
+        session.headers.update(self.headers)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING if self.compress else 'identity'
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        adapter = TunedHTTPAdapter(socket_options=self.socket_options(), pool_connections=self.pool_connections,
+                                   pool_maxsize=self.pool_maxsize, pool_block=self.pool_block)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _forget_session(self):
+        # the sockets are shared with the parent process, they must be neither used nor closed here
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def request(self, method, uri, **kwargs):
+        return getattr(self.session, method)(uri, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from decimal import Decimal, ROUND_DOWN
+
+from bitrue.exceptions import (BitrueOrderException, BitrueOrderMinAmountException, BitrueOrderMinPriceException, BitrueOrderMinTotalException,
+                               BitrueOrderUnknownSymbolException, BitrueOrderInactiveSymbolException)
+
+
+_ZERO = Decimal(0)
+
+
+def _dec(num):
+    return num if isinstance(num, Decimal) else Decimal(str(num))
+
+
+def _positive(value):
+    # a zero limit means the filter is disabled
+    if value is None:
+        return None
+    value = _dec(value)
+    return value if value > _ZERO else None
+
+
+class SymbolFilters(object):
+    """Trading rules of one symbol, parsed once from its exchangeInfo or contracts entry.
+    """
+
+    __slots__ = ('symbol', 'info', 'active', 'tick_size', 'min_price', 'max_price', 'step_size', 'min_qty', 'max_qty',
+                 'min_notional')
+
+    def __init__(self, symbol, info=None, active=True, tick_size=None, min_price=None, max_price=None, step_size=None,
+                 min_qty=None, max_qty=None, min_notional=None):
+        self.symbol = symbol
+        self.info = info
+        self.active = active
+        self.tick_size = _positive(tick_size)
+        self.min_price = _positive(min_price)
+        self.max_price = _positive(max_price)
+        self.step_size = _positive(step_size)
+        self.min_qty = _positive(min_qty)
+        self.max_qty = _positive(max_qty)
+        self.min_notional = _positive(min_notional)
+
+    @classmethod
+    def from_symbol_info(cls, info):
+        """compile the filters of a spot exchangeInfo symbol
+        """
+        filters = {f.get('filterType'): f for f in info.get('filters') or ()}
+        price = filters.get('PRICE_FILTER', {})
+        lot = filters.get('LOT_SIZE', {})
+        tick_size = price.get('tickSize')
+        if tick_size is None and info.get('quotePrecision') is not None:
+            tick_size = Decimal(1).scaleb(-int(info['quotePrecision']))
+        return cls(info['symbol'].upper(), info, info.get('status', 'TRADING') == 'TRADING',
+                   tick_size=tick_size, min_price=price.get('minPrice'), max_price=price.get('maxPrice'),
+                   step_size=lot.get('stepSize'), min_qty=lot.get('minQty'), max_qty=lot.get('maxQty'),
+                   min_notional=filters.get('MIN_NOTIONAL', {}).get('minNotional'))
+
+    @classmethod
+    def from_contract(cls, info):
+        """compile the filters of a futures contract, volumes are whole contracts
+        """
+        precision = info.get('pricePrecision')
+        return cls(info['symbol'].upper(), info, info.get('status', 1) == 1,
+                   tick_size=Decimal(1).scaleb(-int(precision)) if precision is not None else None,
+                   step_size=1, min_qty=info.get('minOrderVolume'), max_qty=info.get('maxLimitVolume'))
+
+    @staticmethod
+    def _round(value, size, rounding):
+        value = _dec(value)
+        if size is None:
+            return value
+        return (value / size).to_integral_value(rounding) * size
+
+    def round_price(self, price, rounding=ROUND_DOWN):
+        return self._round(price, self.tick_size, rounding)
+
+    def round_quantity(self, qty, rounding=ROUND_DOWN):
+        return self._round(qty, self.step_size, rounding)
+
+    def validate(self, price=None, qty=None):
+        """raise the BitrueOrderException the exchange would answer the order with
+
+        Args:
+            price (optional): limit price, None for market orders. Defaults to None.
+            qty (optional): order quantity, None when the order is sized in the quote asset. Defaults to None.
+        """
+        if not self.active:
+            raise BitrueOrderInactiveSymbolException(self.symbol)
+        if price is not None:
+            price = _dec(price)
+            if self.min_price is not None and price < self.min_price:
+                raise BitrueOrderMinPriceException(self.min_price)
+            if price <= _ZERO or (self.tick_size is not None and price % self.tick_size):
+                raise BitrueOrderMinPriceException(self.tick_size or self.min_price)
+            if self.max_price is not None and price > self.max_price:
+                raise BitrueOrderException(-1013, "Price must be at most %s" % self.max_price)
+        if qty is not None:
+            qty = _dec(qty)
+            if qty <= _ZERO or (self.min_qty is not None and qty < self.min_qty):
+                raise BitrueOrderMinAmountException(self.min_qty or self.step_size)
+            if self.step_size is not None and qty % self.step_size:
+                raise BitrueOrderMinAmountException(self.step_size)
+            if self.max_qty is not None and qty > self.max_qty:
+                raise BitrueOrderException(-1013, "Amount must be at most %s" % self.max_qty)
+        if price is not None and qty is not None and self.min_notional is not None and price * qty < self.min_notional:
+            raise BitrueOrderMinTotalException(self.min_notional)
+
+
+class OrderValidator(object):
+    """Check orders locally against the cached symbol filters before they are sent.
+
+    Filters are compiled once per symbol and again only when the SymbolInfoCache has loaded
+    a new entry for it.
+    """
+
+    def __init__(self, symbol_cache, compile_filters=SymbolFilters.from_symbol_info):
+        """initialize the OrderValidator
+
+        Args:
+            symbol_cache (SymbolInfoCache): the symbol info of the client
+            compile_filters (function, optional): builds SymbolFilters from a symbol info. Defaults to SymbolFilters.from_symbol_info.
+        """
+        self._symbol_cache = symbol_cache
+        self._compile_filters = compile_filters
+        self._filters = {}
+        self._lock = threading.Lock()
+
+    def filters(self, symbol):
+        """get the SymbolFilters of a symbol
+
+        Raises:
+            BitrueOrderUnknownSymbolException: the exchange does not list the symbol
+        """
+        info = self._symbol_cache.get(symbol)
+        if info is None:
+            raise BitrueOrderUnknownSymbolException(symbol)
+        # the symbol cache lookup ignores the case, one entry per symbol
+        key = symbol.upper()
+        filters = self._filters.get(key)
+        if filters is None or filters.info is not info:
+            filters = self._compile_filters(info)
+            with self._lock:
+                self._filters[key] = filters
+        return filters
+
+    def validate(self, symbol, price=None, qty=None):
+        self.filters(symbol).validate(price, qty)
@@ -1,18 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import collections
 import threading
-import gzip
 import time
+import zlib
 
 from autobahn.twisted.websocket import WebSocketClientFactory, WebSocketClientProtocol, connectWS
 from twisted.internet import reactor, ssl
+from twisted.python.threadable import isInIOThread
 from twisted.internet.protocol import ReconnectingClientFactory
 from twisted.internet.error import ReactorAlreadyRunning
 
-import ujson as json
-
-from bitrue.helpers import gen_depth_channel, gen_ticker_channel, gen_kline_channel, gen_trade_channel
+from bitrue.decoding import FrameDecoder
+from bitrue.dispatch import Dispatcher
+from bitrue.helpers import gen_depth_channel, gen_ticker_channel, gen_kline_channel, gen_trade_channel, gen_unsub_msg, \
+    gen_depth_sub_msg, gen_ticker_sub_msg, gen_kline_sub_msg, gen_trade_sub_msg
+from bitrue.streams import DEFAULT_SIZE, KlineBuffer, TradeBuffer, buffered_callback
 
 class BitrueClientProtocol(WebSocketClientProtocol):
 
@@ -24,23 +28,21 @@ class BitrueClientProtocol(WebSocketClientProtocol):
         self.factory.resetDelay()
     
     def onOpen(self):
-        msg = self.factory.subscribe()
-        # print(msg)
-        self.sendMessage(msg.encode("utf8"))
+        self.factory.client = self
+        # subscribe again every channel of the connection
+        for msg in self.factory.subscribe_messages():
+            self.sendMessage(msg.encode("utf8"))
     
     def onMessage(self, playload, isBinary):
-        msg = BitrueClientProtocol.gzip_inflate(playload) if isBinary else playload
-        # print(msg)
-        try:
-            payload_obj = json.loads(msg.decode("utf8"))
-        except ValueError:
-            pass
-        else:
-            self.factory.callback(payload_obj)
+        payload_obj = self.factory.decoder.decode(playload, isBinary)
+        if payload_obj is not None:
+            self.factory.route(payload_obj)
     
     def onClose(self, wasClean, code, reason):
         # print("%s,%s,%s" %(wasClean, code, reason))
-        self.factory.callback(None)
+        if self.factory.client is self:
+            self.factory.client = None
+        self.factory.broadcast(None)
 
     def onPing(self, playload):
         self.sendMessage('{"pong":%d}'%(int(time.time()*1000)).encode("utf8"))
@@ -48,7 +50,7 @@ class BitrueClientProtocol(WebSocketClientProtocol):
     
     @staticmethod
     def gzip_inflate(data):
-        return gzip.decompress(data)
+        return zlib.decompress(data, 31)
 
 class BitrueReconnectingClientFactory(ReconnectingClientFactory):
 
@@ -60,6 +62,11 @@ class BitrueReconnectingClientFactory(ReconnectingClientFactory):
     maxRetries = 5
 
 class BitrueClientFactory(WebSocketClientFactory, BitrueReconnectingClientFactory):
+    """One websocket connection carrying the subscriptions of many channels.
+
+    Messages are routed to the callback of their ``channel``, messages without a channel
+    go to every callback.
+    """
 
     protocol = BitrueClientProtocol
     _reconnect_error_payload = {
@@ -67,18 +74,79 @@ class BitrueClientFactory(WebSocketClientFactory, BitrueReconnectingClientFactor
         'm': "Max reconnect retries reached"
     }
 
+    def __init__(self, *args, **kwargs):
+        WebSocketClientFactory.__init__(self, *args, **kwargs)
+        # channel: (subscribe, callback, cb_id)
+        self.channels = collections.OrderedDict()
+        self.client = None
+        self.connector = None
+        self.decoder = FrameDecoder()
+        # called with the factory when it stops reconnecting, instead of broadcasting the error
+        self.on_give_up = None
+
+    def add_channel(self, channel, subscribe, callback, cb_id):
+        """subscribe a channel, on the live connection if there is one
+        """
+        self.channels[channel] = (subscribe, callback, cb_id)
+        if self.client is not None:
+            self.client.sendMessage(subscribe().encode("utf8"))
+
+    def remove_channel(self, channel):
+        """unsubscribe a channel on the live connection
+        """
+        _, _, cb_id = self.channels.pop(channel)
+        if self.client is not None:
+            self.client.sendMessage(gen_unsub_msg(cb_id, channel).encode("utf8"))
+
+    def subscribe_messages(self):
+        return [subscribe() for subscribe, _, _ in self.channels.values()]
+
+    def route(self, payload):
+        if 'ping' in payload and self.client is not None:
+            # the server closes connections that do not answer its pings
+            self.client.sendMessage(('{"pong":%d}' % payload['ping']).encode("utf8"))
+            return
+        entry = self.channels.get(payload.get('channel'))
+        if entry is not None:
+            entry[1](payload)
+        else:
+            self.broadcast(payload)
+
+    def broadcast(self, payload):
+        for _, callback, _ in list(self.channels.values()):
+            callback(payload)
+
+    def give_up(self):
+        if self.on_give_up is not None:
+            self.on_give_up(self)
+        else:
+            self.broadcast(self._reconnect_error_payload)
+
     def clientConnectionFailed(self, connector, reason):
         self.retry(connector)
         if self.retries > self.maxRetries:
-            self.callback(self._reconnect_error_payload)
+            self.give_up()
     
     def clientConnectionLost(self, connector, reason):
         self.retry(connector)
         if self.retries > self.maxRetries:
-            self.callback(self._reconnect_error_payload)
+            self.give_up()
 
 
 class BitrueSocketManager(threading.Thread):
+    """Run the websocket connections in the Twisted reactor thread.
+
+    Channels are multiplexed, each connection carries up to ``channels_per_connection``
+    subscriptions and messages are routed to callbacks by their ``channel``. Starting or
+    stopping a socket subscribes or unsubscribes its channel on a live connection, a
+    connection is only closed when its last channel is stopped. The channels of a connection
+    that gives up reconnecting move to the other connections while one of them is open,
+    otherwise their callbacks get the reconnect error and the sockets stay started until
+    the caller stops them with :meth:`stop_socket`.
+
+    Callbacks run on the reactor thread unless a :class:`bitrue.dispatch.Dispatcher` is
+    given, which queues the messages of every channel for its worker threads.
+    """
 
     STREAM_URL = "wss://ws.bitrue.com/kline-api/ws"
 
@@ -88,51 +156,178 @@ class BitrueSocketManager(threading.Thread):
 
     DEFAULT_USER_TIMEOUT = 30 * 60  # 30 mintes
 
-    def __init__(self, user_timeout=DEFAULT_USER_TIMEOUT):
+    DEFAULT_CHANNELS_PER_CONNECTION = 50
+
+    def __init__(self, user_timeout=DEFAULT_USER_TIMEOUT, channels_per_connection=DEFAULT_CHANNELS_PER_CONNECTION,
+                 skip_unknown_channels=False, dispatcher=None):
         """initialize the BitrueSocketManager
 
         Args:
             user_timeout ([int], optional): [default timeout]. Defaults to DEFAULT_USER_TIMEOUT.
+            channels_per_connection (int, optional): channels subscribed over one connection, 1 for a connection per channel. Defaults to DEFAULT_CHANNELS_PER_CONNECTION.
+            skip_unknown_channels (bool, optional): drop messages of channels no socket is started for without parsing them. Defaults to False.
+            dispatcher (Dispatcher, optional): runs the callbacks on its worker threads, True for a default one. Defaults to None, callbacks run on the reactor thread.
         """
         threading.Thread.__init__(self)
+        # channel: the BitrueClientFactory of its connection
         self._conns = {}
+        self._factories = []
+        # channels of each factory, kept by the caller thread
+        self._channel_counts = collections.Counter()
+        self._lock = threading.Lock()
+        # conn_key: ring buffer of a kline or trade socket
+        self._buffers = {}
+        # shared by the connections, only used from the reactor thread
+        self.decoder = FrameDecoder(channels=self._conns if skip_unknown_channels else None)
+        if dispatcher is True:
+            dispatcher = Dispatcher()
+        self.dispatcher = dispatcher or None
+        self._channels_per_connection = max(1, channels_per_connection)
         self._user_timeout = user_timeout
         self._timers = {'user': None, 'margin':None}
         self._listen_keys = {'user':None, 'margin':None}
         self._account_callbacks = {'user': None, 'margin':None}
 
-    def _start_socket(self, name, subscribe, callback):
-        if name in self._conns:
-            return False
-        
-        factory = BitrueClientFactory(self.STREAM_URL)
-        factory.protocol = BitrueClientProtocol
-        factory.subscribe = subscribe
-        factory.callback = callback
-        factory.reconnect = True
-        context_factory = ssl.ClientContextFactory()
-
-        self._conns[name] = connectWS(factory, context_factory)
+    @staticmethod
+    def _in_reactor(func, *args):
+        # connections may only be touched from the reactor thread once it runs
+        if reactor.running and not isInIOThread():
+            reactor.callFromThread(func, *args)
+        else:
+            func(*args)
+
+    def _assign(self, name):
+        # a connection with a free slot for the channel, or a new one, called with the lock held
+        factory = next((f for f in self._factories if self._channel_counts[f] < self._channels_per_connection), None)
+        connect = factory is None
+        if connect:
+            factory = BitrueClientFactory(self.STREAM_URL)
+            factory.protocol = BitrueClientProtocol
+            factory.reconnect = True
+            factory.decoder = self.decoder
+            factory.on_give_up = self._connection_gave_up
+            self._factories.append(factory)
+        self._conns[name] = factory
+        self._channel_counts[factory] += 1
+        return factory, connect
+
+    def _start_socket(self, name, subscribe, callback, cb_id=None):
+        with self._lock:
+            if name in self._conns:
+                return False
+            factory, connect = self._assign(name)
+        if connect:
+            self._in_reactor(self._connect, factory)
+        if self.dispatcher is not None:
+            callback = self.dispatcher.wrap(name, callback)
+        self._in_reactor(factory.add_channel, name, subscribe, callback, cb_id)
         return name
+
+    def _connection_gave_up(self, factory):
+        # reactor thread, the factory stopped reconnecting and never gets new channels again
+        moved = []
+        with self._lock:
+            if factory not in self._factories:
+                return
+            self._factories.remove(factory)
+            # an open connection shows the network is up, the channels are worth moving
+            live = any(f.client is not None for f in self._factories)
+            if live:
+                del self._channel_counts[factory]
+                for name, entry in list(factory.channels.items()):
+                    if self._conns.get(name) is factory:
+                        target, connect = self._assign(name)
+                        moved.append((target, connect, name, entry))
+                factory.channels.clear()
+        if not live:
+            # the sockets stay until stopped, their callbacks learn the connection is gone
+            factory.broadcast(factory._reconnect_error_payload)
+            return
+        for target, connect, name, (subscribe, callback, cb_id) in moved:
+            if connect:
+                self._connect(target)
+            target.add_channel(name, subscribe, callback, cb_id)
+
+    @staticmethod
+    def _connect(factory):
+        factory.connector = connectWS(factory, ssl.ClientContextFactory())
+
+    def get_dispatch_stats(self):
+        """queue depth and delivered, dropped and conflated messages by channel, None without a dispatcher
+        """
+        return self.dispatcher.stats() if self.dispatcher is not None else None
+
+    def get_decode_stats(self):
+        """frames received, dropped as unknown channels and malformed
+        """
+        return self.decoder.stats()
+
+    def get_connection_count(self):
+        """number of open or opening websocket connections
+        """
+        return len(self._factories)
     
     def start_depth_socket(self, symbol, callback, subscribe=None, depth=0, interval=None):
         """subscribe depth for symbol
 
         Args:
             symbol ([type]): [description]
-            subscribe ([type]): [description]
+            subscribe (function, optional): subscribe message for depth subscribe. Defaults to None, gen_depth_sub_msg.
             callback (function): [description]
             depth ([type], optional): [description]. Defaults to 0.
             interval ([type], optional): [description]. Defaults to None.
         """
-        socket_name = gen_depth_channel(symbol.lower())
-        return self._start_socket(socket_name, subscribe, callback=callback)
+        lower_symbol = symbol.lower()
+        socket_name = gen_depth_channel(lower_symbol, depth)
+        subscribe = subscribe or (lambda: gen_depth_sub_msg(lower_symbol, depth))
+        return self._start_socket(socket_name, subscribe, callback=callback, cb_id=lower_symbol)
     
-    def start_kline_socket(self, symbol, callback, subscribe=None, interval=''):
-        pass
+    def start_kline_socket(self, symbol, callback=None, subscribe=None, interval='1min', size=DEFAULT_SIZE):
+        """subscribe kline stream for given symbol, the bars are kept in a KlineBuffer
+
+        Args:
+            symbol (str): symbol, e.g. 'BTRUSDT'
+            callback (function, optional): also called with every message. Defaults to None.
+            subscribe (function, optional): subscribe message for kline subscribe. Defaults to None, gen_kline_sub_msg.
+            interval (str, optional): kline interval, e.g. '1min', '60min', '1day'. Defaults to '1min'.
+            size (int, optional): bars kept. Defaults to DEFAULT_SIZE.
+
+        Returns:
+            str: the connection key, see get_buffer
+        """
+        lower_symbol = symbol.lower()
+        interval = interval or '1min'
+        socket_name = gen_kline_channel(lower_symbol, interval)
+        subscribe = subscribe or (lambda: gen_kline_sub_msg(lower_symbol, interval))
+        return self._start_buffer_socket(socket_name, KlineBuffer(size), subscribe, callback, lower_symbol)
 
-    def start_trade_socket(self, symbol, callback, subscribe=None):
-        pass
+    def start_trade_socket(self, symbol, callback=None, subscribe=None, size=DEFAULT_SIZE):
+        """subscribe trade stream for given symbol, the trades are kept in a TradeBuffer
+
+        Args:
+            symbol (str): symbol, e.g. 'BTRUSDT'
+            callback (function, optional): also called with every message. Defaults to None.
+            subscribe (function, optional): subscribe message for trade subscribe. Defaults to None, gen_trade_sub_msg.
+            size (int, optional): trades kept. Defaults to DEFAULT_SIZE.
+
+        Returns:
+            str: the connection key, see get_buffer
+        """
+        lower_symbol = symbol.lower()
+        socket_name = gen_trade_channel(lower_symbol)
+        subscribe = subscribe or (lambda: gen_trade_sub_msg(lower_symbol))
+        return self._start_buffer_socket(socket_name, TradeBuffer(size), subscribe, callback, lower_symbol)
+
+    def _start_buffer_socket(self, name, buffer, subscribe, callback, cb_id):
+        conn_key = self._start_socket(name, subscribe, buffered_callback(buffer, callback), cb_id)
+        if conn_key:
+            self._buffers[conn_key] = buffer
+        return conn_key
+
+    def get_buffer(self, conn_key):
+        """the KlineBuffer or TradeBuffer of a kline or trade socket, None for other sockets
+        """
+        return self._buffers.get(conn_key)
 
     def start_symbol_ticker_socket(self, symbol, callback, subscribe=None):
         """subscribe ticker stream for given symbol
@@ -140,29 +335,56 @@ class BitrueSocketManager(threading.Thread):
         Args:
             symbol ([type]): [description]
             callback (function): [description]
-            subscribe (function, optional): subscribe message for ticker subscribe. Defaults to None.
+            subscribe (function, optional): subscribe message for ticker subscribe. Defaults to None, gen_ticker_sub_msg.
 
         Returns:
             [type]: [description]
         """
-        socket_name = gen_ticker_channel(symbol.lower())
-        return self._start_socket(socket_name, subscribe, callback=callback)
+        lower_symbol = symbol.lower()
+        socket_name = gen_ticker_channel(lower_symbol)
+        subscribe = subscribe or (lambda: gen_ticker_sub_msg(lower_symbol))
+        return self._start_socket(socket_name, subscribe, callback=callback, cb_id=lower_symbol)
 
     
     def stop_socket(self, conn_key):
-        """stop a websocket given the connection key
+        """stop a websocket given the connection key, the connection is closed with its last channel
 
         Args:
             conn_key (string): the connection key
         """
-        if conn_key not in self._conns:
+        with self._lock:
+            factory = self._conns.pop(conn_key, None)
+            if factory is None:
+                return
+            self._buffers.pop(conn_key, None)
+            if self.dispatcher is not None:
+                self.dispatcher.discard(conn_key)
+            self._channel_counts[factory] -= 1
+            last = not self._channel_counts[factory]
+            if last:
+                del self._channel_counts[factory]
+                if factory in self._factories:
+                    self._factories.remove(factory)
+        self._in_reactor(self._stop_channel, factory, conn_key, last)
+
+    @staticmethod
+    def _stop_channel(factory, channel, last):
+        if not last:
+            factory.remove_channel(channel)
             return
-        
-        # disable reconnectiong if we are closing
-        self._conns[conn_key].factory = WebSocketClientFactory(self.STREAM_URL + "?error")
-        self._conns[conn_key].disconnect()
-        del(self._conns[conn_key])
+        factory.channels.pop(channel, None)
+        # disable reconnecting if we are closing
+        factory.stopTrying()
+        if factory.connector is not None:
+            factory.connector.disconnect()
     
+    def start(self):
+        """start the dispatcher workers, then the reactor thread
+        """
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+        threading.Thread.start(self)
+
     def run(self):
         try:
             reactor.run(installSignalHandlers=False)
@@ -177,4 +399,7 @@ class BitrueSocketManager(threading.Thread):
         for key in keys:
             self.stop_socket(key)
         
-        self._conns = {}
\ No newline at end of file
+        # cleared in place, the decoder reads the channels from it
+        self._conns.clear()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
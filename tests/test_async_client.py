@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import hmac
+import time
+
+from aiohttp import web
+import pytest
+
+from bitrue.async_client import AsyncClient
+from bitrue.exceptions import BitrueAPIException
+from bitrue.metrics import RequestMetrics
+from bitrue.ratelimit import RateLimiter
+
+
+API_KEY = "key"
+API_SECRET = "secret"
+
+
+def _check_signature(query_string):
+    payload, _, signature = query_string.rpartition('&signature=')
+    expected = hmac.new(API_SECRET.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+    return signature == expected
+
+
+async def _time(request):
+    return web.json_response({'serverTime': 1500000000000})
+
+
+async def _depth(request):
+    return web.json_response({'lastUpdateId': 1, 'bids': [['1.0', '2.0']], 'asks': [['1.1', '3.0']]})
+
+
+async def _order(request):
+    body = (await request.read()).decode()
+    if not _check_signature(body):
+        return web.json_response({'code': -1022, 'msg': 'Signature for this request is not valid.'}, status=400)
+    form = await request.post()
+    return web.json_response({'symbol': form['symbol'], 'orderId': 1})
+
+
+async def _open_orders(request):
+    if not _check_signature(request.query_string):
+        return web.json_response({'code': -1022, 'msg': 'Signature for this request is not valid.'}, status=400)
+    return web.json_response([])
+
+
+def _run(coro_fn):
+    async def main():
+        app = web.Application()
+        app.router.add_get('/api/v1/time', _time)
+        app.router.add_get('/api/v1/depth', _depth)
+        app.router.add_post('/api/v1/order', _order)
+        app.router.add_get('/api/v1/openOrders', _open_orders)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        client = AsyncClient(API_KEY, API_SECRET)
+        client.API_URL = 'http://127.0.0.1:%d/api' % port
+        try:
+            return await coro_fn(client)
+        finally:
+            await client.close_connection()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_concurrent_public_requests():
+    async def scenario(client):
+        return await asyncio.gather(*[client.get_order_book(symbol='BTRUSDT') for _ in range(50)])
+
+    results = _run(scenario)
+    assert len(results) == 50
+    assert results[0]['bids'] == [['1.0', '2.0']]
+
+
+def test_signed_requests():
+    async def scenario(client):
+        order = await client.order_limit_buy(symbol='BTRUSDT', quantity=1, price='0.1')
+        orders = await client.get_open_orders(symbol='BTRUSDT')
+        return order, orders
+
+    order, orders = _run(scenario)
+    assert order == {'symbol': 'BTRUSDT', 'orderId': 1}
+    assert orders == []
+
+
+def test_bulk_orders_are_sent():
+    async def scenario(client):
+        return await client.create_orders([{'symbol': symbol, 'side': 'BUY', 'type': 'MARKET', 'quantity': 1}
+                                           for symbol in ('BTRUSDT', 'ETHUSDT', 'XRPUSDT')], max_workers=2)
+
+    res = _run(scenario)
+    assert res.ok
+    assert [r['symbol'] for r in res] == ['BTRUSDT', 'ETHUSDT', 'XRPUSDT']
+
+
+def test_api_error_mapping():
+    async def scenario(client):
+        client.API_SECRET = 'wrong'
+        await client.create_order(symbol='BTRUSDT', side='BUY', type='MARKET', quantity=1)
+
+    with pytest.raises(BitrueAPIException) as exc_info:
+        _run(scenario)
+    assert exc_info.value.code == -1022
+    assert exc_info.value.status_code == 400
+
+
+def test_compact_and_raw_decoding():
+    async def scenario(client):
+        return await client.get_order_book_compact(symbol='BTRUSDT'), await client.get_order_book_raw(symbol='BTRUSDT')
+
+    depth, raw = _run(scenario)
+    assert depth.bids == [(1.0, 2.0)]
+    assert depth.asks == [(1.1, 3.0)]
+    assert raw.startswith(b'{')
+
+
+def test_rate_limiter_and_metrics():
+    async def scenario(client):
+        client.rate_limiter = RateLimiter(request_weight=10, request_interval=0.5)
+        client.metrics = RequestMetrics()
+        start = time.monotonic()
+        # weight 5 each, the third request waits for the bucket to refill
+        await asyncio.gather(*[client.get_order_book(symbol='BTRUSDT', limit=500) for _ in range(3)])
+        return time.monotonic() - start, client.metrics.endpoint('depth')
+
+    elapsed, depth = _run(scenario)
+    assert elapsed >= 0.2
+    assert depth.status_codes[200] == 3
+    assert depth.latency['total'].count == 3 and depth.bytes_in > 0
+
+
+def test_blocking_helpers_are_not_inherited():
+    client = AsyncClient(API_KEY, API_SECRET)
+    for name in ('iter_my_trades', 'get_historical_klines', 'refresh_symbol_info', 'round_price', 'balances'):
+        assert not hasattr(client, name)
@@ -0,0 +1,124 @@
+import asyncio
+
+from bitrue.async_websockets import AsyncBitrueSocketManager
+from bitrue.mock_exchange import MockExchange
+
+
+def test_callback_and_iterator_sockets():
+    async def main():
+        exchange = await MockExchange(rates={'depth': 200, 'ticker': 100}, depth_levels=3, ping_interval=0.05).start()
+        try:
+            async with AsyncBitrueSocketManager(stream_url=exchange.stream_url) as bm:
+                depth = []
+                got_depth = asyncio.Event()
+
+                async def on_depth(msg):
+                    depth.append(msg)
+                    if len(depth) >= 10:
+                        got_depth.set()
+
+                depth_key = bm.start_depth_socket('BTRUSDT', on_depth)
+                assert bm.start_depth_socket('BTRUSDT', on_depth) is False
+                ticker_key = bm.start_symbol_ticker_socket('BTRUSDT')
+
+                tickers = []
+                async for msg in bm.messages(ticker_key):
+                    tickers.append(msg)
+                    if len(tickers) >= 5:
+                        bm.stop_socket(ticker_key)
+                await asyncio.wait_for(got_depth.wait(), 5)
+                for _ in range(100):
+                    if exchange.counters['ws_pongs']:
+                        break
+                    await asyncio.sleep(0.02)
+                stats = bm.stats(depth_key)
+                assert bm.get_connection_count() == 1
+        finally:
+            await exchange.stop()
+        return depth, tickers, stats, exchange.stats()['counters']
+
+    depth, tickers, stats, counters = asyncio.run(main())
+    assert depth[0]['event_rep'] == 'subed'
+    ticks = [m for m in depth if m is not None and 'tick' in m]
+    assert ticks[0]['channel'] == 'market_btrusdt_depth_step0'
+    assert len(ticks[0]['tick']['buys']) == 3
+    assert all(m is None or 'ping' not in m for m in depth)
+    assert [m['channel'] for m in tickers if 'tick' in m][0] == 'market_btrusdt_ticker'
+    assert stats['connected'] and stats['messages'] >= 10 and stats['channels'] == 1
+    assert counters['ws_pongs'] >= 1
+
+
+def test_reconnect_gives_up():
+    async def main():
+        received = []
+        bm = AsyncBitrueSocketManager(stream_url='ws://127.0.0.1:1/kline-api/ws')
+        bm.INITIAL_DELAY = 0.01
+        bm.MAX_RETRIES = 2
+        key = bm.start_symbol_ticker_socket('BTRUSDT', received.append)
+        await asyncio.wait_for(bm._conns[key].connection.task, 5)
+        await bm.close()
+        return received
+
+    received = asyncio.run(main())
+    assert received[-2] == AsyncBitrueSocketManager.RECONNECT_ERROR_PAYLOAD
+    assert received.count(None) == 4
+
+
+def test_channels_share_connections():
+    async def main():
+        exchange = await MockExchange(rates={'depth': 100, 'ticker': 100}, depth_levels=1).start()
+        try:
+            async with AsyncBitrueSocketManager(stream_url=exchange.stream_url, channels_per_connection=2) as bm:
+                received = {}
+
+                def on_message(msg):
+                    if msg is not None and 'tick' in msg:
+                        received[msg['channel']] = received.get(msg['channel'], 0) + 1
+
+                keys = [bm.start_depth_socket(symbol, on_message) for symbol in ('BTRUSDT', 'ETHUSDT', 'XRPUSDT')]
+                assert bm.get_connection_count() == 2
+                await asyncio.sleep(0.3)
+                # unsubscribed on the live connection, the other channel keeps streaming
+                bm.stop_socket(keys[0])
+                await asyncio.sleep(0.05)
+                before = dict(received)
+                await asyncio.sleep(0.3)
+                after = dict(received)
+                connected = bm.stats(keys[1])['connected']
+        finally:
+            await exchange.stop()
+        return keys, before, after, connected, exchange.stats()['counters']
+
+    keys, before, after, connected, counters = asyncio.run(main())
+    assert counters['ws_connections'] == 2
+    assert connected
+    assert set(before) == set(keys)
+    assert after[keys[0]] == before[keys[0]]
+    assert after[keys[1]] > before[keys[1]]
+
+
+def test_kline_and_trade_buffers():
+    async def main():
+        exchange = await MockExchange(rates={'trade': 200, 'kline': 200}).start()
+        try:
+            async with AsyncBitrueSocketManager(stream_url=exchange.stream_url) as bm:
+                trade_key = bm.start_trade_socket('BTRUSDT', size=10)
+                kline_key = bm.start_kline_socket('BTRUSDT', interval='1min', size=5)
+                trades, klines = bm.get_buffer(trade_key), bm.get_buffer(kline_key)
+                for _ in range(100):
+                    if trades.count >= 20 and klines.count:
+                        break
+                    await asyncio.sleep(0.02)
+                assert bm.get_buffer('market_btrusdt_ticker') is None
+        finally:
+            await exchange.stop()
+        return trade_key, kline_key, trades, klines
+
+    trade_key, kline_key, trades, klines = asyncio.run(main())
+    assert (trade_key, kline_key) == ('market_btrusdt_trade_ticker', 'market_btrusdt_kline_1min')
+    assert len(trades) == 10 and trades.count >= 20
+    ids = trades.column('id')
+    assert ids == sorted(ids) and len(set(ids)) == 10
+    # the mock pushes the open minute bar, updated in place
+    assert 1 <= len(klines) <= 2
+    assert klines.last()['open_time'] % 60 == 0
@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from bitrue.balances import BalanceStore
+
+
+ACCOUNT = {'balances': [{'asset': 'BTR', 'free': '100.5', 'locked': '10'},
+                        {'asset': 'usdt', 'free': '50', 'locked': '20'}]}
+
+
+def test_loaded_once_and_indexed():
+    calls = []
+    store = BalanceStore(lambda: calls.append(1) or ACCOUNT)
+    assert store.get('btr') == {'asset': 'BTR', 'free': '100.5', 'locked': '10'}
+    assert store.free('USDT') == Decimal('50')
+    assert store.get('XRP') is None
+    assert store.free('XRP') == 0
+    assert len(calls) == 1
+    store.refresh()
+    assert len(calls) == 2
+
+
+def test_apply_fills():
+    store = BalanceStore(lambda: ACCOUNT)
+    store.apply_fill('BTR', 'USDT', 'BUY', '10', '0.5', commission='0.01', commission_asset='BTR')
+    assert store.free('BTR') == Decimal('110.49')
+    assert store.locked('USDT') == Decimal('15.0')
+    store.apply_fill('BTR', 'USDT', 'SELL', '4', '0.5')
+    assert store.locked('BTR') == Decimal('6')
+    assert store.free('USDT') == Decimal('52.0')
+    store.refresh()
+    assert store.free('BTR') == Decimal('100.5')
@@ -0,0 +1,35 @@
+from bitrue.book import CompactOrdBk, Side, to_int, to_ints
+from bitrue.decoding import Depth
+
+
+def test_to_ints_matches_to_int():
+    nums = ['0.18394', '12', '12.', '.5', '-0.00005', '-1.23456', '0.123456789', '1e-05', '1_000.5',
+            0.18394, 1e-05, 3, 2.5]
+    for precision in (0, 2, 4, 8):
+        assert to_ints(nums, precision) == [to_int(num, precision) for num in nums]
+        strings = [num for num in nums if isinstance(num, str) and 'e' not in num]
+        assert to_ints(strings, precision) == [to_int(num, precision) for num in strings]
+
+
+def test_from_depth():
+    depth = {'lastUpdateId': 7, 'bids': [['0.1838', '10.5'], ['0.1839', '1']], 'asks': [['0.1840', '3'], ['0.1841', '4']]}
+    ob = CompactOrdBk.from_depth(depth, precision=4, vol_prec=1)
+    assert ob.seq == 7
+    assert ob.best_px(Side.BID) == 1839
+    assert ob.snapshot(Side.BID) == [[1839, 10], [1838, 105]]
+    assert ob.snapshot(Side.ASK) == [[1840, 30], [1841, 40]]
+
+    ob = CompactOrdBk.from_depth(Depth(8, [(0.1839, 1.0)], [(0.184, 3.0)]), precision=4, vol_prec=1)
+    assert ob.best_px(Side.BID) == 1839
+    assert ob.best_px(Side.ASK) == 1840
+
+
+def test_reset_replaces_side():
+    ob = CompactOrdBk(1, [['0.1839', '1']], [['0.1840', '3']], precision=4, vol_prec=0)
+    ob.reset(Side.BID, [['0.1837', '2'], ['0.1836', '5']], ts=2)
+    assert ob.seq == 2
+    assert ob.snapshot(Side.BID) == [[1837, 2], [1836, 5]]
+    assert ob.snapshot(Side.ASK) == [[1840, 3]]
+    ob.load([], [['0.1845', '1']], seq=3)
+    assert ob.size(Side.BID) == 0
+    assert ob.best_px(Side.ASK) == 1845
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from bitrue.bulk import run_bulk, run_bulk_async
+from bitrue.exceptions import BitrueRequestException
+
+
+def fake_create_order(**params):
+    time.sleep(0.05)
+    if params['price'] < 0:
+        raise BitrueRequestException('bad price')
+    return {'orderId': params['price']}
+
+
+def test_results_in_input_order_with_errors():
+    orders = [{'price': p} for p in (3, -1, 2, 1)]
+    res = run_bulk(fake_create_order, orders, max_workers=4)
+    assert [r['orderId'] for i, r in enumerate(res) if i != 1] == [3, 2, 1]
+    assert isinstance(res[1], BitrueRequestException)
+    assert [i for i, _ in res.errors] == [1]
+    assert not res.ok
+    assert len(res.latencies) == 4
+
+
+def test_fan_out_is_concurrent():
+    res = run_bulk(fake_create_order, [{'price': p} for p in range(20)], max_workers=20)
+    assert res.ok
+    assert res.elapsed < 20 * 0.05 / 2
+
+
+def test_async_fan_out_is_bounded():
+    in_flight = []
+
+    async def fake_cancel_order(**params):
+        in_flight.append(1)
+        peak = len(in_flight)
+        await asyncio.sleep(0.02)
+        in_flight.pop()
+        if params['orderId'] < 0:
+            raise BitrueRequestException('unknown order')
+        return {'orderId': params['orderId'], 'peak': peak}
+
+    res = asyncio.run(run_bulk_async(fake_cancel_order, [{'orderId': i} for i in (1, -1, 2, 3, 4, 5)], max_workers=2))
+    assert [r['orderId'] for i, r in enumerate(res) if i != 1] == [1, 2, 3, 4, 5]
+    assert [i for i, _ in res.errors] == [1]
+    assert max(r['peak'] for r in res if not isinstance(r, Exception)) <= 2
+    assert len(res.latencies) == 6
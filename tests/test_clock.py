@@ -0,0 +1,37 @@
+from bitrue.clock import ClockSync
+
+
+def test_offset_from_min_rtt_sample():
+    clock = ClockSync(window=3)
+    # server is 500ms ahead, the slow samples carry asymmetric delay
+    clock.add_sample(100.0, 100500 + 150, 100.4)
+    clock.add_sample(200.0, 200500 + 5, 200.01)
+    clock.add_sample(300.0, 300500 + 90, 300.2)
+    assert clock.offset == 500
+    stats = clock.stats()
+    assert stats['samples'] == 3
+    assert round(stats['rtt']) == 10
+    assert round(stats['max_rtt']) == 400
+
+
+def test_old_samples_age_out():
+    clock = ClockSync(window=2)
+    clock.add_sample(100.0, 100005, 100.01)
+    clock.add_sample(200.0, 200800, 200.1)
+    clock.add_sample(300.0, 300800, 300.1)
+    assert clock.offset == 750
+
+
+def test_ensure_samples_once():
+    calls = []
+
+    def server_time():
+        calls.append(1)
+        return 0
+
+    clock = ClockSync(server_time)
+    assert not clock.synced
+    clock.ensure()
+    clock.ensure()
+    assert clock.synced
+    assert len(calls) == 1
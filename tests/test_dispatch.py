@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+
+from bitrue.dispatch import BLOCK, CONFLATE, DROP_OLDEST, Dispatcher, channel_kind
+from bitrue.websockets import BitrueSocketManager
+
+
+def _tick(n):
+    return {'channel': 'c', 'tick': {'n': n}}
+
+
+class Gate(object):
+    """callback holding the worker on the first message until released"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.received = []
+        self.done = threading.Event()
+        self.expected = None
+
+    def __call__(self, msg):
+        self.entered.set()
+        self.release.wait(5)
+        self.received.append(msg)
+        if self.expected is not None and len(self.received) >= self.expected:
+            self.done.set()
+
+
+def test_channel_kind():
+    assert channel_kind('market_btrusdt_depth_step0') == 'depth'
+    assert channel_kind('market_btrusdt_ticker') == 'ticker'
+    assert channel_kind('market_btrusdt_trade_ticker') == 'trade'
+    assert channel_kind('market_btrusdt_kline_1min') == 'kline'
+    with pytest.raises(ValueError):
+        Dispatcher(policies={'depth': 'latest'})
+
+
+@pytest.mark.parametrize('policy, delivered', [
+    (CONFLATE, [0, None, 9]),
+    (DROP_OLDEST, [0, 7, 8, 9]),
+])
+def test_overflow_policies(policy, delivered):
+    dispatcher = Dispatcher(workers=1, max_size=3, policy=policy, policies={})
+    dispatcher.start()
+    gate = Gate()
+    gate.expected = len(delivered)
+    dispatcher.submit('c', gate, _tick(0))
+    assert gate.entered.wait(5)
+    if policy == CONFLATE:
+        # never conflated away
+        dispatcher.submit('c', gate, None)
+    for n in range(1, 10):
+        dispatcher.submit('c', gate, _tick(n))
+    gate.release.set()
+    assert gate.done.wait(5)
+    dispatcher.stop()
+    assert [m and m['tick']['n'] for m in gate.received] == delivered
+    stats = dispatcher.stats()['c']
+    assert stats['policy'] == policy and stats['delivered'] == len(delivered) and stats['depth'] == 0
+    if policy == CONFLATE:
+        assert stats['conflated'] == 8
+    else:
+        assert stats['dropped'] == 6 and stats['high_water'] == 3
+
+
+def test_block_policy_holds_the_producer():
+    dispatcher = Dispatcher(workers=1, max_size=1, policy=BLOCK, policies={})
+    dispatcher.start()
+    gate = Gate()
+    gate.expected = 3
+    for n in range(2):
+        dispatcher.submit('c', gate, _tick(n))
+    producer = threading.Thread(target=dispatcher.submit, args=('c', gate, _tick(2)))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    gate.release.set()
+    producer.join(5)
+    assert gate.done.wait(5)
+    dispatcher.stop()
+    assert [m['tick']['n'] for m in gate.received] == [0, 1, 2]
+
+
+def test_blocked_producer_gives_up_on_stop():
+    dispatcher = Dispatcher(workers=1, max_size=1, policy=BLOCK, policies={})
+    dispatcher.start()
+    gate = Gate()
+    gate.expected = 2
+    dispatcher.submit('c', gate, _tick(0))
+    assert gate.entered.wait(5)
+    dispatcher.submit('c', gate, _tick(1))
+    producer = threading.Thread(target=dispatcher.submit, args=('c', gate, _tick(2)))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    dispatcher.stop(timeout=0)
+    producer.join(5)
+    assert not producer.is_alive()
+    gate.release.set()
+    assert gate.done.wait(5)
+    dispatcher.stop()
+    assert [m['tick']['n'] for m in gate.received] == [0, 1]
+    assert dispatcher.rejected == 1
+    assert dispatcher.stats()['c']['depth'] == 0
+
+
+def test_slow_channel_does_not_hold_up_others():
+    dispatcher = Dispatcher(workers=2)
+    dispatcher.start()
+    slow = Gate()
+    fast = []
+    fast_done = threading.Event()
+
+    def on_fast(msg):
+        fast.append(msg['tick']['n'])
+        if len(fast) == 100:
+            fast_done.set()
+
+    dispatcher.submit('market_btrusdt_trade_ticker', slow, _tick(0))
+    for n in range(100):
+        dispatcher.submit('market_ethusdt_trade_ticker', on_fast, _tick(n))
+    assert fast_done.wait(5)
+    assert fast == list(range(100))
+    assert slow.received == []
+    slow.release.set()
+    dispatcher.stop()
+    assert len(slow.received) == 1
+
+
+def test_manager_dispatches_off_the_socket_thread():
+    bm = BitrueSocketManager(dispatcher=True)
+    bm._connect = lambda factory: None
+    # the reactor is not needed, start only runs the dispatcher workers
+    bm.run = lambda: None
+    bm.start()
+    threads = []
+    received = threading.Event()
+
+    def on_ticker(msg):
+        threads.append(threading.current_thread())
+        received.set()
+
+    key = bm.start_symbol_ticker_socket('BTRUSDT', on_ticker)
+    bm._conns[key].route({'channel': key, 'tick': {'close': 1}})
+    assert received.wait(5)
+    assert threads[0] is not threading.current_thread()
+    assert bm.get_dispatch_stats()[key]['delivered'] == 1
+    bm.close()
+    assert bm.get_dispatch_stats() == {}
+    # a frame arriving between close and the channel teardown does not restart the workers
+    bm.dispatcher.submit(key, on_ticker, {'channel': key, 'tick': {'close': 2}})
+    assert bm.dispatcher.rejected == 1
+    assert bm.get_dispatch_stats() == {}
+    assert len(threads) == 1
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from bitrue import klines
+from bitrue.client import Client
+from bitrue.mock_exchange import MockExchange
+
+
+MINUTE = 60 * 1000
+
+
+def fake_fetch(start, end):
+    # one kline per minute, the window end is inclusive
+    return [[t, '1.0', '2.0', '0.5', '1.5', '10'] for t in range(start - start % MINUTE, end + 1, MINUTE)]
+
+
+def test_split_range():
+    chunks = klines.split_range(0, 25 * MINUTE, MINUTE, 10)
+    assert chunks == [(0, 10 * MINUTE - 1), (10 * MINUTE, 20 * MINUTE - 1), (20 * MINUTE, 25 * MINUTE)]
+
+
+def test_fetch_chunks_stitches_in_order():
+    chunks = klines.split_range(0, 99 * MINUTE, MINUTE, 7)
+    res = klines.fetch_chunks(fake_fetch, chunks, max_workers=8)
+    assert [k[0] for k in res] == [i * MINUTE for i in range(100)]
+
+
+def test_klines_to_arrays():
+    np = pytest.importorskip('numpy')
+    arrays = klines.klines_to_arrays(fake_fetch(0, 2 * MINUTE))
+    assert arrays['open_time'].dtype == np.int64
+    assert arrays['open_time'].tolist() == [0, MINUTE, 2 * MINUTE]
+    assert arrays['close'].tolist() == [1.5, 1.5, 1.5]
+    assert arrays['volume'].dtype == np.float64
+
+
+def test_to_milliseconds_and_scale():
+    assert klines.to_milliseconds(1500000000000) == 1500000000000
+    assert klines.to_milliseconds(1500000000000.7) == 1500000000000
+    assert klines.to_milliseconds(None) is None
+    assert klines.to_milliseconds('1 Jan 2020 UTC') == 1577836800000
+    assert klines.to_scale('1h') == klines.to_scale('1H') == '1H'
+    assert klines.to_scale('15m') == '15m'
+    with pytest.raises(ValueError):
+        klines.to_scale('3m')
+
+
+def test_historical_klines_from_market_kline():
+    exchange = MockExchange(seed=1).start_in_thread()
+    try:
+        client = exchange.configure(Client(warm_up=False, rate_limiter=False))
+        end = int(time.time() // 60 * 60 * 1000) - 10 * MINUTE
+        start = end - 99 * MINUTE + 30 * 1000
+        res = client.get_historical_klines('BTRUSDT', Client.KLINE_INTERVAL_1MINUTE, start, float(end), limit=30)
+        requests = exchange.stats()['requests']['/api/v1/market/kline']
+    finally:
+        exchange.stop_thread()
+    assert [k[0] for k in res] == [start + 30 * 1000 + i * MINUTE for i in range(99)]
+    assert requests == 4
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from bitrue.metadata import SymbolInfoCache
+
+
+class CountingLoader(object):
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return [{'symbol': s, 'status': 'TRADING'} for s in self.symbols]
+
+
+def test_lookup_is_case_insensitive_and_loaded_once():
+    loader = CountingLoader(['BTRUSDT', 'ETHBTC'])
+    cache = SymbolInfoCache(loader)
+    assert cache.get('btrusdt')['symbol'] == 'BTRUSDT'
+    assert cache.get('ETHBTC')['symbol'] == 'ETHBTC'
+    assert cache.get('unknown') is None
+    assert loader.calls == 1
+
+
+def test_ttl_and_explicit_refresh():
+    loader = CountingLoader(['BTRUSDT'])
+    cache = SymbolInfoCache(loader, ttl=0.01)
+    cache.get('BTRUSDT')
+    time.sleep(0.02)
+    loader.symbols = ['XRPUSDT']
+    assert cache.get('BTRUSDT') is None
+    assert 'XRPUSDT' in cache
+    loader.symbols = ['BTRUSDT']
+    cache.refresh()
+    assert loader.calls == 3
+    assert cache.symbols() == ['BTRUSDT']
+
+
+def test_background_refresh():
+    loader = CountingLoader(['BTRUSDT'])
+    cache = SymbolInfoCache(loader, ttl=None)
+    cache.start_refresh(interval=0.01)
+    try:
+        deadline = time.time() + 2
+        while loader.calls < 3 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        cache.stop_refresh()
+    assert loader.calls >= 3
+    assert cache.get('btrusdt') is not None
+
+
+def test_warm_start_from_snapshot(tmp_path):
+    path = str(tmp_path / 'spot' / 'exchangeInfo.json')
+    SymbolInfoCache(CountingLoader(['BTRUSDT']), path=path, source='spot').refresh()
+
+    release = threading.Event()
+    loader = CountingLoader(['BTRUSDT', 'XRPUSDT'])
+    cache = SymbolInfoCache(lambda: release.wait(2) and loader(), path=path, source='spot')
+    assert cache.warm_start()
+    # served from the snapshot while the exchange is still answering
+    assert cache.symbols() == ['BTRUSDT']
+    assert cache.snapshot_saved_at is not None
+    release.set()
+    deadline = time.time() + 2
+    while 'XRPUSDT' not in cache._index and time.time() < deadline:
+        time.sleep(0.01)
+    assert sorted(cache.symbols()) == ['BTRUSDT', 'XRPUSDT']
+
+    # a snapshot of another source is not used
+    assert not SymbolInfoCache(loader, path=path, source='futures').warm_start()
+    assert not SymbolInfoCache(loader, path=str(tmp_path / 'missing.json')).warm_start()
@@ -0,0 +1,66 @@
+import datetime
+import json
+
+import pytest
+
+from bitrue.client import Client
+from bitrue.exceptions import BitrueAPIException
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode()
+        self.headers = {}
+        self.elapsed = datetime.timedelta(milliseconds=1)
+        self.request = None
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession(object):
+
+    def get(self, uri, **kwargs):
+        if uri.endswith('/depth'):
+            return FakeResponse(200, b'{"bids":[],"asks":[]}')
+        return FakeResponse(400, b'{"code":-1121,"msg":"Invalid symbol."}')
+
+
+@pytest.fixture
+def client():
+    client = Client(warm_up=False, rate_limiter=False, metrics=True)
+    client.session = FakeSession()
+    return client
+
+
+def test_metrics_per_endpoint(client):
+    client.get_order_book(symbol='BTRUSDT')
+    client.get_order_book(symbol='BTRUSDT')
+    with pytest.raises(BitrueAPIException):
+        client.get_ticker(symbol='NOPE')
+
+    res = client.metrics.to_dict()
+    assert res['depth']['status_codes'] == {200: 2}
+    assert res['depth']['latency']['total']['count'] == 2
+    assert res['depth']['bytes_in'] == 2 * len(b'{"bids":[],"asks":[]}')
+    assert res['ticker/price']['errors'] == 1
+    assert res['ticker/price']['status_codes'] == {400: 1}
+
+    text = client.metrics.to_prometheus()
+    assert 'bitrue_rest_request_seconds_count{endpoint="depth",phase="total"} 2' in text
+    assert 'bitrue_rest_responses_total{endpoint="ticker/price",code="400"} 1' in text
+
+
+def test_request_hooks(client):
+    events = []
+    client.add_request_hook('before', lambda info: events.append(('before', info.endpoint)))
+    client.add_request_hook('after', lambda info: events.append(('after', info.endpoint, info.response.status_code, info.result)))
+    client.add_request_hook('error', lambda info: events.append(('error', info.endpoint, type(info.exception))))
+    client.get_order_book(symbol='BTRUSDT')
+    with pytest.raises(BitrueAPIException):
+        client.get_ticker(symbol='NOPE')
+    assert events == [('before', 'depth'), ('after', 'depth', 200, {'bids': [], 'asks': []}),
+                      ('before', 'ticker/price'), ('error', 'ticker/price', BitrueAPIException)]
@@ -0,0 +1,73 @@
+import asyncio
+import gzip
+import json
+
+import aiohttp
+import pytest
+
+from bitrue.client import Client
+from bitrue.exceptions import BitrueAPIException
+from bitrue.future_client import FutureClient
+from bitrue.helpers import gen_depth_sub_msg, gen_ticker_sub_msg
+from bitrue.mock_exchange import MockExchange
+
+
+@pytest.fixture(scope='module')
+def exchange():
+    exchange = MockExchange(seed=1).start_in_thread()
+    yield exchange
+    exchange.stop_thread()
+
+
+def test_spot_client(exchange):
+    client = exchange.configure(Client('key', 'secret', warm_up=False, rate_limiter=False))
+    depth = client.get_order_book(symbol='BTRUSDT', limit=5)
+    assert len(depth['bids']) == len(depth['asks']) == 5
+    assert float(depth['bids'][0][0]) < float(depth['asks'][0][0])
+    assert client.get_symbol_info('BTRUSDT')['status'] == 'TRADING'
+
+    order = client.order_limit_buy(symbol='BTRUSDT', quantity=10, price='0.1')
+    assert order['status'] == 'NEW'
+    assert [o['orderId'] for o in client.get_open_orders(symbol='BTRUSDT')] == [order['orderId']]
+    assert client.cancel_order(symbol='BTRUSDT', orderId=order['orderId'])['status'] == 'CANCELED'
+    assert client.get_asset_balance('USDT')['free'] == '100000'
+
+
+def test_futures_client(exchange):
+    client = exchange.configure(FutureClient('key', 'secret', warm_up=False, rate_limiter=False))
+    assert client.get_symbol_info('E-BTC-USDT')['pricePrecision'] == 1
+    assert len(client.get_order_book(contractName='E-BTC-USDT', limit=5)['bids']) == 5
+    order = client.create_order(contractName='E-BTC-USDT', side='BUY', type='LIMIT', price=30000, volume=1,
+                                open='OPEN', positionType=1, clientOrderId='a1', timeInForce='GTC')
+    assert client.get_order(contractName='E-BTC-USDT', orderId=order['orderId'])['clientOrderId'] == 'a1'
+
+
+def test_bad_signature_is_rejected(exchange):
+    client = exchange.configure(Client('key', 'wrong', warm_up=False, rate_limiter=False))
+    with pytest.raises(BitrueAPIException) as exc:
+        client.get_open_orders(symbol='BTRUSDT')
+    assert exc.value.code == -1022
+    assert exchange.stats()['counters']['signature_failures'] >= 1
+
+
+def test_websocket_channels():
+    async def main():
+        exchange = await MockExchange(rates={'depth': 200}, depth_levels=3).start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(exchange.stream_url) as ws:
+                    await ws.send_str(gen_depth_sub_msg('btrusdt'))
+                    await ws.send_str(gen_ticker_sub_msg('btrusdt'))
+                    msgs = []
+                    while len(msgs) < 20:
+                        msg = await asyncio.wait_for(ws.receive(), 2)
+                        msgs.append(json.loads(gzip.decompress(msg.data)))
+        finally:
+            await exchange.stop()
+        return msgs
+
+    msgs = asyncio.run(main())
+    assert {m['channel'] for m in msgs if m.get('event_rep') == 'subed'} == {'market_btrusdt_depth_step0', 'market_btrusdt_ticker'}
+    depth = [m for m in msgs if m.get('channel') == 'market_btrusdt_depth_step0' and 'tick' in m]
+    assert len(depth) >= 15
+    assert len(depth[0]['tick']['buys']) == len(depth[0]['tick']['asks']) == 3
@@ -0,0 +1,47 @@
+from bitrue import pagination
+
+
+class FakeEndpoint(object):
+
+    def __init__(self, count, overlap=0):
+        self.records = [{'a': i, 'T': 1000 + i} for i in range(count)]
+        self.overlap = overlap
+        self.calls = []
+
+    def __call__(self, **params):
+        self.calls.append(params)
+        start = params.get('fromId', 0)
+        if 'startTime' in params:
+            start = params['startTime'] - 1000
+        # an overlapping server repeats the last records of the previous page
+        start = max(0, start - self.overlap)
+        return self.records[start:start + params['limit']]
+
+
+def test_walks_all_pages_in_order():
+    fetch = FakeEndpoint(25)
+    records = list(pagination.iterate_pages(fetch, pagination.AGGREGATE_TRADES, {'symbol': 'BTRUSDT'}, 10))
+    assert [r['a'] for r in records] == list(range(25))
+    assert [c.get('fromId') for c in fetch.calls] == [None, 10, 20]
+
+
+def test_dedupes_page_boundaries():
+    fetch = FakeEndpoint(25, overlap=2)
+    records = list(pagination.iterate_pages(fetch, pagination.AGGREGATE_TRADES, {'symbol': 'BTRUSDT'}, 10, prefetch=False))
+    assert [r['a'] for r in records] == list(range(25))
+
+
+def test_time_range():
+    fetch = FakeEndpoint(100)
+    records = list(pagination.iterate_pages(fetch, pagination.AGGREGATE_TRADES, {'symbol': 'BTRUSDT', 'startTime': 1005}, 10,
+                                            end_time=1030))
+    assert [r['a'] for r in records] == list(range(5, 31))
+    assert 'startTime' not in fetch.calls[1]
+
+
+def test_stops_early_without_reading_everything():
+    fetch = FakeEndpoint(1000)
+    it = pagination.iterate_pages(fetch, pagination.AGGREGATE_TRADES, {'symbol': 'BTRUSDT'}, 10)
+    assert next(it)['a'] == 0
+    it.close()
+    assert len(fetch.calls) <= 2
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from bitrue.client import Client
+from bitrue.exceptions import BitrueRateLimitException
+from bitrue.future_client import FutureClient
+from bitrue.ratelimit import RateLimiter, PRIORITY_CANCEL, PRIORITY_MARKET, SPOT_WEIGHTS, FUTURE_WEIGHTS
+
+
+def test_endpoint_weights():
+    limiter = RateLimiter()
+    assert limiter.weight('ticker/24hr') == 40
+    assert limiter.weight('ticker/24hr', {'symbol': 'BTRUSDT'}) == 1
+    assert limiter.weight('depth', {'limit': 1000}) == 10
+    assert limiter.weight('ping') == 1
+
+
+def test_non_blocking_raises_when_exhausted():
+    limiter = RateLimiter(request_weight=50, request_interval=60, blocking=False)
+    limiter.acquire_request('get', 'ticker/24hr')
+    with pytest.raises(BitrueRateLimitException) as exc_info:
+        limiter.acquire_request('get', 'ticker/24hr')
+    assert exc_info.value.retry_after > 0
+    limiter.acquire_request('get', 'ping')
+
+
+def test_order_bucket_is_separate():
+    limiter = RateLimiter(request_weight=100, orders=2, order_interval=60, blocking=False)
+    limiter.acquire_request('post', 'order', signed=True)
+    limiter.acquire_request('post', 'order', signed=True)
+    with pytest.raises(BitrueRateLimitException):
+        limiter.acquire_request('post', 'order', signed=True)
+    # cancels and reads only use request weight
+    limiter.acquire_request('delete', 'order', signed=True)
+    limiter.acquire_request('get', 'account', signed=True)
+
+
+def test_priority_lanes():
+    limiter = RateLimiter(request_weight=1, request_interval=0.05)
+    limiter.acquire()
+    served = []
+
+    def worker(name, priority, delay):
+        time.sleep(delay)
+        limiter.acquire(priority=priority)
+        served.append(name)
+
+    threads = [threading.Thread(target=worker, args=('market', PRIORITY_MARKET, 0)),
+               threading.Thread(target=worker, args=('cancel', PRIORITY_CANCEL, 0.01))]
+    # the market data request queues first but the cancel overtakes it
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert served == ['cancel', 'market']
+
+
+def test_futures_client_is_not_limited_by_default():
+    assert FutureClient(warm_up=False).rate_limiter is None
+    assert FutureClient(warm_up=False, rate_limiter=True).rate_limiter.weights is FUTURE_WEIGHTS
+    assert Client(warm_up=False).rate_limiter.weights is SPOT_WEIGHTS
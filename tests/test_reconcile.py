@@ -0,0 +1,51 @@
+from bitrue.book import Side, TrackBook
+from bitrue.reconcile import OrderReconciler
+
+
+def order(order_id, side, price, qty, executed='0'):
+    return {'orderId': order_id, 'side': side, 'price': price, 'origQty': qty, 'executedQty': executed, 'status': 'NEW'}
+
+
+def test_track_book_levels():
+    book = TrackBook('BTRUSDT', 4, 0)
+    book.entry(1, Side.BID, '0.1000', '5', 'NEW')
+    book.entry(2, Side.BID, '0.1000', '3', 'NEW')
+    book.entry(3, Side.BID, '0.0990', '1', 'NEW')
+    book.entry(4, Side.BID, '0.1010', '2', 'NEW')
+    assert [level.get_price() for level in book.bids] == [990, 1000, 1010]
+    assert book.orders[2].price_level.get_order_ids() == [1, 2]
+
+
+def test_only_differences_are_applied():
+    book = TrackBook('BTRUSDT', 4, 0)
+    book.entry(1, Side.BID, '0.1000', '5', 'NEW')
+    book.entry(2, Side.ASK, '0.1100', '3', 'NEW')
+    book.entry(3, Side.ASK, '0.1200', '3', 'NEW')
+    untouched = book.orders[3]
+    open_orders = [order(1, 'BUY', '0.1000', '5', '2'), order(3, 'SELL', '0.1200', '3'), order(4, 'SELL', '0.1300', '7')]
+    reconciler = OrderReconciler(None, book, fetch=lambda: open_orders)
+
+    result = reconciler.reconcile()
+    assert (result.missing, result.extra, result.resized) == ([4], [2], [1])
+    assert book.get_order_size(1) == 3
+    assert book.get_best_ask()[2] == [3]
+    assert book.orders[3] is untouched
+    assert book.get_order_cnt() == 3
+
+    result = reconciler.reconcile()
+    assert result == ([], [], [])
+    assert reconciler.stats()['drift'] == {'missing': 1, 'extra': 1, 'resized': 1}
+    assert reconciler.stats()['last_drift'] == 0
+
+
+def test_orders_entered_while_fetching_are_kept():
+    book = TrackBook('BTRUSDT', 4, 0)
+
+    def fetch():
+        # placed by us after the fetch was sent
+        book.entry(9, Side.BID, '0.1000', '1', 'NEW')
+        return []
+
+    result = OrderReconciler(None, book, fetch=fetch).reconcile()
+    assert result.extra == []
+    assert book.get_order(9) is not None
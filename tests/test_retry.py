@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from bitrue.client import Client
+from bitrue.ratelimit import RateLimiter
+from bitrue.retry import RequestPolicy, RequestRetrier
+
+
+class FlakyAttempt(object):
+
+    def __init__(self, failures, exc=requests.exceptions.ConnectionError):
+        self.failures = failures
+        self.exc = exc
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc()
+        return {'ok': self.calls}
+
+
+def test_retries_connection_errors():
+    retrier = RequestRetrier()
+    attempt = FlakyAttempt(2)
+    retries = []
+    res = retrier.call('depth', RequestPolicy(retries=3, backoff=0), attempt, retries.append)
+    assert res == {'ok': 3}
+    assert retries == [1, 2]
+    assert retrier.stats()['depth']['retries'] == 2
+
+
+def test_gives_up_and_does_not_retry_other_errors():
+    retrier = RequestRetrier()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        retrier.call('depth', RequestPolicy(retries=1, backoff=0), FlakyAttempt(5))
+    attempt = FlakyAttempt(1, exc=ValueError)
+    with pytest.raises(ValueError):
+        retrier.call('depth', RequestPolicy(retries=3, backoff=0), attempt)
+    assert attempt.calls == 1
+    assert retrier.stats()['depth']['failures'] == 2
+
+
+def test_hedge_wins_over_stalled_request():
+    retrier = RequestRetrier()
+    lock = threading.Lock()
+    calls = []
+
+    def attempt():
+        with lock:
+            calls.append(1)
+            first = len(calls) == 1
+        # the first request stalls, the hedge answers quickly
+        time.sleep(1.0 if first else 0.01)
+        return 'hedge' if not first else 'primary'
+
+    start = time.perf_counter()
+    res = retrier.call('depth', RequestPolicy(hedge=True, hedge_delay=0.02), attempt)
+    assert res == 'hedge'
+    assert time.perf_counter() - start < 0.5
+    stats = retrier.stats()['depth']
+    assert stats['hedges'] == 1
+    assert stats['hedge_wins'] == 1
+    retrier.close()
+
+
+class FlakySession(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, uri, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) == 1:
+            raise requests.exceptions.ConnectionError()
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'[]'
+        return response
+
+
+def test_client_re_signs_retried_gets():
+    client = Client('key', 'secret', warm_up=False, rate_limiter=False, metrics=True)
+    client.clock.add_sample(0, 0, 0)
+    client.session = FlakySession()
+    client.set_request_policy('openOrders', RequestPolicy(timeout=2, retries=1, backoff=0))
+    assert client.get_open_orders(symbol='BTRUSDT', requests_params={'allow_redirects': False}) == []
+    assert len(client.session.calls) == 2
+    for kwargs in client.session.calls:
+        assert kwargs['timeout'] == 2
+        assert kwargs['allow_redirects'] is False
+        assert 'signature=' in kwargs['params']
+    assert client.metrics.to_dict()['openOrders']['retries'] == 1
+
+
+def test_hedge_skipped_when_refused():
+    retrier = RequestRetrier()
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'primary'
+
+    res = retrier.call('depth', RequestPolicy(hedge=True, hedge_delay=0.01), attempt, on_hedge=lambda: False)
+    assert res == 'primary'
+    assert len(calls) == 1
+    stats = retrier.stats()['depth']
+    assert (stats['hedges'], stats['hedges_skipped']) == (0, 1)
+    retrier.close()
+
+
+class SlowSession(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, uri, **kwargs):
+        self.calls += 1
+        time.sleep(0.2 if self.calls == 1 else 0.01)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{}'
+        return response
+
+
+def test_client_charges_hedges_to_the_rate_limiter():
+    client = Client(warm_up=False, rate_limiter=RateLimiter(request_weight=3, request_interval=60), metrics=True)
+    client.session = SlowSession()
+    client.set_request_policy('depth', RequestPolicy(hedge=True, hedge_delay=0.02))
+    client.get_order_book(symbol='BTRUSDT')
+    assert client.session.calls == 2
+    assert int(client.rate_limiter.request_bucket.tokens) == 1
+    assert client.metrics.to_dict()['depth']['hedges'] == 1
+
+    # one token left: the request takes it and its hedge is skipped
+    client.session = SlowSession()
+    client.get_order_book(symbol='BTRUSDT')
+    assert client.session.calls == 1
+    assert client.get_retry_stats()['depth']['hedges_skipped'] == 1
+    client.retrier.close()
@@ -0,0 +1,28 @@
+import hashlib
+import hmac
+
+from bitrue.signing import HmacSigner, encode_params
+
+
+SECRET = "secret"
+
+
+def reference(payload):
+    return hmac.new(SECRET.encode("utf-8"), payload.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def test_spot_signature():
+    signer = HmacSigner(SECRET)
+    params = [('symbol', 'BTRUSDT'), ('orderId', None), ('timestamp', 1)]
+    assert encode_params(params) == 'symbol=BTRUSDT&timestamp=1'
+    assert signer.sign_params(params) == reference('symbol=BTRUSDT&timestamp=1')
+    # the keyed state is reused, not consumed
+    assert signer.sign_params(params) == reference('symbol=BTRUSDT&timestamp=1')
+
+
+def test_futures_signature():
+    signer = HmacSigner(SECRET)
+    assert signer.sign_request(1, 'get', '/fapi/v1/openOrders', 'contractName=E-BTC-USDT') == \
+        reference('1GET/fapi/v1/openOrders?contractName=E-BTC-USDT')
+    assert signer.sign_request(1, 'post', '/fapi/v1/order', None, '{"volume": 1}') == \
+        reference('1POST/fapi/v1/order{"volume": 1}')
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from bitrue.client import Client
+from bitrue.singleflight import SingleFlight, request_key
+
+
+def run_concurrently(func, count):
+    results = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = func()
+        except Exception as ex:
+            results[i] = ex
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'price': '1.0'}
+
+    results = run_concurrently(lambda: group.do('ticker', fetch), 10)
+    assert len(calls) == 1
+    assert all(res is results[0] for res in results)
+    assert group.stats() == {'requests': 1, 'coalesced': 9, 'cache_hits': 0}
+    # nothing is cached without a ttl
+    group.do('ticker', fetch)
+    assert len(calls) == 2
+
+
+def test_exception_is_shared():
+    group = SingleFlight()
+
+    def fetch():
+        time.sleep(0.05)
+        raise ValueError('boom')
+
+    results = run_concurrently(lambda: group.do('ticker', fetch), 5)
+    assert all(isinstance(res, ValueError) for res in results)
+    with pytest.raises(ValueError):
+        group.do('ticker', fetch)
+
+
+def test_micro_cache():
+    group = SingleFlight(cache_ttl=0.05)
+    calls = []
+    group.do('ticker', lambda: calls.append(1))
+    group.do('ticker', lambda: calls.append(1))
+    assert len(calls) == 1
+    time.sleep(0.06)
+    group.do('ticker', lambda: calls.append(1))
+    assert len(calls) == 2
+    assert group.stats()['cache_hits'] == 1
+
+
+def test_request_key():
+    uri = 'https://www.bitrue.com/api/v1/ticker/price'
+    assert request_key('get', uri, {'data': {'symbol': 'A', 'x': 1}}) == request_key('get', uri, {'data': {'x': 1, 'symbol': 'A'}})
+    assert request_key('get', uri, {'data': {'symbol': 'A'}}) != request_key('get', uri, {'data': {'symbol': 'B'}})
+
+
+class CountingSession(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, uri, **kwargs):
+        self.calls.append(uri)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"serverTime": %d}' % len(self.calls)
+        return response
+
+
+def test_server_time_is_not_cached():
+    client = Client(warm_up=False, rate_limiter=False, micro_cache_ttl=60)
+    client.session = CountingSession()
+    assert [client.get_server_time()['serverTime'] for _ in range(3)] == [1, 2, 3]
+    client.get_order_book(symbol='BTRUSDT')
+    client.get_order_book(symbol='BTRUSDT')
+    assert len(client.session.calls) == 4
@@ -0,0 +1,45 @@
+import numpy as np
+
+from bitrue.helpers import gen_kline_channel
+from bitrue.streams import BUY, SELL, KlineBuffer, TradeBuffer, buffered_callback
+
+
+def _trades(*trades):
+    return {'channel': 'market_btrusdt_trade_ticker', 'tick': {'data': [
+        {'id': trade_id, 'side': side, 'price': price, 'vol': vol, 'amount': price * vol, 'ts': 1000 + trade_id}
+        for trade_id, side, price, vol in trades]}}
+
+
+def test_trade_buffer_wraps_around():
+    buffer = TradeBuffer(size=3)
+    assert buffer.latest() == [] and buffer.last() is None and buffer.column('price') == []
+    buffer.on_message(_trades((1, 'BUY', 1.0, 2.0), (2, 'SELL', 1.1, 3.0)))
+    buffer.on_message(_trades((2, 'SELL', 1.1, 3.0), (3, 'BUY', 1.2, 4.0), (4, 'BUY', 1.3, 5.0)))
+    buffer.on_message(None)
+    assert len(buffer) == 3 and buffer.count == 4
+    assert buffer.latest(2) == [(3, 1003, 1.2, 4.0, BUY), (4, 1004, 1.3, 5.0, BUY)]
+    assert buffer.column('price') == [1.1, 1.2, 1.3]
+    assert buffer.column('side', 3) == [SELL, BUY, BUY]
+    prices = buffer.column('price', as_numpy=True)
+    assert prices.dtype == np.float64 and prices.tolist() == [1.1, 1.2, 1.3]
+    assert buffer.last()['id'] == 4
+
+
+def test_kline_buffer_updates_open_bar():
+    buffer = KlineBuffer(size=2)
+    for open_time, close in ((60, 1.0), (60, 1.5), (120, 2.0), (180, 3.0), (180, 3.5)):
+        buffer.on_message({'channel': gen_kline_channel('btrusdt'), 'tick': {
+            'id': open_time, 'open': 1.0, 'high': close, 'low': 1.0, 'close': close, 'vol': 10, 'amount': 10 * close}})
+    assert gen_kline_channel('btrusdt') == 'market_btrusdt_kline_1min'
+    assert buffer.count == 3
+    assert buffer.column('open_time') == [120, 180]
+    assert buffer.column('close') == [2.0, 3.5]
+
+
+def test_buffered_callback():
+    buffer = TradeBuffer(size=4)
+    seen = []
+    on_message = buffered_callback(buffer, seen.append)
+    on_message(_trades((1, 'BUY', 1.0, 1.0)))
+    assert len(buffer) == 1 and len(seen) == 1
+    assert buffered_callback(buffer) == buffer.on_message
@@ -0,0 +1,62 @@
+import queue
+import threading
+
+from bitrue.tickers import TickerPoller
+
+
+class FakeClient(object):
+
+    def __init__(self):
+        self.prices = [{'symbol': 'BTRUSDT', 'price': '0.1'}, {'symbol': 'ETHUSDT', 'price': '2000'}]
+        self.books = [{'symbol': 'BTRUSDT', 'bidPrice': '0.09', 'bidQty': '5', 'askPrice': '0.11', 'askQty': '7'}]
+
+    def get_all_tickers(self):
+        return []
+
+    def get_ticker(self):
+        return self.prices
+
+    def get_orderbook_ticker(self):
+        return self.books
+
+
+def test_only_changes_are_published():
+    client = FakeClient()
+    poller = TickerPoller(client)
+    events = queue.Queue()
+    poller.subscribe(queue=events)
+    first = poller.poll('price')
+    assert {e.symbol: e.changes for e in first} == {'BTRUSDT': {'price': '0.1'}, 'ETHUSDT': {'price': '2000'}}
+
+    client.prices = [{'symbol': 'BTRUSDT', 'price': '0.1'}, {'symbol': 'ETHUSDT', 'price': '2001'}]
+    (event,) = poller.poll('price')
+    assert (event.symbol, event.changes, event.source) == ('ETHUSDT', {'price': '2001'}, 'price')
+    assert poller.poll('price') == []
+    assert events.qsize() == 3
+
+    poller.poll('bookTicker')
+    assert poller.get('btrusdt') == {'price': '0.1', 'bidPrice': '0.09', 'bidQty': '5', 'askPrice': '0.11', 'askQty': '7'}
+
+
+def test_subscriber_filters():
+    client = FakeClient()
+    poller = TickerPoller(client, symbols=['BTRUSDT'])
+    seen = []
+    poller.subscribe(callback=seen.append, fields=['askPrice'])
+    poller.poll('price')
+    poller.poll('bookTicker')
+    client.books = [dict(client.books[0], bidQty='6')]
+    poller.poll('bookTicker')
+    assert [e.changes for e in seen] == [{'askPrice': '0.11'}]
+    assert poller.symbols() == ['BTRUSDT']
+
+
+def test_background_polling():
+    client = FakeClient()
+    poller = TickerPoller(client, intervals={'price': 0.01})
+    done = threading.Event()
+    poller.subscribe(callback=lambda event: event.symbol == 'ETHUSDT' and done.set())
+    poller.start()
+    assert done.wait(1)
+    poller.stop()
+    assert poller.get('ETHUSDT') == {'price': '2000'}
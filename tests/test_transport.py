@@ -0,0 +1,55 @@
+import socket
+
+from bitrue.client import Client
+from bitrue.future_client import FutureClient
+from bitrue.transport import HttpTransport, _reset_after_fork
+
+
+class RecordingSession(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, uri, **kwargs):
+        self.calls.append((uri, kwargs))
+        raise RuntimeError('offline')
+
+
+def test_session_settings():
+    transport = HttpTransport(pool_maxsize=64, compress=False, keep_alive=False)
+    session = transport.session
+    assert session is transport.session
+    assert session.headers['Accept-Encoding'] == 'identity'
+    assert session.headers['Connection'] == 'close'
+    adapter = session.get_adapter('https://www.bitrue.com/api')
+    assert adapter._pool_maxsize == 64
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in adapter.socket_options
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) not in adapter.socket_options
+
+    session = HttpTransport().session
+    assert 'gzip' in session.headers['Accept-Encoding']
+    assert session.headers['Connection'] == 'keep-alive'
+
+
+def test_new_session_after_fork():
+    transport = HttpTransport()
+    session = transport.session
+    _reset_after_fork()
+    assert transport.session is not session
+
+
+def test_shared_transport_keeps_api_keys_apart():
+    transport = HttpTransport()
+    transport.session = RecordingSession()
+    spot = Client('spot-key', 'secret', warm_up=False, rate_limiter=False, transport=transport)
+    futures = FutureClient('futures-key', 'secret', warm_up=False, rate_limiter=False, transport=transport)
+    for call in (lambda: spot.get_order_book(symbol='BTRUSDT'), lambda: futures.get_order_book(contractName='E-BTC-USDT')):
+        try:
+            call()
+        except RuntimeError:
+            pass
+    (spot_uri, spot_kwargs), (futures_uri, futures_kwargs) = transport.session.calls
+    assert spot_uri.startswith(spot.API_URL)
+    assert spot_kwargs['headers']['X-MBX-APIKEY'] == 'spot-key'
+    assert futures_uri.startswith(futures.API_URL)
+    assert futures_kwargs['headers']['X-MBX-APIKEY'] == 'futures-key'
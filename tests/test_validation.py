@@ -0,0 +1,82 @@
+from decimal import Decimal, ROUND_UP
+
+import pytest
+
+from bitrue.client import Client
+from bitrue.exceptions import (BitrueOrderException, BitrueOrderMinAmountException, BitrueOrderMinPriceException,
+                               BitrueOrderMinTotalException, BitrueOrderUnknownSymbolException,
+                               BitrueOrderInactiveSymbolException)
+from bitrue.validation import SymbolFilters
+
+
+BTRUSDT = {
+    'symbol': 'BTRUSDT', 'status': 'TRADING',
+    'filters': [
+        {'filterType': 'PRICE_FILTER', 'minPrice': '0.0001', 'maxPrice': '1000', 'tickSize': '0.0001'},
+        {'filterType': 'LOT_SIZE', 'minQty': '1', 'maxQty': '1000000', 'stepSize': '0.1'},
+        {'filterType': 'MIN_NOTIONAL', 'minNotional': '5'},
+    ],
+}
+
+
+class RecordingSession(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def post(self, uri, **kwargs):
+        self.calls.append(uri)
+        raise RuntimeError('offline')
+
+
+def test_spot_filters():
+    filters = SymbolFilters.from_symbol_info(BTRUSDT)
+    filters.validate('0.1234', '100')
+    filters.validate(None, '1')
+    with pytest.raises(BitrueOrderMinPriceException):
+        filters.validate('0.12345', '100')
+    with pytest.raises(BitrueOrderMinAmountException):
+        filters.validate('0.1234', '100.05')
+    with pytest.raises(BitrueOrderMinAmountException):
+        filters.validate('0.1234', '0.5')
+    with pytest.raises(BitrueOrderMinTotalException):
+        filters.validate('0.1', 10)
+    with pytest.raises(BitrueOrderException):
+        filters.validate('1000.1', '1')
+    assert filters.round_price('0.12349') == Decimal('0.1234')
+    assert filters.round_price(0.12341, ROUND_UP) == Decimal('0.1235')
+    assert filters.round_quantity('100.99') == Decimal('100.9')
+
+
+def test_contract_filters():
+    filters = SymbolFilters.from_contract({'symbol': 'E-BTC-USDT', 'pricePrecision': 1, 'minOrderVolume': 1,
+                                           'maxLimitVolume': 1000, 'status': 1})
+    filters.validate('30000.5', 3)
+    with pytest.raises(BitrueOrderMinAmountException):
+        filters.validate('30000.5', '1.5')
+    with pytest.raises(BitrueOrderMinPriceException):
+        filters.validate('30000.55', 1)
+
+
+def test_create_order_is_validated_locally():
+    client = Client('key', 'secret', warm_up=False, rate_limiter=False)
+    client.symbol_cache._load([BTRUSDT, dict(BTRUSDT, symbol='OLDUSDT', status='BREAK')])
+    client.session = RecordingSession()
+    client.clock.add_sample(100.0, 100000, 100.0)
+    with pytest.raises(BitrueOrderMinPriceException):
+        client.order_limit_buy(symbol='BTRUSDT', quantity=100, price='0.12345')
+    with pytest.raises(BitrueOrderUnknownSymbolException):
+        client.order_market_sell(symbol='NOPEUSDT', quantity=100)
+    with pytest.raises(BitrueOrderInactiveSymbolException):
+        client.order_market_sell(symbol='OLDUSDT', quantity=100)
+    assert client.session.calls == []
+
+    # market orders are not checked against the price filters and the check can be skipped
+    for send in (lambda: client.order_market_buy(symbol='BTRUSDT', quantity=2),
+                 lambda: client.order_limit_buy(symbol='BTRUSDT', quantity=100, price='0.12345', validate=False)):
+        with pytest.raises(RuntimeError):
+            send()
+    assert len(client.session.calls) == 2
+    assert client.round_price('btrusdt', '0.12345') == Decimal('0.1234')
+    # one compiled entry whatever the case of the symbol
+    assert client.order_validator.filters('BTRUSDT') is client.order_validator.filters('btrusdt')
@@ -0,0 +1,135 @@
+import gzip
+import json
+
+from bitrue.streams import TradeBuffer
+from bitrue.websockets import BitrueClientFactory, BitrueClientProtocol, BitrueSocketManager
+
+
+class FakeProtocol(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def sendMessage(self, payload):
+        self.sent.append(json.loads(payload.decode('utf8')))
+
+
+def test_factory_routes_by_channel():
+    factory = BitrueClientFactory('ws://127.0.0.1:1/kline-api/ws')
+    depth, ticker = [], []
+    factory.add_channel('market_btrusdt_depth_step0', lambda: '{"event":"sub"}', depth.append, 'btrusdt')
+    factory.add_channel('market_btrusdt_ticker', lambda: '{"event":"sub"}', ticker.append, 'btrusdt')
+    assert factory.subscribe_messages() == ['{"event":"sub"}'] * 2
+
+    factory.route({'channel': 'market_btrusdt_ticker', 'tick': {}})
+    factory.route({'channel': 'market_btrusdt_depth_step0', 'tick': {}})
+    factory.route({'e': 'error'})
+    assert [m.get('channel') for m in depth] == ['market_btrusdt_depth_step0', None]
+    assert [m.get('channel') for m in ticker] == ['market_btrusdt_ticker', None]
+
+    # subscribe and unsubscribe on the live connection
+    factory.client = FakeProtocol()
+    factory.add_channel('market_ethusdt_ticker', lambda: '{"event":"sub","params":{"channel":"market_ethusdt_ticker"}}',
+                        ticker.append, 'ethusdt')
+    factory.remove_channel('market_btrusdt_depth_step0')
+    factory.route({'ping': 123})
+    assert factory.client.sent == [
+        {'event': 'sub', 'params': {'channel': 'market_ethusdt_ticker'}},
+        {'event': 'unsub', 'params': {'cb_id': 'btrusdt', 'channel': 'market_btrusdt_depth_step0'}},
+        {'pong': 123},
+    ]
+    assert list(factory.channels) == ['market_btrusdt_ticker', 'market_ethusdt_ticker']
+
+
+def test_manager_fans_channels_into_connections():
+    bm = BitrueSocketManager(channels_per_connection=2)
+    bm._connect = lambda factory: None
+    keys = [bm.start_symbol_ticker_socket(symbol, lambda msg: None) for symbol in ('BTRUSDT', 'ETHUSDT', 'XRPUSDT')]
+    assert keys == ['market_btrusdt_ticker', 'market_ethusdt_ticker', 'market_xrpusdt_ticker']
+    assert bm.start_symbol_ticker_socket('BTRUSDT', lambda msg: None) is False
+    assert bm.get_connection_count() == 2
+    # fills the free slot of the second connection
+    depth_key = bm.start_depth_socket('BTRUSDT', lambda msg: None, depth=5)
+    assert depth_key == 'market_btrusdt_depth_step5'
+    assert bm.get_connection_count() == 2
+
+    bm.stop_socket(keys[2])
+    assert bm.get_connection_count() == 2
+    bm.stop_socket(depth_key)
+    assert bm.get_connection_count() == 1
+    bm.close()
+    assert bm.get_connection_count() == 0
+
+
+def test_trade_socket_writes_its_buffer():
+    bm = BitrueSocketManager()
+    bm._connect = lambda factory: None
+    key = bm.start_trade_socket('BTRUSDT', size=5)
+    buffer = bm.get_buffer(key)
+    assert isinstance(buffer, TradeBuffer)
+    bm._conns[key].route({'channel': key, 'tick': {'data': [
+        {'id': 7, 'side': 'SELL', 'price': 0.5, 'vol': 2, 'amount': 1, 'ts': 1000}]}})
+    assert buffer.latest() == [(7, 1000, 0.5, 2.0, -1)]
+    bm.stop_socket(key)
+    assert bm.get_buffer(key) is None
+
+
+def test_frames_are_decoded_and_counted():
+    bm = BitrueSocketManager(skip_unknown_channels=True)
+    bm._connect = lambda factory: None
+    received = []
+    key = bm.start_symbol_ticker_socket('BTRUSDT', received.append)
+    protocol = BitrueClientProtocol()
+    protocol.factory = bm._conns[key]
+
+    protocol.onMessage(gzip.compress(b'{"channel":"market_btrusdt_ticker","tick":{"close":1.5}}'), True)
+    # stopped or never started channels are not parsed
+    protocol.onMessage(gzip.compress(b'{"channel":"market_ethusdt_ticker","tick":{"close":2.5}}'), True)
+    protocol.onMessage(gzip.compress(b'{"e": "error", '), True)
+    protocol.onMessage(b'not gzip', True)
+    protocol.onMessage(b'{"channel":"market_btrusdt_ticker","tick":{"close":1.6}}', False)
+    assert [m['tick']['close'] for m in received] == [1.5, 1.6]
+    assert bm.get_decode_stats() == {'frames': 5, 'dropped': 1, 'malformed': 2}
+
+
+def _give_up(factory):
+    factory.retries = factory.maxRetries
+    factory.clientConnectionFailed(object(), None)
+
+
+def test_dead_connection_channels_move_to_a_live_one():
+    bm = BitrueSocketManager(channels_per_connection=2)
+    bm._connect = lambda factory: None
+    received = []
+    keys = [bm.start_symbol_ticker_socket(symbol, received.append) for symbol in ('BTRUSDT', 'ETHUSDT', 'XRPUSDT')]
+    dead, live = bm._conns[keys[0]], bm._conns[keys[2]]
+    live.client = FakeProtocol()
+
+    _give_up(dead)
+    assert dead not in bm._factories and not dead.channels
+    # the free slot of the live connection, then a new connection
+    assert bm._conns[keys[0]] is live
+    assert bm._conns[keys[1]] not in (dead, live)
+    assert list(live.channels) == [keys[2], keys[0]]
+    assert live.client.sent[-1]['params']['channel'] == keys[0]
+    assert bm.get_connection_count() == 2
+    assert received == []
+    bm.close()
+    assert bm.get_connection_count() == 0
+
+
+def test_dead_connection_without_live_ones_reports_the_error():
+    bm = BitrueSocketManager()
+    bm._connect = lambda factory: None
+    received = []
+    key = bm.start_symbol_ticker_socket('BTRUSDT', received.append)
+    factory = bm._conns[key]
+
+    _give_up(factory)
+    assert received == [BitrueClientFactory._reconnect_error_payload]
+    assert bm.get_connection_count() == 0
+    # never reused for a new channel
+    assert bm._conns[bm.start_symbol_ticker_socket('ETHUSDT', received.append)] is not factory
+    bm.stop_socket(key)
+    assert key not in bm._conns and bm.get_connection_count() == 1
+    bm.close()